@@ -0,0 +1,603 @@
+# backend/agent/action_registry.py
+"""
+Action registry: one descriptor per action.
+
+execute_action and process_planner_output look actions up here instead of
+walking if/elif chains. A descriptor declares how to run the action (handler,
+optional async_handler), the parameters it takes, whether the planner shows an
+approval dialog first, how its result is rendered for the chat, and policy
+flags (read_only, service) used for parallel execution and caching.
+"""
+import copy
+from datetime import datetime
+
+import pytz
+
+from google_services.gmail_utils import (
+    send_draft_email, search_inbox, read_email, list_unread_emails, download_attachment,
+    mark_as_read, mark_as_unread, archive_email, star_email, delete_email
+)
+from google_services.calendar_utils import create_calendar_event, get_upcoming_events, create_instant_meet, delete_calendar_event, update_calendar_event
+from google_services.drive_utils import search_drive_files, upload_file, rename_file, delete_file
+from google_services.contacts_utils import search_contacts, create_contact, update_contact, delete_contact
+from google_services.tasks_utils import create_task, list_tasks, complete_task, update_task, delete_task
+from google_services.sheets_utils import create_spreadsheet, add_row_to_sheet, read_sheet_data, update_sheet_cell, delete_spreadsheet
+from google_services.docs_utils import create_document, append_to_document, read_document, replace_text_in_document, delete_document
+from agent.async_executor import search_inbox_async, get_upcoming_events_async, list_tasks_async, search_drive_files_async
+
+
+class ActionSpec:
+    """
+    Descriptor for one action.
+
+    :param name: Action name used by the planner and /agent/execute
+    :param handler: handler(params, user_email) -> result dict; None if the action cannot be executed directly
+    :param log_name: Label written to the execution log (or a function of the result)
+    :param params: Parameter schema {name: default}; missing parameters take the default
+    :param required: Parameters that must be present and non-empty
+    :param read_only: True if the action never changes user data (safe to run in parallel)
+    :param service: Google service the action reads or changes (gmail, calendar, ...)
+    :param approval: True if the planner asks the user before running it
+    :param approval_message: approval_message(plan) -> text shown in the approval dialog
+    :param prepare: prepare(plan) -> response dict, replacing the generic approval response
+    :param formatter: formatter(result) -> chat response for actions the planner runs immediately
+    :param async_handler: async_handler(params, user_email) coroutine for the async execution path
+    :param cache_ttl: Seconds a successful result is reused for the same user and parameters (0 disables)
+    """
+
+    def __init__(self, name, handler=None, log_name=None, params=None, required=(), read_only=False,
+                 service=None, approval=False, approval_message=None, prepare=None, formatter=None,
+                 async_handler=None, cache_ttl=0):
+        self.name = name
+        self.handler = handler
+        self.log_name = log_name or name
+        self.params = params or {}
+        self.required = tuple(required)
+        self.read_only = read_only
+        self.service = service
+        self.approval = approval
+        self.approval_message = approval_message
+        self.prepare = prepare
+        self.formatter = formatter
+        self.async_handler = async_handler
+        self.cache_ttl = cache_ttl
+
+    @property
+    def plannable(self) -> bool:
+        """True if process_planner_output accepts this action from the planner."""
+        return self.approval or self.formatter is not None
+
+    def build_params(self, source: dict) -> dict:
+        """Applies the parameter schema to a plan or request body."""
+        return {name: source.get(name, copy.copy(default)) for name, default in self.params.items()}
+
+    def log_label(self, result: dict) -> str:
+        return self.log_name(result) if callable(self.log_name) else self.log_name
+
+
+# ----- Chat formatters (planner actions that run immediately) -----
+
+def _format_email_list(result: dict, empty_message: str = None, failure_message: str = 'Search failed'):
+    if result.get('success') and 'emails' in result:
+        if not result['emails']:
+            return {"response_type": "RESULT", "response": empty_message or result.get('message', 'No emails found')}
+
+        response = f"{result['message']}\n\n"
+        for email in result['emails']:
+            response += f"📧 From: {email.get('from', 'Unknown')}\n"
+            response += f"📨 Subject: {email.get('subject', '(No Subject)')}\n"
+            response += f"📅 Date: {email.get('date', 'Unknown')}\n"
+            response += f"💬 {email.get('snippet', '')[:100]}...\n"
+            response += f"ID: {email.get('id')}\n\n"
+        return {"response_type": "RESULT", "response": response}
+    else:
+        return {"response_type": "RESULT", "response": result.get('message', failure_message)}
+
+
+def _format_email(result: dict):
+    if result.get('success') and 'email' in result:
+        email = result['email']
+        response = f"📧 Email Details\n\n"
+        response += f"From: {email.get('from', 'Unknown')}\n"
+        response += f"To: {email.get('to', 'Unknown')}\n"
+        response += f"Subject: {email.get('subject', '(No Subject)')}\n"
+        response += f"Date: {email.get('date', 'Unknown')}\n\n"
+        response += f"Body:\n{email.get('body', 'No body content')}\n\n"
+
+        if email.get('attachments'):
+            response += f"Attachments ({len(email['attachments'])}):\n"
+            for att in email['attachments']:
+                response += f"  📎 {att['filename']} ({att['size']} bytes)\n"
+
+        return {"response_type": "RESULT", "response": response}
+    else:
+        return {"response_type": "RESULT", "response": result.get('message', 'Failed to read email')}
+
+
+def _format_events(result: dict):
+    if result.get('success') and 'details' in result:
+        response = f"{result['message']}\n\n"
+        for event in result['details']:
+            summary = event.get('summary', 'No Title')
+            start = event.get('start', 'No time')
+            meet_link = event.get('meet_link', 'No Meet link')
+            response += f"📅 {summary}\n⏰ {start}\n🔗 {meet_link}\n\n"
+        return {"response_type": "RESULT", "response": response}
+    else:
+        return {"response_type": "RESULT", "response": result.get('message', 'No events found')}
+
+
+def _format_event_deleted(result: dict):
+    if result.get('success'):
+        return {"response_type": "RESULT", "response": result['message']}
+    else:
+        return {"response_type": "ERROR", "response": result.get('message', 'Failed to delete event')}
+
+
+def _format_contacts(result: dict):
+    if result.get('success') and 'details' in result:
+        response = f"{result['message']}\n\n"
+        for contact in result['details'][:5]:
+            name = contact.get('name', 'Unknown')
+            email = contact.get('email', 'No email')
+            phone = contact.get('phone', 'No phone')
+            response += f"👤 {name}\nEmail: {email}\nPhone: {phone}\n\n"
+        return {"response_type": "RESULT", "response": response}
+    else:
+        return {"response_type": "RESULT", "response": result.get('message', 'No contacts found')}
+
+
+def _format_files(result: dict):
+    if result.get('success') and 'details' in result:
+        response = f"{result['message']}\n\n"
+        for file in result['details']:
+            name = file.get('name', 'Unnamed')
+            link = file.get('link', '')
+            response += f"📁 {name}\n🔗 {link}\n\n"
+        return {"response_type": "RESULT", "response": response}
+    else:
+        return {"response_type": "RESULT", "response": result.get('message', 'No files found')}
+
+
+def _format_tasks(result: dict):
+    if result.get('success') and 'details' in result:
+        response = f"{result['message']}\n\n"
+        for task in result['details']:
+            title = task.get('title', 'No Title')
+            status = task.get('status', 'needsAction')
+            due = task.get('due', 'No due date')
+            response += f"✓ {title}\nStatus: {status}\nDue: {due}\n\n"
+        return {"response_type": "RESULT", "response": response}
+    else:
+        return {"response_type": "RESULT", "response": result.get('message', 'No tasks found')}
+
+
+def _format_sheet(result: dict):
+    if result.get('success') and 'details' in result:
+        data = result['details'].get('data', [])
+        response = f"{result['message']}\n\n"
+        for row in data[:10]:
+            response += " | ".join(str(cell) for cell in row) + "\n"
+        if len(data) > 10:
+            response += f"\n... and {len(data) - 10} more rows"
+        return {"response_type": "RESULT", "response": response}
+    else:
+        return {"response_type": "RESULT", "response": result.get('message', 'Failed to read sheet')}
+
+
+# ----- Planner presentation for actions that need the user first -----
+
+def _ist_display_time(iso_time: str) -> str:
+    ist_tz = pytz.timezone('Asia/Kolkata')
+    start_dt = datetime.fromisoformat(iso_time.replace('Z', '+00:00'))
+    if start_dt.tzinfo is None:
+        start_dt = ist_tz.localize(start_dt)
+    else:
+        start_dt = start_dt.astimezone(ist_tz)
+    return start_dt.strftime('%B %d at %I:%M %p IST')
+
+
+def _prepare_email_preview(plan: dict):
+    print(f"📧 GMAIL_COMPOSE detected")
+    print(f"📧 To: {plan.get('to')}")
+    print(f"📧 Subject: {plan.get('subject')}")
+    print(f"📧 Body preview: {plan.get('body', '')[:100]}")
+
+    result = {
+        "response_type": "EMAIL_PREVIEW",
+        "action": "GMAIL_SEND",
+        "message": "Please review your email before sending.",
+        "params": {
+            "to": plan.get("to", []),
+            "cc": plan.get("cc", []),
+            "bcc": plan.get("bcc", []),
+            "subject": plan.get("subject", ""),
+            "body": plan.get("body", "")
+        }
+    }
+    print(f"✅ Returning EMAIL_PREVIEW: {result}")
+    return result
+
+
+def _prepare_calendar_create(plan: dict):
+    from agent.executor import parse_date_string_to_iso
+
+    # Use robust date parsing if NOT instant
+    if not plan.get("instant"):
+        date_info = parse_date_string_to_iso(plan.get("start_time"))
+        if not date_info['success']:
+            return {"response_type": "ERROR", "response": f"Scheduling failed: {date_info['error']}"}
+
+        # Overwrite LLM's potentially invalid date with guaranteed ISO dates
+        plan["start_time"] = date_info['start_time']
+        plan["end_time"] = date_info['end_time']
+
+    # Format time in IST for display
+    try:
+        message_prefix = f"Ready to schedule: '{plan.get('summary')}' on {_ist_display_time(plan.get('start_time'))}."
+    except:
+        message_prefix = f"Ready to schedule: '{plan.get('summary')}'."
+
+    return {
+        "response_type": "APPROVAL",
+        "action": "CALENDAR_CREATE",
+        "message": message_prefix,
+        "params": ACTIONS["CALENDAR_CREATE"].build_params(plan)
+    }
+
+
+def _prepare_calendar_update(plan: dict):
+    from agent.executor import parse_date_string_to_iso
+
+    # Parse new times if provided
+    new_start_time = plan.get("new_start_time")
+    new_end_time = plan.get("new_end_time")
+
+    if new_start_time and not new_end_time:
+        # If only start time provided, calculate end time
+        date_info = parse_date_string_to_iso(new_start_time)
+        if date_info['success']:
+            new_start_time = date_info['start_time']
+            new_end_time = date_info['end_time']
+
+    try:
+        if new_start_time:
+            message_prefix = f"Ready to reschedule '{plan.get('summary_search')}' to {_ist_display_time(new_start_time)}."
+        else:
+            message_prefix = f"Ready to update event '{plan.get('summary_search')}'."
+    except:
+        message_prefix = f"Ready to update event '{plan.get('summary_search')}'."
+
+    params = ACTIONS["CALENDAR_UPDATE"].build_params(plan)
+    params.update({
+        "event_id": plan.get("event_id", ""),
+        "new_start_time": new_start_time,
+        "new_end_time": new_end_time,
+        "new_attendees": plan.get("new_attendees", [])
+    })
+    return {
+        "response_type": "APPROVAL",
+        "action": "CALENDAR_UPDATE",
+        "message": message_prefix,
+        "params": params
+    }
+
+
+def _task_due_message(plan: dict) -> str:
+    message = f"Ready to create task: '{plan.get('title')}'"
+    if plan.get('due_date'):
+        message += f" (Due: {plan.get('due_date')})"
+    return message
+
+
+# ----- Handlers needing more than a direct call -----
+
+GMAIL_UPDATE_OPERATIONS = {
+    'mark_read': mark_as_read,
+    'mark_unread': mark_as_unread,
+    'archive': archive_email,
+    'star': star_email
+}
+
+
+def _gmail_update(params: dict, user_email: str):
+    operation = params['operation']
+    handler = GMAIL_UPDATE_OPERATIONS.get(operation)
+    if handler is None:
+        return {"success": False, "message": f"Unknown operation: {operation}"}
+    return handler(params['message_id'], user_email)
+
+
+def _calendar_create(params: dict, user_email: str):
+    if params['instant']:
+        return create_instant_meet(
+            title=params['summary'] or 'Instant Meeting',
+            attendees=params['attendees'],
+            user_email=user_email,
+            timezone='Asia/Kolkata'
+        )
+    return create_calendar_event(
+        summary=params['summary'],
+        description=params['description'],
+        start_time=params['start_time'],
+        end_time=params['end_time'],
+        attendees=params['attendees'],
+        user_email=user_email
+    )
+
+
+def _tasks_complete(params: dict, user_email: str):
+    task_id = params['task_id']
+    title_search = params['title_search']
+
+    # If no task_id, search by title
+    if not task_id and title_search:
+        tasks_result = list_tasks(max_results=50, user_email=user_email)
+        if tasks_result.get('success'):
+            for task in tasks_result['details']:
+                if title_search.lower() in task['title'].lower():
+                    task_id = task['id']
+                    break
+
+    if not task_id:
+        return {"success": False, "message": f"Task '{title_search}' not found", "task_not_found": True}
+    return complete_task(task_id=task_id, user_email=user_email)
+
+
+_REGISTRY = [
+    # GMAIL
+    ActionSpec(
+        "GMAIL_COMPOSE", service="gmail", approval=True, prepare=_prepare_email_preview
+    ),
+    ActionSpec(
+        "GMAIL_SEND", service="gmail", log_name="Email Sent",
+        params={"to": None, "subject": None, "body": None, "cc": None, "bcc": None, "approved": False},
+        required=("to",),
+        handler=lambda p, u: send_draft_email(
+            to=p['to'], subject=p['subject'], body=p['body'], cc=p['cc'], bcc=p['bcc'],
+            user_email=u, approved=p['approved']
+        )
+    ),
+    ActionSpec(
+        "GMAIL_SEARCH", service="gmail", log_name="Inbox Searched", read_only=True,
+        params={"query": "", "max_results": 10},
+        handler=lambda p, u: search_inbox(query=p['query'], max_results=p['max_results'], user_email=u),
+        async_handler=lambda p, u: search_inbox_async(p['query'], p['max_results'], u),
+        formatter=_format_email_list,
+        cache_ttl=60
+    ),
+    ActionSpec(
+        "GMAIL_READ", service="gmail", log_name="Email Read", read_only=True,
+        params={"message_id": None}, required=("message_id",),
+        handler=lambda p, u: read_email(message_id=p['message_id'], user_email=u),
+        formatter=_format_email,
+        cache_ttl=300
+    ),
+    ActionSpec(
+        "GMAIL_LIST_UNREAD", service="gmail", log_name="Unread Emails Listed", read_only=True,
+        params={"max_results": 10},
+        handler=lambda p, u: list_unread_emails(max_results=p['max_results'], user_email=u),
+        async_handler=lambda p, u: search_inbox_async("is:unread", p['max_results'], u),
+        formatter=lambda result: _format_email_list(
+            result, "You have no unread emails! 🎉", 'Failed to retrieve unread emails'
+        ),
+        cache_ttl=30
+    ),
+    ActionSpec(
+        "GMAIL_DOWNLOAD_ATTACHMENT", service="gmail", log_name="Attachment Downloaded", read_only=True,
+        params={"message_id": None, "attachment_id": None}, required=("message_id", "attachment_id"),
+        handler=lambda p, u: download_attachment(message_id=p['message_id'], attachment_id=p['attachment_id'], user_email=u)
+    ),
+    ActionSpec(
+        "GMAIL_UPDATE", service="gmail", log_name="Email Updated",
+        params={"message_id": None, "operation": "mark_read"}, required=("message_id",),
+        handler=_gmail_update
+    ),
+    ActionSpec(
+        "GMAIL_DELETE", service="gmail", log_name="Email Deleted",
+        params={"message_id": None, "permanent": False}, required=("message_id",),
+        handler=lambda p, u: delete_email(message_id=p['message_id'], permanent=p['permanent'], user_email=u)
+    ),
+
+    # CALENDAR
+    ActionSpec(
+        "CALENDAR_CREATE", service="calendar", log_name="Calendar Event Created",
+        params={
+            "summary": None, "description": "Scheduled via Vocal Agent", "start_time": None,
+            "end_time": None, "attendees": [], "instant": False
+        },
+        handler=_calendar_create,
+        approval=True, prepare=_prepare_calendar_create
+    ),
+    ActionSpec(
+        "CALENDAR_LIST", service="calendar", log_name="Upcoming Events Retrieved", read_only=True,
+        params={"max_results": 10},
+        handler=lambda p, u: get_upcoming_events(p['max_results'], u),
+        async_handler=lambda p, u: get_upcoming_events_async(p['max_results'], u),
+        formatter=_format_events,
+        cache_ttl=60
+    ),
+    ActionSpec(
+        "CALENDAR_DELETE", service="calendar", log_name="Calendar Event Deleted",
+        params={"event_id": None, "summary": None},
+        handler=lambda p, u: delete_calendar_event(event_id=p['event_id'], summary=p['summary'], user_email=u),
+        formatter=_format_event_deleted
+    ),
+    ActionSpec(
+        "CALENDAR_UPDATE", service="calendar", log_name="Calendar Event Updated",
+        params={
+            "event_id": None, "summary_search": None, "new_summary": None, "new_start_time": None,
+            "new_end_time": None, "new_description": None, "new_attendees": None
+        },
+        handler=lambda p, u: update_calendar_event(
+            event_id=p['event_id'], summary_search=p['summary_search'], new_summary=p['new_summary'],
+            new_start_time=p['new_start_time'], new_end_time=p['new_end_time'],
+            new_description=p['new_description'], new_attendees=p['new_attendees'], user_email=u
+        ),
+        approval=True, prepare=_prepare_calendar_update
+    ),
+
+    # CONTACTS
+    ActionSpec(
+        "CONTACTS_SEARCH", service="contacts", log_name="Contacts Searched", read_only=True,
+        params={"query": None}, required=("query",),
+        handler=lambda p, u: search_contacts(p['query'], u),
+        formatter=_format_contacts
+    ),
+    ActionSpec(
+        "CONTACTS_CREATE", service="contacts", log_name="Contact Created",
+        params={"given_name": None, "family_name": None, "email": None, "phone": None},
+        handler=lambda p, u: create_contact(
+            given_name=p['given_name'], family_name=p['family_name'], email=p['email'], phone=p['phone'], user_email=u
+        ),
+        approval=True,
+        approval_message=lambda plan: f"Ready to add contact: {plan.get('given_name', '')} {plan.get('family_name', '')} ({plan.get('email', 'No email')})."
+    ),
+    ActionSpec(
+        "CONTACTS_UPDATE", service="contacts", log_name="Contact Updated",
+        params={"resource_name": None, "name": None, "email": None, "phone": None}, required=("resource_name",),
+        handler=lambda p, u: update_contact(
+            resource_name=p['resource_name'], name=p['name'], email=p['email'], phone=p['phone'], user_email=u
+        )
+    ),
+    ActionSpec(
+        "CONTACTS_DELETE", service="contacts", log_name="Contact Deleted",
+        params={"resource_name": None}, required=("resource_name",),
+        handler=lambda p, u: delete_contact(resource_name=p['resource_name'], user_email=u)
+    ),
+
+    # DRIVE
+    ActionSpec(
+        "DRIVE_SEARCH", service="drive", log_name="Drive Search Performed", read_only=True,
+        params={"query": None, "max_results": 10}, required=("query",),
+        handler=lambda p, u: search_drive_files(p['query'], u, p['max_results']),
+        async_handler=lambda p, u: search_drive_files_async(p['query'], u, p['max_results']),
+        formatter=_format_files,
+        cache_ttl=120
+    ),
+    ActionSpec(
+        "DRIVE_CREATE", service="drive", log_name="File Uploaded to Drive",
+        params={"file_name": None, "content": "", "mime_type": "text/plain"}, required=("file_name",),
+        handler=lambda p, u: upload_file(
+            file_name=p['file_name'], file_content=p['content'].encode('utf-8'), mime_type=p['mime_type'], user_email=u
+        )
+    ),
+    ActionSpec(
+        "DRIVE_UPDATE", service="drive", log_name="File Renamed",
+        params={"file_id": None, "new_name": None}, required=("file_id", "new_name"),
+        handler=lambda p, u: rename_file(file_id=p['file_id'], new_name=p['new_name'], user_email=u)
+    ),
+    ActionSpec(
+        "DRIVE_DELETE", service="drive", log_name="File Deleted from Drive",
+        params={"file_id": None}, required=("file_id",),
+        handler=lambda p, u: delete_file(file_id=p['file_id'], user_email=u)
+    ),
+
+    # TASKS
+    ActionSpec(
+        "TASKS_CREATE", service="tasks", log_name="Task Created",
+        params={"title": None, "notes": "", "due_date": None}, required=("title",),
+        handler=lambda p, u: create_task(title=p['title'], notes=p['notes'], due_date=p['due_date'], user_email=u),
+        approval=True, approval_message=_task_due_message
+    ),
+    ActionSpec(
+        "TASKS_LIST", service="tasks", log_name="Tasks Listed", read_only=True,
+        params={"max_results": 10},
+        handler=lambda p, u: list_tasks(max_results=p['max_results'], user_email=u),
+        async_handler=lambda p, u: list_tasks_async(max_results=p['max_results'], user_email=u),
+        formatter=_format_tasks,
+        cache_ttl=60
+    ),
+    ActionSpec(
+        "TASKS_COMPLETE", service="tasks",
+        log_name=lambda result: "Task Not Found" if result.get("task_not_found") else "Task Completed",
+        params={"task_id": "", "title_search": None},
+        handler=_tasks_complete,
+        approval=True,
+        approval_message=lambda plan: f"Ready to mark task as complete: '{plan.get('title_search')}'"
+    ),
+    ActionSpec(
+        "TASKS_UPDATE", service="tasks", log_name="Task Updated",
+        params={"task_id": None, "title": None, "notes": None, "due_date": None, "status": None}, required=("task_id",),
+        handler=lambda p, u: update_task(
+            task_id=p['task_id'], title=p['title'], notes=p['notes'], due_date=p['due_date'], status=p['status'], user_email=u
+        )
+    ),
+    ActionSpec(
+        "TASKS_DELETE", service="tasks", log_name="Task Deleted",
+        params={"task_id": None}, required=("task_id",),
+        handler=lambda p, u: delete_task(task_id=p['task_id'], user_email=u)
+    ),
+
+    # SHEETS
+    ActionSpec(
+        "SHEETS_CREATE", service="sheets", log_name="Spreadsheet Created",
+        params={"title": None}, required=("title",),
+        handler=lambda p, u: create_spreadsheet(title=p['title'], user_email=u),
+        approval=True, approval_message=lambda plan: f"Ready to create spreadsheet: '{plan.get('title')}'"
+    ),
+    ActionSpec(
+        "SHEETS_ADD_ROW", service="sheets", log_name="Row Added to Sheet",
+        params={"sheet_id": None, "range_name": "Sheet1!A:Z", "values": []}, required=("sheet_id",),
+        handler=lambda p, u: add_row_to_sheet(sheet_id=p['sheet_id'], range_name=p['range_name'], values=p['values'], user_email=u),
+        approval=True, approval_message=lambda plan: "Ready to add row to spreadsheet"
+    ),
+    ActionSpec(
+        "SHEETS_READ", service="sheets", log_name="Sheet Data Read", read_only=True,
+        params={"sheet_id": None, "range_name": "Sheet1!A1:Z100"}, required=("sheet_id",),
+        handler=lambda p, u: read_sheet_data(sheet_id=p['sheet_id'], range_name=p['range_name'], user_email=u),
+        formatter=_format_sheet,
+        cache_ttl=60
+    ),
+    ActionSpec(
+        "SHEETS_UPDATE", service="sheets", log_name="Sheet Cell Updated",
+        params={"sheet_id": None, "range_name": None, "value": None}, required=("sheet_id", "range_name"),
+        handler=lambda p, u: update_sheet_cell(sheet_id=p['sheet_id'], range_name=p['range_name'], value=p['value'], user_email=u)
+    ),
+    ActionSpec(
+        "SHEETS_DELETE", service="sheets", log_name="Spreadsheet Deleted",
+        params={"sheet_id": None}, required=("sheet_id",),
+        handler=lambda p, u: delete_spreadsheet(sheet_id=p['sheet_id'], user_email=u)
+    ),
+
+    # DOCS
+    ActionSpec(
+        "DOCS_CREATE", service="docs", log_name="Document Created",
+        params={"title": None}, required=("title",),
+        handler=lambda p, u: create_document(title=p['title'], user_email=u),
+        approval=True, approval_message=lambda plan: f"Ready to create document: '{plan.get('title')}'"
+    ),
+    ActionSpec(
+        "DOCS_READ", service="docs", log_name="Document Read", read_only=True,
+        params={"doc_id": None}, required=("doc_id",),
+        handler=lambda p, u: read_document(doc_id=p['doc_id'], user_email=u),
+        cache_ttl=60
+    ),
+    ActionSpec(
+        "DOCS_APPEND", service="docs", log_name="Text Appended to Document",
+        params={"doc_id": None, "text": None}, required=("doc_id",),
+        handler=lambda p, u: append_to_document(doc_id=p['doc_id'], content=p['text'], user_email=u),
+        approval=True, approval_message=lambda plan: "Ready to append text to document"
+    ),
+    ActionSpec(
+        "DOCS_UPDATE", service="docs", log_name="Document Text Replaced",
+        params={"doc_id": None, "find_text": None, "replace_text": None}, required=("doc_id", "find_text"),
+        handler=lambda p, u: replace_text_in_document(
+            doc_id=p['doc_id'], find_text=p['find_text'], replace_text=p['replace_text'], user_email=u
+        )
+    ),
+    ActionSpec(
+        "DOCS_DELETE", service="docs", log_name="Document Deleted",
+        params={"doc_id": None}, required=("doc_id",),
+        handler=lambda p, u: delete_document(doc_id=p['doc_id'], user_email=u)
+    ),
+]
+
+ACTIONS = {spec.name: spec for spec in _REGISTRY}
+
+READ_ONLY_ACTIONS = frozenset(name for name, spec in ACTIONS.items() if spec.read_only)
+
+
+def get_action(name: str):
+    """Returns the ActionSpec for name, or None for unknown actions."""
+    return ACTIONS.get(name)
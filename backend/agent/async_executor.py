@@ -0,0 +1,121 @@
+# backend/agent/async_executor.py
+"""
+asyncio execution path for the hot read-only actions.
+
+GMAIL_SEARCH, GMAIL_LIST_UNREAD, CALENDAR_LIST, TASKS_LIST and DRIVE_SEARCH are
+sent through the aiohttp transport in google_services.async_http, reusing the
+same request builders and result formatters as the sync wrappers. Gmail message
+metadata is fetched concurrently. The action registry wires these coroutines up
+as async_handler; executor.execute_action_async runs every other action in a thread.
+"""
+import asyncio
+import os
+
+from google_services.async_http import execute_request
+from google_services.gmail_utils import (
+    get_google_service, inbox_search_request, inbox_search_result, metadata_request, summarize_message,
+    search_local_store
+)
+from google_services.calendar_utils import upcoming_events_request, upcoming_events_result
+from google_services import calendar_cache, drive_index
+from google_services.tasks_utils import list_tasks_request, list_tasks_result
+from google_services.drive_utils import (
+    clamp_max_results, escape_drive_query, lookup_index, search_files_request, search_files_result
+)
+from utils.stream_events import emit
+
+# Set ASYNC_GOOGLE_IO=0 to send every action through the sync wrappers
+ASYNC_GOOGLE_IO = os.getenv("ASYNC_GOOGLE_IO", "1") == "1"
+# Concurrent metadata requests per Gmail search
+GMAIL_ASYNC_CONCURRENCY = int(os.getenv("GMAIL_ASYNC_CONCURRENCY", "10"))
+
+
+async def _get_service(api_name: str, api_version: str, user_email: str):
+    # Token lookup/refresh may hit Supabase or Google; keep it off the event loop
+    return await asyncio.to_thread(get_google_service, api_name, api_version, user_email)
+
+
+async def search_inbox_async(query: str, max_results: int = 10, user_email: str = None):
+    """Async search_inbox: same result dict, metadata fetched concurrently."""
+    # The local store may run a history sync; keep it off the event loop
+    local_summaries = await asyncio.to_thread(search_local_store, user_email, query, max_results)
+    if local_summaries is not None:
+        return inbox_search_result(query, local_summaries or None)
+
+    service, error = await _get_service("gmail", "v1", user_email)
+    if error:
+        return {"success": False, "message": error}
+
+    try:
+        results = await execute_request(inbox_search_request(service, query, max_results))
+        message_ids = list(dict.fromkeys(msg["id"] for msg in results.get("messages", [])))
+        if not message_ids:
+            return inbox_search_result(query, None)
+
+        semaphore = asyncio.Semaphore(GMAIL_ASYNC_CONCURRENCY)
+
+        async def fetch_summary(message_id):
+            async with semaphore:
+                try:
+                    summary = summarize_message(await execute_request(metadata_request(service, message_id)))
+                except Exception as e:
+                    print(f"⚠️ Could not fetch metadata for message {message_id}: {e}")
+                    return None
+            emit("email", summary)
+            return summary
+
+        summaries = await asyncio.gather(*(fetch_summary(message_id) for message_id in message_ids))
+        return inbox_search_result(query, [summary for summary in summaries if summary])
+    except Exception as e:
+        return {"success": False, "message": f"Failed to search inbox: {e}"}
+
+
+async def get_upcoming_events_async(max_results: int = 10, user_email: str = None):
+    # A cache sync is a (rare) blocking Google call; keep it off the event loop
+    cached_events = await asyncio.to_thread(calendar_cache.upcoming_events, user_email, max_results)
+    if cached_events is not None:
+        return upcoming_events_result({"items": cached_events})
+
+    service, error = await _get_service("calendar", "v3", user_email)
+    if error:
+        return {"success": False, "message": error}
+
+    try:
+        return upcoming_events_result(await execute_request(upcoming_events_request(service, max_results)))
+    except Exception as e:
+        return {"success": False, "message": f"Failed to retrieve upcoming events: {e}"}
+
+
+async def list_tasks_async(tasklist_id: str = "@default", max_results: int = 10, user_email: str = None):
+    service, error = await _get_service("tasks", "v1", user_email)
+    if error:
+        return {"success": False, "message": error}
+
+    try:
+        return list_tasks_result(await execute_request(list_tasks_request(service, tasklist_id, max_results)))
+    except Exception as e:
+        return {"success": False, "message": f"Failed to list tasks: {e}"}
+
+
+async def search_drive_files_async(query: str, user_email: str = None, max_results: int = 10):
+    escaped_query = escape_drive_query(query)
+    if not escaped_query:
+        return {"success": False, "message": "Invalid search query."}
+
+    max_results = clamp_max_results(max_results)
+    # An index change sync is a blocking Google call; keep it off the event loop
+    indexed_files = await asyncio.to_thread(lookup_index, drive_index.search_files, user_email, query, max_results)
+    if indexed_files is not None:
+        return search_files_result(query, {"files": indexed_files})
+
+    service, error = await _get_service("drive", "v3", user_email)
+    if error:
+        return {"success": False, "message": error}
+
+    try:
+        return search_files_result(
+            query, await execute_request(search_files_request(service, escaped_query, max_results))
+        )
+    except Exception as e:
+        return {"success": False, "message": f"Failed to search Google Drive: {e}"}
+
@@ -1,348 +1,110 @@
 # backend/agent/executor.py
-from google_services.gmail_utils import (
-    send_draft_email, search_inbox, read_email, list_unread_emails, download_attachment,
-    mark_as_read, mark_as_unread, archive_email, star_email, delete_email
-)
-from google_services.calendar_utils import create_calendar_event, get_upcoming_events, create_instant_meet, delete_calendar_event, update_calendar_event
-from google_services.drive_utils import search_drive_files, upload_file, rename_file, delete_file
-from google_services.contacts_utils import search_contacts, create_contact, update_contact, delete_contact
-from google_services.tasks_utils import create_task, list_tasks, complete_task, update_task, delete_task
-from google_services.sheets_utils import create_spreadsheet, add_row_to_sheet, read_sheet_data, update_sheet_cell, delete_spreadsheet
-from google_services.docs_utils import create_document, append_to_document, read_document, replace_text_in_document, delete_document
 from logs.log_utils import log_execution
 from planner.router import call_llm_for_small_talk
+from utils.stream_events import emit
+from utils.tracing import span
+from agent.action_registry import ACTIONS, get_action
+from agent.async_executor import ASYNC_GOOGLE_IO
+from agent.result_cache import get_or_fetch, invalidate_service
+from google_services.async_http import run_async
+import asyncio
 import dateparser
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import pytz
 
-def execute_action(action: str, params: dict, user_email: str):
-    """
-    Dispatches a single action to the correct API wrapper.
-    NO PARSING. NO GUESSING. Just execute what the planner says.
-    """
-    log_execution(user_email, action, "ATTEMPTING", {"params": params})
+# Planner actions that only read data; steps of a multi-action plan with these run in parallel
+READ_ONLY_ACTIONS = {name for name, spec in ACTIONS.items() if spec.read_only} | {"SMALL_TALK"}
+# Responses that need the user before anything else happens (a form or an approval dialog)
+INTERACTIVE_RESPONSES = {"EMAIL_PREVIEW", "CALENDAR_PREVIEW", "APPROVAL"}
 
-    # GMAIL
-    if action == "GMAIL_SEND":
-        result = send_draft_email(
-            to=params.get('to'),
-            subject=params.get('subject'),
-            body=params.get('body'),
-            cc=params.get('cc'),
-            bcc=params.get('bcc'),
-            user_email=user_email,
-            approved=params.get('approved', False)
-        )
-        action_name = "Email Sent"
+PLAN_MAX_STEPS = int(os.getenv("PLAN_MAX_STEPS", "5"))
+PLAN_MAX_PARALLEL = int(os.getenv("PLAN_MAX_PARALLEL", "4"))
 
-    elif action == "GMAIL_SEARCH":
-        result = search_inbox(
-            query=params.get('query', ''),
-            max_results=params.get('max_results', 10),
-            user_email=user_email
-        )
-        action_name = "Inbox Searched"
+_step_pool = ThreadPoolExecutor(max_workers=PLAN_MAX_PARALLEL, thread_name_prefix="plan-step")
 
-    elif action == "GMAIL_READ":
-        result = read_email(
-            message_id=params.get('message_id'),
-            user_email=user_email
-        )
-        action_name = "Email Read"
+def supports_async(action: str) -> bool:
+    """True if the action has a native async implementation (and async I/O is enabled)."""
+    spec = get_action(action)
+    return ASYNC_GOOGLE_IO and spec is not None and spec.async_handler is not None
 
-    elif action == "GMAIL_LIST_UNREAD":
-        result = list_unread_emails(
-            max_results=params.get('max_results', 10),
-            user_email=user_email
-        )
-        action_name = "Unread Emails Listed"
-
-    elif action == "GMAIL_DOWNLOAD_ATTACHMENT":
-        result = download_attachment(
-            message_id=params.get('message_id'),
-            attachment_id=params.get('attachment_id'),
-            user_email=user_email
-        )
-        action_name = "Attachment Downloaded"
-
-    elif action == "GMAIL_UPDATE":
-        operation = params.get('operation', 'mark_read')
-        message_id = params.get('message_id')
-
-        if operation == 'mark_read':
-            result = mark_as_read(message_id, user_email)
-        elif operation == 'mark_unread':
-            result = mark_as_unread(message_id, user_email)
-        elif operation == 'archive':
-            result = archive_email(message_id, user_email)
-        elif operation == 'star':
-            result = star_email(message_id, user_email)
-        else:
-            result = {"success": False, "message": f"Unknown operation: {operation}"}
+def _missing_params(spec, params: dict) -> list:
+    return [name for name in spec.required if params.get(name) in (None, "", [])]
 
-        action_name = "Email Updated"
-
-    elif action == "GMAIL_DELETE":
-        result = delete_email(
-            message_id=params.get('message_id'),
-            permanent=params.get('permanent', False),
-            user_email=user_email
-        )
-        action_name = "Email Deleted"
-
-    # CALENDAR
-    elif action == "CALENDAR_CREATE":
-        if params.get('instant'):
-            result = create_instant_meet(
-                title=params.get('summary', 'Instant Meeting'),
-                attendees=params.get('attendees', []),
-                user_email=user_email,
-                timezone='Asia/Kolkata'
-            )
-        else:
-            result = create_calendar_event(
-                summary=params.get('summary'),
-                description=params.get('description', 'Scheduled via Vocal Agent'),
-                start_time=params.get('start_time'),
-                end_time=params.get('end_time'),
-                attendees=params.get('attendees'),
-                user_email=user_email
-            )
-        action_name = "Calendar Event Created"
-
-    elif action == "CALENDAR_LIST":
-        result = get_upcoming_events(params.get('max_results', 10), user_email)
-        action_name = "Upcoming Events Retrieved"
-
-    elif action == "CALENDAR_DELETE":
-        result = delete_calendar_event(
-            event_id=params.get('event_id'),
-            summary=params.get('summary'),
-            user_email=user_email
-        )
-        action_name = "Calendar Event Deleted"
-
-    elif action == "CALENDAR_UPDATE":
-        result = update_calendar_event(
-            event_id=params.get('event_id'),
-            summary_search=params.get('summary_search'),
-            new_summary=params.get('new_summary'),
-            new_start_time=params.get('new_start_time'),
-            new_end_time=params.get('new_end_time'),
-            new_description=params.get('new_description'),
-            new_attendees=params.get('new_attendees'),
-            user_email=user_email
-        )
-        action_name = "Calendar Event Updated"
-
-    # CONTACTS
-    elif action == "CONTACTS_SEARCH":
-        result = search_contacts(params.get('query'), user_email)
-        action_name = "Contacts Searched"
-
-    elif action == "CONTACTS_CREATE":
-        result = create_contact(
-            given_name=params.get('given_name'),
-            family_name=params.get('family_name'),
-            email=params.get('email'),
-            phone=params.get('phone'),
-            user_email=user_email
-        )
-        action_name = "Contact Created"
-
-    elif action == "CONTACTS_UPDATE":
-        result = update_contact(
-            resource_name=params.get('resource_name'),
-            name=params.get('name'),
-            email=params.get('email'),
-            phone=params.get('phone'),
-            user_email=user_email
-        )
-        action_name = "Contact Updated"
-
-    elif action == "CONTACTS_DELETE":
-        result = delete_contact(
-            resource_name=params.get('resource_name'),
-            user_email=user_email
-        )
-        action_name = "Contact Deleted"
-
-    # DRIVE
-    elif action == "DRIVE_SEARCH":
-        result = search_drive_files(params.get('query'), user_email)
-        action_name = "Drive Search Performed"
-
-    elif action == "DRIVE_CREATE":
-        content = params.get('content', '').encode('utf-8')
-        result = upload_file(
-            file_name=params.get('file_name'),
-            file_content=content,
-            mime_type=params.get('mime_type', 'text/plain'),
-            user_email=user_email
-        )
-        action_name = "File Uploaded to Drive"
+def execute_action(action: str, params: dict, user_email: str):
+    """
+    Dispatches a single action to the correct API wrapper.
+    NO PARSING. NO GUESSING. Just execute what the planner says.
+    Read-only actions with a cache_ttl are answered from the per-user result cache when fresh.
+    """
+    with span("action", action=action):
+        spec = get_action(action)
+        if spec is not None and spec.cache_ttl:
+            result, cached = get_or_fetch(spec, params, user_email, lambda: _dispatch(action, params, user_email))
+            if cached:
+                print(f"⚡ Result cache hit: {action}")
+                emit("action_dispatched", {"action": action, "cached": True})
+                log_execution(user_email, spec.log_label(result), "SUCCESS" if result.get('success') else "FAILED",
+                              {"cached": True, "message": result.get('message')})
+            return result
+
+        result = _dispatch(action, params, user_email)
+        if spec is not None and spec.service and not spec.read_only and result.get('success'):
+            # The user's cached reads of this service may no longer be true
+            invalidate_service(user_email, spec.service)
+        return result
 
-    elif action == "DRIVE_UPDATE":
-        result = rename_file(
-            file_id=params.get('file_id'),
-            new_name=params.get('new_name'),
-            user_email=user_email
-        )
-        action_name = "File Renamed"
+def _dispatch(action: str, params: dict, user_email: str):
+    if supports_async(action):
+        # Hot read actions wait on Google from the shared event loop and connection pool
+        return run_async(execute_action_async(action, params, user_email))
 
-    elif action == "DRIVE_DELETE":
-        result = delete_file(
-            file_id=params.get('file_id'),
-            user_email=user_email
-        )
-        action_name = "File Deleted from Drive"
-
-    # TASKS
-    elif action == "TASKS_CREATE":
-        result = create_task(
-            title=params.get('title'),
-            notes=params.get('notes', ''),
-            due_date=params.get('due_date'),
-            user_email=user_email
-        )
-        action_name = "Task Created"
+    log_execution(user_email, action, "ATTEMPTING", {"params": params})
+    emit("action_dispatched", {"action": action})
 
-    elif action == "TASKS_LIST":
-        result = list_tasks(
-            max_results=params.get('max_results', 10),
-            user_email=user_email
-        )
-        action_name = "Tasks Listed"
-
-    elif action == "TASKS_COMPLETE":
-        task_id = params.get('task_id')
-        title_search = params.get('title_search')
-
-        # If no task_id, search by title
-        if not task_id and title_search:
-            tasks_result = list_tasks(max_results=50, user_email=user_email)
-            if tasks_result.get('success'):
-                for task in tasks_result['details']:
-                    if title_search.lower() in task['title'].lower():
-                        task_id = task['id']
-                        break
-
-        if task_id:
-            result = complete_task(task_id=task_id, user_email=user_email)
-            action_name = "Task Completed"
+    spec = get_action(action)
+    if spec is None or spec.handler is None:
+        result = {"success": False, "message": f"Unknown action: {action}"}
+        action_name = "Unknown Action"
+    else:
+        missing = _missing_params(spec, params)
+        if missing:
+            result = {"success": False, "message": f"Missing required parameter(s) for {action}: {', '.join(missing)}"}
         else:
-            result = {"success": False, "message": f"Task '{title_search}' not found"}
-            action_name = "Task Not Found"
-
-    elif action == "TASKS_UPDATE":
-        result = update_task(
-            task_id=params.get('task_id'),
-            title=params.get('title'),
-            notes=params.get('notes'),
-            due_date=params.get('due_date'),
-            status=params.get('status'),
-            user_email=user_email
-        )
-        action_name = "Task Updated"
-
-    elif action == "TASKS_DELETE":
-        result = delete_task(
-            task_id=params.get('task_id'),
-            user_email=user_email
-        )
-        action_name = "Task Deleted"
-
-    # SHEETS
-    elif action == "SHEETS_CREATE":
-        result = create_spreadsheet(
-            title=params.get('title'),
-            user_email=user_email
-        )
-        action_name = "Spreadsheet Created"
-
-    elif action == "SHEETS_ADD_ROW":
-        result = add_row_to_sheet(
-            sheet_id=params.get('sheet_id'),
-            range_name=params.get('range_name', 'Sheet1!A:Z'),
-            values=params.get('values', []),
-            user_email=user_email
-        )
-        action_name = "Row Added to Sheet"
-
-    elif action == "SHEETS_READ":
-        result = read_sheet_data(
-            sheet_id=params.get('sheet_id'),
-            range_name=params.get('range_name', 'Sheet1!A1:Z100'),
-            user_email=user_email
-        )
-        action_name = "Sheet Data Read"
-
-    elif action == "SHEETS_UPDATE":
-        result = update_sheet_cell(
-            sheet_id=params.get('sheet_id'),
-            range_name=params.get('range_name'),
-            value=params.get('value'),
-            user_email=user_email
-        )
-        action_name = "Sheet Cell Updated"
-
-    elif action == "SHEETS_DELETE":
-        result = delete_spreadsheet(
-            sheet_id=params.get('sheet_id'),
-            user_email=user_email
-        )
-        action_name = "Spreadsheet Deleted"
+            result = spec.handler(spec.build_params(params), user_email)
+        action_name = spec.log_label(result)
 
-    # DOCS
-    elif action == "DOCS_CREATE":
-        result = create_document(
-            title=params.get('title'),
-            user_email=user_email
-        )
-        action_name = "Document Created"
+    if result.get('success'):
+        log_execution(user_email, action_name, "SUCCESS", result)
+    else:
+        log_execution(user_email, action_name, "FAILED", result)
 
-    elif action == "DOCS_READ":
-        result = read_document(
-            doc_id=params.get('doc_id'),
-            user_email=user_email
-        )
-        action_name = "Document Read"
+    return result
 
-    elif action == "DOCS_APPEND":
-        result = append_to_document(
-            doc_id=params.get('doc_id'),
-            content=params.get('text'),
-            user_email=user_email
-        )
-        action_name = "Text Appended to Document"
-
-    elif action == "DOCS_UPDATE":
-        result = replace_text_in_document(
-            doc_id=params.get('doc_id'),
-            find_text=params.get('find_text'),
-            replace_text=params.get('replace_text'),
-            user_email=user_email
-        )
-        action_name = "Document Text Replaced"
+async def execute_action_async(action: str, params: dict, user_email: str):
+    """
+    Awaitable execute_action. Native async actions are logged exactly like the
+    sync dispatcher logs them; everything else runs execute_action in a thread.
+    """
+    if not supports_async(action):
+        return await asyncio.to_thread(execute_action, action, params, user_email)
 
-    elif action == "DOCS_DELETE":
-        result = delete_document(
-            doc_id=params.get('doc_id'),
-            user_email=user_email
-        )
-        action_name = "Document Deleted"
+    spec = get_action(action)
+    log_execution(user_email, action, "ATTEMPTING", {"params": params})
+    emit("action_dispatched", {"action": action})
 
-    else:
-        result = {"success": False, "message": f"Unknown action: {action}"}
-        action_name = "Unknown Action"
+    result = await spec.async_handler(spec.build_params(params), user_email)
 
+    action_name = spec.log_label(result)
     if result.get('success'):
         log_execution(user_email, action_name, "SUCCESS", result)
     else:
         log_execution(user_email, action_name, "FAILED", result)
-
     return result
 
+
 def parse_date_string_to_iso(date_string: str) -> dict:
     """Safely parses a natural language date string into ISO 8601 format with IST timezone."""
     try:
@@ -388,6 +150,9 @@ def process_planner_output(plan: dict, user_email: str):
     if not user_email or user_email == "unknown_user":
         return {"response_type": "ERROR", "response": "User not logged in"}
 
+    if isinstance(plan.get("actions"), list):
+        return process_multi_action_plan(plan, user_email)
+
     action = plan.get("action")
 
     # Handle errors and chat modes first
@@ -400,372 +165,153 @@ def process_planner_output(plan: dict, user_email: str):
         response_text = plan.get("response", "I'm here to help!")
         return {"response_type": "RESULT", "response": response_text}
 
-    # Handle Gmail - show preview before sending
-    if action == "GMAIL_COMPOSE":
-        print(f"📧 GMAIL_COMPOSE detected")
-        print(f"📧 To: {plan.get('to')}")
-        print(f"📧 Subject: {plan.get('subject')}")
-        print(f"📧 Body preview: {plan.get('body', '')[:100]}")
-
-        result = {
-            "response_type": "EMAIL_PREVIEW",
-            "action": "GMAIL_SEND",
-            "message": "Please review your email before sending.",
-            "params": {
-                "to": plan.get("to", []),
-                "cc": plan.get("cc", []),
-                "bcc": plan.get("bcc", []),
-                "subject": plan.get("subject", ""),
-                "body": plan.get("body", "")
-            }
-        }
-        print(f"✅ Returning EMAIL_PREVIEW: {result}")
-        return result
-
-    # Handle Gmail Search - execute immediately
-    if action == "GMAIL_SEARCH":
-        result = execute_action("GMAIL_SEARCH", {
-            "query": plan.get("query", ""),
-            "max_results": plan.get("max_results", 10)
-        }, user_email)
-
-        if result.get('success') and 'emails' in result:
-            if not result['emails']:
-                return {"response_type": "RESULT", "response": result.get('message', 'No emails found')}
-
-            response = f"{result['message']}\n\n"
-            for email in result['emails']:
-                response += f"📧 From: {email.get('from', 'Unknown')}\n"
-                response += f"📨 Subject: {email.get('subject', '(No Subject)')}\n"
-                response += f"📅 Date: {email.get('date', 'Unknown')}\n"
-                response += f"💬 {email.get('snippet', '')[:100]}...\n"
-                response += f"ID: {email.get('id')}\n\n"
-            return {"response_type": "RESULT", "response": response}
-        else:
-            return {"response_type": "RESULT", "response": result.get('message', 'Search failed')}
-
-    # Handle Gmail List Unread - execute immediately
-    if action == "GMAIL_LIST_UNREAD":
-        result = execute_action("GMAIL_LIST_UNREAD", {
-            "max_results": plan.get("max_results", 10)
-        }, user_email)
-
-        if result.get('success') and 'emails' in result:
-            if not result['emails']:
-                return {"response_type": "RESULT", "response": "You have no unread emails! 🎉"}
-
-            response = f"{result['message']}\n\n"
-            for email in result['emails']:
-                response += f"📧 From: {email.get('from', 'Unknown')}\n"
-                response += f"📨 Subject: {email.get('subject', '(No Subject)')}\n"
-                response += f"📅 Date: {email.get('date', 'Unknown')}\n"
-                response += f"💬 {email.get('snippet', '')[:100]}...\n"
-                response += f"ID: {email.get('id')}\n\n"
-            return {"response_type": "RESULT", "response": response}
-        else:
-            return {"response_type": "RESULT", "response": result.get('message', 'Failed to retrieve unread emails')}
-
-    # Handle Gmail Read - execute immediately
-    if action == "GMAIL_READ":
-        result = execute_action("GMAIL_READ", {
-            "message_id": plan.get("message_id")
-        }, user_email)
-
-        if result.get('success') and 'email' in result:
-            email = result['email']
-            response = f"📧 Email Details\n\n"
-            response += f"From: {email.get('from', 'Unknown')}\n"
-            response += f"To: {email.get('to', 'Unknown')}\n"
-            response += f"Subject: {email.get('subject', '(No Subject)')}\n"
-            response += f"Date: {email.get('date', 'Unknown')}\n\n"
-            response += f"Body:\n{email.get('body', 'No body content')}\n\n"
-
-            if email.get('attachments'):
-                response += f"Attachments ({len(email['attachments'])}):\n"
-                for att in email['attachments']:
-                    response += f"  📎 {att['filename']} ({att['size']} bytes)\n"
-
-            return {"response_type": "RESULT", "response": response}
-        else:
-            return {"response_type": "RESULT", "response": result.get('message', 'Failed to read email')}
-
-    # Handle Calendar - apply date parsing
-    if action == "CALENDAR_CREATE":
-        start_time_str = plan.get("start_time")
-
-        # Use robust date parsing if NOT instant
-        if not plan.get("instant"):
-            date_info = parse_date_string_to_iso(start_time_str)
-            if not date_info['success']:
-                return {"response_type": "ERROR", "response": f"Scheduling failed: {date_info['error']}"}
-
-            # Overwrite LLM's potentially invalid date with guaranteed ISO dates
-            plan["start_time"] = date_info['start_time']
-            plan["end_time"] = date_info['end_time']
-
-        # Determine Preview/Approval flow
-        # Format time in IST for display
-        try:
-            ist_tz = pytz.timezone('Asia/Kolkata')
-            start_dt = datetime.fromisoformat(plan.get('start_time').replace('Z', '+00:00'))
-            if start_dt.tzinfo is None:
-                start_dt = ist_tz.localize(start_dt)
-            else:
-                start_dt = start_dt.astimezone(ist_tz)
-            display_time = start_dt.strftime('%B %d at %I:%M %p IST')
-            message_prefix = f"Ready to schedule: '{plan.get('summary')}' on {display_time}."
-        except:
-            message_prefix = f"Ready to schedule: '{plan.get('summary')}'."
-
+    spec = get_action(action)
+    if spec is None or not spec.plannable:
         return {
-            "response_type": "APPROVAL",
-            "action": "CALENDAR_CREATE",
-            "message": message_prefix,
-            "params": {
-                "summary": plan.get("summary"),
-                "description": plan.get("description", "Scheduled via Vocal Agent"),
-                "start_time": plan.get("start_time"),
-                "end_time": plan.get("end_time"),
-                "attendees": plan.get("attendees", []),
-                "instant": plan.get("instant", False)
-            }
+            "response_type": "ERROR",
+            "response": f"Unknown action: {action}"
         }
 
-    # Handle Calendar List - execute immediately
-    if action == "CALENDAR_LIST":
-        result = execute_action("CALENDAR_LIST", {"max_results": plan.get("max_results", 10)}, user_email)
-
-        if result.get('success') and 'details' in result:
-            response = f"{result['message']}\n\n"
-            for event in result['details']:
-                summary = event.get('summary', 'No Title')
-                start = event.get('start', 'No time')
-                meet_link = event.get('meet_link', 'No Meet link')
-                response += f"📅 {summary}\n⏰ {start}\n🔗 {meet_link}\n\n"
-            return {"response_type": "RESULT", "response": response}
-        else:
-            return {"response_type": "RESULT", "response": result.get('message', 'No events found')}
-
-    # Handle Calendar Delete - execute immediately
-    if action == "CALENDAR_DELETE":
-        result = execute_action("CALENDAR_DELETE", {
-            "event_id": plan.get("event_id"),
-            "summary": plan.get("summary")
-        }, user_email)
+    # Custom previews (email form, calendar date parsing)
+    if spec.prepare:
+        return spec.prepare(plan)
 
-        if result.get('success'):
-            return {"response_type": "RESULT", "response": result['message']}
-        else:
-            return {"response_type": "ERROR", "response": result.get('message', 'Failed to delete event')}
-
-    # Handle Calendar Update/Reschedule - with approval
-    if action == "CALENDAR_UPDATE":
-        # Parse new times if provided
-        new_start_time = plan.get("new_start_time")
-        new_end_time = plan.get("new_end_time")
-
-        if new_start_time and not new_end_time:
-            # If only start time provided, calculate end time
-            date_info = parse_date_string_to_iso(new_start_time)
-            if date_info['success']:
-                new_start_time = date_info['start_time']
-                new_end_time = date_info['end_time']
-
-        try:
-            ist_tz = pytz.timezone('Asia/Kolkata')
-            if new_start_time:
-                start_dt = datetime.fromisoformat(new_start_time.replace('Z', '+00:00'))
-                if start_dt.tzinfo is None:
-                    start_dt = ist_tz.localize(start_dt)
-                else:
-                    start_dt = start_dt.astimezone(ist_tz)
-                display_time = start_dt.strftime('%B %d at %I:%M %p IST')
-                message_prefix = f"Ready to reschedule '{plan.get('summary_search')}' to {display_time}."
-            else:
-                message_prefix = f"Ready to update event '{plan.get('summary_search')}'."
-        except:
-            message_prefix = f"Ready to update event '{plan.get('summary_search')}'."
-
-        return {
-            "response_type": "APPROVAL",
-            "action": "CALENDAR_UPDATE",
-            "message": message_prefix,
-            "params": {
-                "event_id": plan.get("event_id", ""),
-                "summary_search": plan.get("summary_search"),
-                "new_summary": plan.get("new_summary"),
-                "new_start_time": new_start_time,
-                "new_end_time": new_end_time,
-                "new_description": plan.get("new_description"),
-                "new_attendees": plan.get("new_attendees", [])
-            }
-        }
-
-    # Handle Contacts Search - execute immediately
-    if action == "CONTACTS_SEARCH":
-        result = execute_action("CONTACTS_SEARCH", {"query": plan.get("query")}, user_email)
-
-        if result.get('success') and 'details' in result:
-            response = f"{result['message']}\n\n"
-            for contact in result['details'][:5]:
-                name = contact.get('name', 'Unknown')
-                email = contact.get('email', 'No email')
-                phone = contact.get('phone', 'No phone')
-                response += f"👤 {name}\nEmail: {email}\nPhone: {phone}\n\n"
-            return {"response_type": "RESULT", "response": response}
-        else:
-            return {"response_type": "RESULT", "response": result.get('message', 'No contacts found')}
-
-    # Handle Contacts Create - with approval
-    if action == "CONTACTS_CREATE":
-        message = f"Ready to add contact: {plan.get('given_name', '')} {plan.get('family_name', '')} ({plan.get('email', 'No email')})."
+    # Changes the user must approve first
+    if spec.approval:
         return {
             "response_type": "APPROVAL",
-            "action": "CONTACTS_CREATE",
-            "message": message,
-            "params": {
-                "given_name": plan.get("given_name"),
-                "family_name": plan.get("family_name"),
-                "email": plan.get("email"),
-                "phone": plan.get("phone")
-            }
+            "action": action,
+            "message": spec.approval_message(plan),
+            "params": spec.build_params(plan)
         }
 
-    # Handle Drive Search - execute immediately
-    if action == "DRIVE_SEARCH":
-        result = execute_action("DRIVE_SEARCH", {"query": plan.get("query")}, user_email)
-
-        if result.get('success') and 'details' in result:
-            response = f"{result['message']}\n\n"
-            for file in result['details']:
-                name = file.get('name', 'Unnamed')
-                link = file.get('link', '')
-                response += f"📁 {name}\n🔗 {link}\n\n"
-            return {"response_type": "RESULT", "response": response}
-        else:
-            return {"response_type": "RESULT", "response": result.get('message', 'No files found')}
-
-    # Handle Tasks Create - with approval
-    if action == "TASKS_CREATE":
-        message = f"Ready to create task: '{plan.get('title')}'"
-        if plan.get('due_date'):
-            message += f" (Due: {plan.get('due_date')})"
+    # Everything else executes immediately and is rendered for the chat
+    result = execute_action(action, spec.build_params(plan), user_email)
+    return spec.formatter(result)
 
-        return {
-            "response_type": "APPROVAL",
-            "action": "TASKS_CREATE",
-            "message": message,
-            "params": {
-                "title": plan.get("title"),
-                "notes": plan.get("notes", ""),
-                "due_date": plan.get("due_date")
-            }
-        }
 
-    # Handle Tasks List - execute immediately
-    if action == "TASKS_LIST":
-        result = execute_action("TASKS_LIST", {"max_results": plan.get("max_results", 10)}, user_email)
-
-        if result.get('success') and 'details' in result:
-            response = f"{result['message']}\n\n"
-            for task in result['details']:
-                title = task.get('title', 'No Title')
-                status = task.get('status', 'needsAction')
-                due = task.get('due', 'No due date')
-                response += f"✓ {title}\nStatus: {status}\nDue: {due}\n\n"
-            return {"response_type": "RESULT", "response": response}
-        else:
-            return {"response_type": "RESULT", "response": result.get('message', 'No tasks found')}
 
-    # Handle Tasks Complete - with approval
-    if action == "TASKS_COMPLETE":
-        message = f"Ready to mark task as complete: '{plan.get('title_search')}'"
-
-        return {
-            "response_type": "APPROVAL",
-            "action": "TASKS_COMPLETE",
-            "message": message,
-            "params": {
-                "task_id": plan.get("task_id", ""),
-                "title_search": plan.get("title_search")
-            }
-        }
-
-    # Handle Sheets Create - with approval
-    if action == "SHEETS_CREATE":
-        message = f"Ready to create spreadsheet: '{plan.get('title')}'"
-
-        return {
-            "response_type": "APPROVAL",
-            "action": "SHEETS_CREATE",
-            "message": message,
-            "params": {
-                "title": plan.get("title")
-            }
-        }
-
-    # Handle Sheets Add Row - with approval
-    if action == "SHEETS_ADD_ROW":
-        message = f"Ready to add row to spreadsheet"
-
-        return {
-            "response_type": "APPROVAL",
-            "action": "SHEETS_ADD_ROW",
-            "message": message,
-            "params": {
-                "sheet_id": plan.get("sheet_id"),
-                "range_name": plan.get("range_name", "Sheet1!A:Z"),
-                "values": plan.get("values", [])
-            }
-        }
+def _plan_waves(steps: list) -> list:
+    """
+    Orders steps into waves: every step runs after the steps it depends on.
+    Unknown ids in depends_on are ignored; a dependency cycle is broken by
+    running the earliest remaining step.
+    """
+    ids = [step["id"] for step in steps]
+    remaining = list(steps)
+    done = set()
+    waves = []
+    while remaining:
+        wave = [
+            step for step in remaining
+            if all(dep in done or dep not in ids for dep in step["depends_on"])
+        ] or remaining[:1]
+        waves.append(wave)
+        done.update(step["id"] for step in wave)
+        remaining = [step for step in remaining if step not in wave]
+    return waves
+
+
+def _run_step(step: dict, user_email: str) -> dict:
+    try:
+        return process_planner_output(step["plan"], user_email)
+    except Exception as e:
+        print(f"❌ Plan step {step['id']} ({step['plan'].get('action')}) failed: {e}")
+        return {"response_type": "ERROR", "response": f"{step['plan'].get('action')} failed: {e}"}
 
-    # Handle Sheets Read - execute immediately
-    if action == "SHEETS_READ":
-        result = execute_action("SHEETS_READ", {
-            "sheet_id": plan.get("sheet_id"),
-            "range_name": plan.get("range_name", "Sheet1!A1:Z100")
-        }, user_email)
-
-        if result.get('success') and 'details' in result:
-            data = result['details'].get('data', [])
-            response = f"{result['message']}\n\n"
-            for row in data[:10]:
-                response += " | ".join(str(cell) for cell in row) + "\n"
-            if len(data) > 10:
-                response += f"\n... and {len(data) - 10} more rows"
-            return {"response_type": "RESULT", "response": response}
-        else:
-            return {"response_type": "RESULT", "response": result.get('message', 'Failed to read sheet')}
 
-    # Handle Docs Create - with approval
-    if action == "DOCS_CREATE":
-        message = f"Ready to create document: '{plan.get('title')}'"
+def process_multi_action_plan(plan: dict, user_email: str):
+    """
+    Executes a plan with an "actions" list.
 
-        return {
-            "response_type": "APPROVAL",
-            "action": "DOCS_CREATE",
-            "message": message,
-            "params": {
-                "title": plan.get("title")
-            }
-        }
+    Steps run in dependency order; read-only steps of the same wave run concurrently
+    in a thread pool, other steps one at a time. Text results are merged into a
+    single RESULT. The first step that needs the user (preview or approval) is
+    returned with the merged text in "response"; steps that depend on it, or on
+    a failed step, are skipped.
+    """
+    raw_steps = [step for step in plan["actions"] if isinstance(step, dict) and step.get("action")]
+    if not raw_steps:
+        return {"response_type": "ERROR", "response": "The plan did not contain any actions."}
+    if len(raw_steps) == 1:
+        return process_planner_output(raw_steps[0], user_email)
+
+    truncated = len(raw_steps) > PLAN_MAX_STEPS
+    steps = []
+    for index, raw in enumerate(raw_steps[:PLAN_MAX_STEPS], start=1):
+        depends_on = raw.get("depends_on") or []
+        if not isinstance(depends_on, list):
+            depends_on = [depends_on]
+        step_plan = {k: v for k, v in raw.items() if k not in ("id", "depends_on")}
+        steps.append({
+            "id": str(raw.get("id", index)),
+            "depends_on": [str(dep) for dep in depends_on],
+            "plan": step_plan
+        })
+
+    print(f"🧩 Multi-action plan: {[step['plan']['action'] for step in steps]}")
+
+    responses = {}  # step id -> response dict
+    blocked = set()  # ids of steps whose dependents must not run
+    interactive = None
+    for wave in _plan_waves(steps):
+        runnable = []
+        for step in wave:
+            if any(dep in blocked for dep in step["depends_on"]):
+                blocked.add(step["id"])
+                responses[step["id"]] = {
+                    "response_type": "SKIPPED",
+                    "response": f"⏭️ Skipped {step['plan']['action']}: it depends on a step that did not complete."
+                }
+            else:
+                runnable.append(step)
 
-    # Handle Docs Append - with approval
-    if action == "DOCS_APPEND":
-        message = f"Ready to append text to document"
+        parallel = [step for step in runnable if step["plan"]["action"] in READ_ONLY_ACTIONS]
+        sequential = [step for step in runnable if step["plan"]["action"] not in READ_ONLY_ACTIONS]
 
-        return {
-            "response_type": "APPROVAL",
-            "action": "DOCS_APPEND",
-            "message": message,
-            "params": {
-                "doc_id": plan.get("doc_id"),
-                "text": plan.get("text")
-            }
+        # Each step gets a copy of this context, so stream events still reach the client
+        futures = {
+            step["id"]: _step_pool.submit(contextvars.copy_context().run, _run_step, step, user_email)
+            for step in parallel
         }
+        for step in sequential:
+            if interactive is not None:
+                blocked.add(step["id"])
+                responses[step["id"]] = {
+                    "response_type": "SKIPPED",
+                    "response": f"⏭️ Skipped {step['plan']['action']}: confirm the previous step, then ask again."
+                }
+                continue
+            responses[step["id"]] = _run_step(step, user_email)
+            if responses[step["id"]].get("response_type") in INTERACTIVE_RESPONSES:
+                interactive = responses[step["id"]]
+        for step_id, future in futures.items():
+            responses[step_id] = future.result()
+
+        for step in runnable:
+            response = responses[step["id"]]
+            if response.get("response_type") == "ERROR":
+                blocked.add(step["id"])
+            elif response.get("response_type") in INTERACTIVE_RESPONSES:
+                # Not done until the user confirms it
+                blocked.add(step["id"])
+                if interactive is None:
+                    interactive = response
+
+    texts = []
+    for step in steps:
+        response = responses[step["id"]]
+        if response is interactive:
+            continue
+        if response.get("response_type") in INTERACTIVE_RESPONSES:
+            texts.append(f"⏭️ {step['plan']['action']} needs your confirmation: ask again after this one.")
+        elif response.get("response"):
+            texts.append(response["response"])
+    if truncated:
+        texts.append(f"⚠️ Only the first {PLAN_MAX_STEPS} requests were handled.")
+
+    merged = "\n\n".join(texts)
+    if interactive is not None:
+        return dict(interactive, response=merged) if merged else interactive
+    return {"response_type": "RESULT", "response": merged}
 
-    # Unknown action
-    return {
-        "response_type": "ERROR",
-        "response": f"Unknown action: {action}"
-    }
@@ -0,0 +1,145 @@
+# backend/agent/prefetch.py
+"""
+Speculative prefetch while the planner LLM runs.
+
+When a prompt misses the fast path, start_prefetch() guesses from
+classify_intent_heuristic (or the planner domains, when the heuristic only sees
+chat) what the plan is going to read and fetches it in the background while
+Cohere is still planning:
+- unread-email requests: the GMAIL_LIST_UNREAD result
+- other email reads: a sync of the local Gmail store that searches use
+- email sends: a sync of the contacts index used to resolve recipients
+- calendar reads: the CALENDAR_LIST result
+- calendar changes: a sync of the event cache that update/delete resolve titles from
+- task reads: the TASKS_LIST result
+- drive: a Changes API sync of the Drive index
+- contacts: a sync of the contacts index
+
+Results are fetched through result_cache.get_or_fetch, so when the plan arrives
+execute_action finds them cached, or waits on the fetch already in flight
+instead of starting its own. A wrong guess costs one background read and is
+never written to the execution log.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from agent.action_registry import get_action
+from agent.result_cache import RESULT_CACHE_ENABLED, get_or_fetch
+from google_services import calendar_cache, contacts_index, drive_index, gmail_store
+from planner.fast_path import MUTATION_WORDS
+from utils.intent_classifier import classify_intent_heuristic, classify_planner_domains
+
+# Set PREFETCH_ENABLED=0 to wait for the plan before touching Google
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "4"))
+# Guesses are dropped rather than queued once this many are waiting or running
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", "16"))
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+_pending = 0
+_lock = Lock()
+
+_stats = {"started": 0, "skipped_busy": 0, "failed": 0, "targets": {}}
+
+
+def _warm_result(action: str, params: dict):
+    """Returns a prefetch target that puts the action's result in the result cache."""
+    spec = get_action(action)
+
+    def warm(user_email: str):
+        # The handler is called directly so the guess is not logged as an executed action
+        get_or_fetch(spec, params, user_email, lambda: spec.handler(spec.build_params(params), user_email))
+
+    return warm
+
+
+# Target name -> function(user_email) that fetches it
+PREFETCH_TARGETS = {
+    "GMAIL_LIST_UNREAD": _warm_result("GMAIL_LIST_UNREAD", {"max_results": 10}),
+    "CALENDAR_LIST": _warm_result("CALENDAR_LIST", {"max_results": 10}),
+    "TASKS_LIST": _warm_result("TASKS_LIST", {"max_results": 10}),
+    "gmail_store": gmail_store.sync_mailbox,
+    "contacts_index": contacts_index.sync_contacts,
+    # Any lookup syncs the event cache first
+    "calendar_cache": lambda user_email: calendar_cache.upcoming_events(user_email, 1),
+    "drive_index": drive_index.sync_drive,
+}
+
+
+def choose_prefetch_targets(prompt: str) -> list:
+    """Returns the PREFETCH_TARGETS names worth fetching for prompt (empty if no good guess)."""
+    intent = classify_intent_heuristic(prompt)["intent"]
+    if intent == "chat":
+        # The heuristic calls "hey, any unread emails?" chat; the planner domains still see the email part
+        domains = set(classify_planner_domains(prompt))
+    else:
+        domains = {"calendar" if intent == "meet" else intent}
+
+    text = prompt.lower()
+    changes_data = bool(MUTATION_WORDS.search(text))
+    warm_results = RESULT_CACHE_ENABLED and not changes_data
+
+    targets = []
+    if "email" in domains:
+        if changes_data:
+            targets.append("contacts_index")
+        elif "unread" in text and warm_results:
+            targets.append("GMAIL_LIST_UNREAD")
+        else:
+            targets.append("gmail_store")
+    if "calendar" in domains:
+        targets.append("CALENDAR_LIST" if warm_results else "calendar_cache")
+    if "tasks" in domains and warm_results:
+        targets.append("TASKS_LIST")
+    if "drive" in domains:
+        targets.append("drive_index")
+    if "contacts" in domains and "contacts_index" not in targets:
+        targets.append("contacts_index")
+    return targets
+
+
+def _run_target(name: str, user_email: str):
+    global _pending
+    try:
+        PREFETCH_TARGETS[name](user_email)
+    except Exception as e:
+        print(f"⚠️ Prefetch of {name} failed for {user_email}: {e}")
+        with _lock:
+            _stats["failed"] += 1
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def start_prefetch(prompt: str, user_email: str) -> list:
+    """
+    Starts fetching what the prompt will probably need, without waiting for it.
+    Call right before run_planner.
+
+    :return: Names of the targets started
+    """
+    global _pending
+    if not PREFETCH_ENABLED or not user_email:
+        return []
+
+    started = []
+    for name in choose_prefetch_targets(prompt):
+        with _lock:
+            if _pending >= PREFETCH_MAX_PENDING:
+                _stats["skipped_busy"] += 1
+                continue
+            _pending += 1
+            _stats["started"] += 1
+            _stats["targets"][name] = _stats["targets"].get(name, 0) + 1
+        _prefetch_pool.submit(_run_target, name, user_email)
+        started.append(name)
+
+    if started:
+        print(f"🔮 Prefetching {', '.join(started)} for {user_email} while the planner runs")
+    return started
+
+
+def get_prefetch_stats() -> dict:
+    with _lock:
+        return dict(_stats, targets=dict(_stats["targets"]), pending=_pending, enabled=PREFETCH_ENABLED)
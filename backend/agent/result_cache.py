@@ -0,0 +1,99 @@
+# backend/agent/result_cache.py
+"""
+Per-user read-through cache for read-only action results.
+
+Actions with a cache_ttl in the action registry reuse a successful result for
+the same user and parameters until the TTL runs out, or until a change on the
+same Google service succeeds for that user (e.g. CALENDAR_CREATE drops the
+user's cached CALENDAR_LIST results). Concurrent identical lookups share one
+Google call.
+"""
+import copy
+import json
+import os
+from concurrent.futures import Future
+from threading import Lock
+
+from utils.cache import LRUTTLCache, MISSING
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "2048"))
+# Set RESULT_CACHE_ENABLED=0 to always call Google
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+
+# Changes on one service that can alter what another service reads
+# (Docs and Sheets files show up in Drive searches, Drive deletes remove docs and sheets)
+RELATED_SERVICES = {
+    "docs": ("drive",),
+    "sheets": ("drive",),
+    "drive": ("docs", "sheets"),
+}
+
+# (user_email, service, action, params) -> result dict
+_results = LRUTTLCache(max_size=RESULT_CACHE_SIZE)
+
+_inflight = {}  # key -> Future of the call every concurrent lookup waits on
+_generations = {}  # (user_email, service) -> number of invalidations so far
+_lock = Lock()
+
+
+def _cache_key(spec, params: dict, user_email: str) -> tuple:
+    return (user_email, spec.service, spec.name, json.dumps(spec.build_params(params), sort_keys=True, default=str))
+
+
+def get_or_fetch(spec, params: dict, user_email: str, fetch):
+    """
+    Returns (result, cached) for a cacheable action.
+    fetch() is called only if no fresh result is cached and no identical call is running;
+    cached is False only for the caller whose fetch() produced the result.
+    """
+    if not RESULT_CACHE_ENABLED or not spec.cache_ttl:
+        return fetch(), False
+
+    key = _cache_key(spec, params, user_email)
+    result = _results.get(key)
+    if result is not MISSING:
+        return copy.deepcopy(result), True
+
+    with _lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+            generation = _generations.get((user_email, spec.service), 0)
+
+    if not leader:
+        return copy.deepcopy(future.result()), True
+
+    try:
+        result = fetch()
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+    with _lock:
+        # Skip results that raced with a change to the same service
+        if result.get('success') and _generations.get((user_email, spec.service), 0) == generation:
+            _results.set(key, copy.deepcopy(result), ttl=spec.cache_ttl)
+    future.set_result(result)
+    return result, False
+
+
+def invalidate_service(user_email: str, service: str) -> int:
+    """Drops the user's cached results for service (and services it affects). Returns the number removed."""
+    services = (service,) + RELATED_SERVICES.get(service, ())
+    with _lock:
+        for name in services:
+            _generations[(user_email, name)] = _generations.get((user_email, name), 0) + 1
+        removed = _results.invalidate(lambda key: key[0] == user_email and key[1] in services)
+    if removed:
+        print(f"🧹 Dropped {removed} cached {'/'.join(services)} result(s) for {user_email}")
+    return removed
+
+
+def get_result_cache_stats() -> dict:
+    with _lock:
+        inflight = len(_inflight)
+    return dict(_results.stats(), inflight=inflight, enabled=RESULT_CACHE_ENABLED)
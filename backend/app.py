@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, copy_current_request_context, g
 from flask_cors import CORS
 import os
 import json
@@ -6,15 +6,33 @@ from dotenv import load_dotenv
 import sys
 import jwt
 import datetime
+import time
+import queue
+import threading
+import contextvars
 
 # Ensure submodules are found
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Core logic imports
-from planner.router import run_planner
+from planner.router import run_planner, run_planner_stream
 from agent.executor import process_planner_output, execute_action
-from logs.log_utils import init_log_db, get_logs
-from models.session_store import init_db as init_token_db
+from agent.result_cache import get_result_cache_stats, invalidate_service
+from agent.prefetch import start_prefetch, get_prefetch_stats
+from logs.log_utils import init_log_db, get_logs, get_log_writer_stats, LOGS_PAGE_SIZE
+from logs.log_retention import get_retention_stats
+from models.session_store import init_db as init_token_db, get_token_cache_stats
+from google_services.service_cache import get_service_cache_stats
+from google_services.gmail_store import get_gmail_store_stats
+from google_services.calendar_cache import get_calendar_cache_stats
+from google_services.drive_index import get_drive_index_stats
+from auth.token_refresh import get_refresh_stats
+from planner.plan_cache import get_plan_cache_stats
+from planner.prompt_templates import get_prompt_stats
+from planner.plan_parser import get_plan_parser_stats
+from planner.fast_path import plan_fast_path, record_planner_latency, get_fast_path_stats
+from utils.stream_events import set_sink, reset_sink
+from utils.tracing import DEBUG_HEADER, start_trace, finish_trace, server_timing_header, get_trace_stats
 
 load_dotenv()
 init_log_db()  # Initialize log DB
@@ -28,7 +46,7 @@ CORS(
     app,
     origins=["https://voicegenva.onrender.com", "http://localhost:5173", "https://*.onrender.com"],
     supports_credentials=True,
-    allow_headers=["Content-Type", "Authorization"],
+    allow_headers=["Content-Type", "Authorization", DEBUG_HEADER],
     methods=["GET", "POST", "OPTIONS"]
 )
 
@@ -46,19 +64,47 @@ JWT_SECRET = os.getenv("SESSION_SECRET", "dev_default_key")
 from auth.google_oauth import google_bp
 app.register_blueprint(google_bp, url_prefix="/auth")
 
+# Latency tracing: one trace per request, stage percentiles in /metrics
+@app.before_request
+def start_request_trace():
+    if request.method != "OPTIONS" and request.endpoint:
+        g.trace_token = start_trace(request.endpoint)
+
+
+def wants_debug_trace() -> bool:
+    return request.headers.get(DEBUG_HEADER) == "1"
+
+
 # CORS headers dynamically
 @app.after_request
 def after_request(response):
+    token = g.pop("trace_token", None)
+    if token is not None:
+        # A streamed response does its work after this point and traces itself
+        trace = finish_trace(token, record=not response.is_streamed)
+        if trace is not None and not response.is_streamed and wants_debug_trace():
+            response.headers["Server-Timing"] = server_timing_header(trace)
+            response.headers["Timing-Allow-Origin"] = "*"
+            response.headers.add("Access-Control-Expose-Headers", "Server-Timing")
+
     origin = request.headers.get('Origin')
     if origin in ["https://voicegenva.onrender.com", "http://localhost:5173"] or (origin and 'onrender.com' in origin):
         response.headers.add("Access-Control-Allow-Origin", origin)
     else:
         response.headers.add("Access-Control-Allow-Origin", "https://voicegenva.onrender.com")
     response.headers.add("Access-Control-Allow-Credentials", "true")
-    response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
+    response.headers.add("Access-Control-Allow-Headers", f"Content-Type,Authorization,{DEBUG_HEADER}")
     response.headers.add("Access-Control-Allow-Methods", "GET,POST,OPTIONS")
     return response
 
+
+@app.teardown_request
+def finish_request_trace(error=None):
+    # after_request is skipped when a view raises; still count and close the trace
+    token = g.pop("trace_token", None)
+    if token is not None:
+        finish_trace(token)
+
 # Helper: extract user info from JWT
 def get_user_from_jwt():
     auth_header = request.headers.get("Authorization")
@@ -138,10 +184,19 @@ def planner_run():
         return jsonify({"response_type": "ERROR", "response": "No prompt provided"}), 400
 
     try:
-        # Step 1: Get JSON plan from Cohere LLM (with contact resolution)
-        print("📋 Step 1: Calling run_planner...")
-        plan = run_planner(prompt, user["email"])
-        print(f"📋 Planner returned: {plan}")
+        # Step 1: Get JSON plan - rule-based fast path first, Cohere LLM otherwise
+        planning_started = time.monotonic()
+        plan = plan_fast_path(prompt)
+        if plan:
+            print(f"⚡ Step 1: Fast path matched: {plan}")
+            record_planner_latency("fast_path", time.monotonic() - planning_started)
+        else:
+            # Warm the Google data the plan will probably need while Cohere plans
+            start_prefetch(prompt, user["email"])
+            print("📋 Step 1: Calling run_planner...")
+            plan = run_planner(prompt, user["email"])
+            record_planner_latency("llm", time.monotonic() - planning_started)
+            print(f"📋 Planner returned: {plan}")
 
         # Step 2: Process the plan (no parsing, just read JSON)
         print("⚙️ Step 2: Processing planner output...")
@@ -165,6 +220,90 @@ def planner_run():
         })
 
 
+def _sse(event: str, data) -> str:
+    """Formats one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# Streaming planner route - same flow as /planner/run, reported as server-sent events:
+# plan_partial (fields as the LLM writes them), plan, action_dispatched, email
+# (each summary as it arrives), result (the /planner/run response body), done
+@app.route("/planner/stream", methods=["POST", "OPTIONS"])
+def planner_stream():
+    if request.method == "OPTIONS":
+        return jsonify({}), 200
+
+    data = request.json or {}
+    prompt = data.get("prompt", "")
+    user = get_user_from_jwt()
+
+    if not user:
+        return jsonify({"response_type": "ERROR", "response": "User not logged in"}), 401
+    if not prompt:
+        return jsonify({"response_type": "ERROR", "response": "No prompt provided"}), 400
+
+    user_email = user["email"]
+    debug_trace = wants_debug_trace()
+    print(f"🌊 Streaming planner request from {user_email}: '{prompt}'")
+
+    def generate():
+        trace_token = start_trace("planner_stream")
+        try:
+            yield from _stream_plan()
+        finally:
+            trace = finish_trace(trace_token)
+        # Headers are long gone by now, so the timing breakdown rides on the last event
+        yield _sse("done", {"server_timing": server_timing_header(trace)} if debug_trace else {})
+
+    def _stream_plan():
+        planning_started = time.monotonic()
+        plan = plan_fast_path(prompt)
+        if plan:
+            record_planner_latency("fast_path", time.monotonic() - planning_started)
+            yield _sse("plan", {"plan": plan, "source": "fast_path"})
+        else:
+            start_prefetch(prompt, user_email)
+            for event, payload in run_planner_stream(prompt, user_email):
+                if event == "plan":
+                    plan = payload
+                else:
+                    yield _sse(event, payload)
+            record_planner_latency("llm", time.monotonic() - planning_started)
+            yield _sse("plan", {"plan": plan, "source": "llm"})
+
+        # Execute in a worker so events emitted during execution reach the client immediately
+        events = queue.Queue()
+
+        @copy_current_request_context
+        def execute():
+            token = set_sink(lambda event, payload: events.put((event, payload)))
+            try:
+                events.put(("result", process_planner_output(plan, user_email)))
+            except Exception as e:
+                print(f"❌ CRITICAL ERROR in planner_stream: {e}")
+                import traceback
+                traceback.print_exc()
+                events.put(("result", {"response_type": "ERROR", "response": f"An error occurred: {str(e)}"}))
+            finally:
+                reset_sink(token)
+                events.put(None)
+
+        # copy_context carries the trace into the worker
+        threading.Thread(target=contextvars.copy_context().run, args=(execute,),
+                         name="planner-stream", daemon=True).start()
+        while True:
+            item = events.get()
+            if item is None:
+                break
+            yield _sse(*item)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # Final execution endpoint
 @app.route("/agent/execute", methods=["POST", "OPTIONS"])
 def agent_execute():
@@ -238,6 +377,8 @@ def gmail_send():
         user_email=user_email,
         approved=data.get('approved', False)
     )
+    if result.get('success'):
+        invalidate_service(user_email, "gmail")
 
     return jsonify(result)
 
@@ -252,9 +393,52 @@ def logs_route():
     if not user:
         return jsonify({"error": "Not logged in"}), 401
 
+    # Pagination: ?limit=50&before_id=<next_before_id from the previous page>
+    try:
+        limit = int(request.args.get("limit", LOGS_PAGE_SIZE))
+        before_id = request.args.get("before_id", type=int)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
     user_email = user["email"]
-    user_logs = get_logs(user_email)
-    return jsonify({"logs": user_logs})
+    page = get_logs(
+        user_email,
+        limit=limit,
+        before_id=before_id,
+        action=request.args.get("action"),
+        status=request.args.get("status"),
+        include_details=request.args.get("details", "1") != "0"
+    )
+    return jsonify(page)
+
+
+# Cache statistics
+@app.route("/metrics", methods=["GET", "OPTIONS"])
+def metrics_route():
+    if request.method == "OPTIONS":
+        return jsonify({}), 200
+
+    user = get_user_from_jwt()
+    if not user:
+        return jsonify({"error": "Not logged in"}), 401
+
+    return jsonify({
+        "service_cache": get_service_cache_stats(),
+        "token_cache": get_token_cache_stats(),
+        "token_refresh": get_refresh_stats(),
+        "plan_cache": get_plan_cache_stats(),
+        "result_cache": get_result_cache_stats(),
+        "prefetch": get_prefetch_stats(),
+        "gmail_store": get_gmail_store_stats(),
+        "calendar_cache": get_calendar_cache_stats(),
+        "drive_index": get_drive_index_stats(),
+        "planner_prompts": get_prompt_stats(),
+        "plan_parser": get_plan_parser_stats(),
+        "planner_latency": get_fast_path_stats(),
+        "log_writer": get_log_writer_stats(),
+        "log_retention": get_retention_stats(),
+        "latency": get_trace_stats()
+    })
 
 
 if __name__ == "__main__":
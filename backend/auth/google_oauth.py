@@ -65,7 +65,11 @@ def callback():
 
     # Save token safely
     token_data = token_response.json()
+    expires_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=int(token_data.get("expires_in", 3600)))
     token_data.update({
+        # google-auth reads the access token and expiry from these keys
+        "token": token_data.get("access_token"),
+        "expiry": expires_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
         "client_id": os.getenv("GOOGLE_CLIENT_ID"),
         "client_secret": CLIENT_SECRET,
         "token_uri": "https://oauth2.googleapis.com/token",
@@ -0,0 +1,155 @@
+# backend/auth/token_refresh.py
+"""
+Proactive OAuth access-token refresh.
+
+Tokens are refreshed shortly before they expire (on use, and by a background
+thread for recently active users), concurrent refreshes for the same user are
+coalesced into one token-endpoint call, and the refreshed token is persisted
+through session_store.store_token so every worker picks it up.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+from models.session_store import store_token, get_token
+from utils.local_store import UserLocks
+
+# Refresh when the access token has less than this many seconds left
+REFRESH_MARGIN_SECONDS = int(os.getenv("TOKEN_REFRESH_MARGIN", "300"))
+# How often the background thread checks tracked users
+REFRESH_CHECK_INTERVAL = int(os.getenv("TOKEN_REFRESH_INTERVAL", "60"))
+# Users idle for longer than this are no longer refreshed in the background
+TRACK_IDLE_SECONDS = int(os.getenv("TOKEN_REFRESH_IDLE", "3600"))
+
+_tracked_users = {}  # email -> monotonic time of last use
+_refresh_locks = UserLocks()
+_guard = threading.Lock()
+_refresher_thread = None
+
+_stats = {"refreshed": 0, "coalesced": 0, "failed": 0}
+
+
+def parse_expiry(token_data: dict):
+    """Returns the token expiry as a naive UTC datetime, or None if unknown."""
+    expiry = token_data.get("expiry")
+    if not expiry:
+        return None
+    try:
+        return datetime.strptime(expiry.rstrip("Z").split(".")[0], "%Y-%m-%dT%H:%M:%S")
+    except (AttributeError, ValueError):
+        return None
+
+
+def needs_refresh(token_data: dict) -> bool:
+    """True if the token can be refreshed and is missing, expiring soon or of unknown age."""
+    if not token_data.get("refresh_token"):
+        return False
+    if not token_data.get("token"):
+        return True
+
+    expiry = parse_expiry(token_data)
+    if expiry is None:
+        return True
+    return (expiry - datetime.utcnow()).total_seconds() < REFRESH_MARGIN_SECONDS
+
+
+def refresh_user_token(user_email: str, token_data: dict) -> dict:
+    """
+    Refreshes the user's access token and persists it via store_token.
+    If another thread refreshed it while we waited, that token is returned instead.
+
+    :param user_email: Email of the user owning the token
+    :param token_data: The token dict the caller currently holds
+    :return: The refreshed token dict
+    """
+    with _refresh_locks.hold(user_email):
+        # Coalesce: a concurrent caller may already have stored a fresh token
+        latest_json = get_token(user_email)
+        if latest_json:
+            latest = json.loads(latest_json)
+            if not needs_refresh(latest):
+                _stats["coalesced"] += 1
+                return latest
+            token_data = latest
+
+        creds = Credentials.from_authorized_user_info(token_data)
+        creds.refresh(Request())
+
+        refreshed = dict(token_data)
+        refreshed.update(json.loads(creds.to_json()))
+        refreshed["access_token"] = creds.token
+
+        store_token(user_email, json.dumps(refreshed))
+        _stats["refreshed"] += 1
+        print(f"🔄 Access token refreshed for {user_email}")
+        return refreshed
+
+
+def ensure_fresh_token(user_email: str, token_data: dict) -> dict:
+    """
+    Returns token_data, refreshed first if it is about to expire.
+    Also registers the user with the background refresher.
+    Refresh failures fall back to the original token (Google may still accept it).
+    """
+    _track(user_email)
+
+    if not needs_refresh(token_data):
+        return token_data
+
+    try:
+        return refresh_user_token(user_email, token_data)
+    except Exception as e:
+        _stats["failed"] += 1
+        print(f"⚠️ Token refresh failed for {user_email}: {e}")
+        return token_data
+
+
+def _track(user_email: str):
+    with _guard:
+        _tracked_users[user_email] = time.monotonic()
+    _start_refresher()
+
+
+def _start_refresher():
+    """Starts the background refresh thread once per process (lazily, so it survives gunicorn forks)."""
+    global _refresher_thread
+    with _guard:
+        if _refresher_thread is not None and _refresher_thread.is_alive():
+            return
+        _refresher_thread = threading.Thread(target=_refresh_loop, name="token-refresher", daemon=True)
+        _refresher_thread.start()
+
+
+def _refresh_loop():
+    while True:
+        time.sleep(REFRESH_CHECK_INTERVAL)
+
+        now = time.monotonic()
+        with _guard:
+            for email, last_used in list(_tracked_users.items()):
+                if now - last_used > TRACK_IDLE_SECONDS:
+                    del _tracked_users[email]
+            users = list(_tracked_users)
+
+        for email in users:
+            try:
+                token_json = get_token(email)
+                if not token_json:
+                    continue
+                token_data = json.loads(token_json)
+                if needs_refresh(token_data):
+                    refresh_user_token(email, token_data)
+            except Exception as e:
+                _stats["failed"] += 1
+                print(f"⚠️ Background token refresh failed for {email}: {e}")
+
+
+def get_refresh_stats() -> dict:
+    with _guard:
+        tracked = len(_tracked_users)
+    return dict(_stats, tracked_users=tracked)
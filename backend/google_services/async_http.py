@@ -0,0 +1,106 @@
+# backend/google_services/async_http.py
+"""
+aiohttp transport for googleapiclient requests.
+
+Discovery methods (service.events().list(...)) only build an HttpRequest; this
+module sends it on a shared aiohttp session instead of httplib2, then runs the
+request's own postproc so callers get the same dict .execute() would return.
+
+All async I/O runs on one background event loop per process. Sync code hands
+coroutines to it with run_async(), so many request threads waiting on Google
+share one connection pool instead of each holding a socket.
+"""
+import asyncio
+import os
+import threading
+
+import aiohttp
+import httplib2
+from google.auth.transport.requests import Request
+from googleapiclient.errors import HttpError
+
+from utils.tracing import span
+
+GOOGLE_ASYNC_TIMEOUT = float(os.getenv("GOOGLE_ASYNC_TIMEOUT", "30"))  # seconds per request
+GOOGLE_ASYNC_MAX_CONNECTIONS = int(os.getenv("GOOGLE_ASYNC_MAX_CONNECTIONS", "100"))
+
+_loop = None
+_loop_pid = None
+_loop_guard = threading.Lock()
+_session = None  # only touched from the loop thread
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Returns the background event loop, starting it on first use (and again after a fork)."""
+    global _loop, _loop_pid, _session
+    with _loop_guard:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            _session = None
+            threading.Thread(target=_loop.run_forever, name="google-async-io", daemon=True).start()
+        return _loop
+
+
+def run_async(coro, timeout: float = None):
+    """
+    Runs a coroutine on the background loop and blocks until it finishes.
+    Context variables (e.g. the stream event sink) are carried over from the caller.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result(timeout)
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=GOOGLE_ASYNC_MAX_CONNECTIONS, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=GOOGLE_ASYNC_TIMEOUT)
+        )
+    return _session
+
+
+async def _ensure_valid(creds):
+    if not creds.valid:
+        # The token endpoint call is rare; keep it off the loop thread
+        await asyncio.to_thread(creds.refresh, Request())
+
+
+async def execute_request(http_request):
+    """
+    Sends a googleapiclient HttpRequest over aiohttp and returns the deserialized response.
+    Raises HttpError for non-2xx responses, like HttpRequest.execute().
+    """
+    with span("google.execute", method=http_request.methodId, transport="aiohttp"):
+        return await _send(http_request)
+
+
+async def _send(http_request):
+    # The service's request builder puts an AuthorizedHttp on every request
+    creds = http_request.http.credentials
+
+    for attempt in range(2):
+        await _ensure_valid(creds)
+        headers = dict(http_request.headers)
+        creds.apply(headers)
+
+        async with _get_session().request(
+            http_request.method,
+            http_request.uri,
+            data=http_request.body,
+            headers=headers
+        ) as response:
+            content = await response.read()
+            info = {key.lower(): value for key, value in response.headers.items()}
+            info["status"] = str(response.status)
+            resp = httplib2.Response(info)
+
+        # A token revoked or expired early: refresh once and retry
+        if resp.status == 401 and attempt == 0 and creds.refresh_token:
+            await asyncio.to_thread(creds.refresh, Request())
+            continue
+        break
+
+    if resp.status >= 300:
+        raise HttpError(resp, content, uri=http_request.uri)
+    return http_request.postproc(resp, content)
@@ -0,0 +1,246 @@
+# backend/google_services/calendar_cache.py
+"""
+Per-user calendar event cache.
+
+The user's primary-calendar events from yesterday to CALENDAR_WINDOW_DAYS ahead
+are fetched once and then kept current with Calendar sync tokens (only changed
+and cancelled events are downloaded). Sync tokens do not move the window, so the
+full fetch is repeated every CALENDAR_RESYNC_DAYS, and events that have ended are
+pruned on each sync. Upcoming listings and title-to-event
+resolution for update/delete/Meet-link lookups read the cache and its title
+index (lowercased titles ordered by start time, rebuilt after each change)
+instead of listing the next 50 events on every call.
+"""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from googleapiclient.errors import HttpError
+
+from utils.local_store import UserLocks
+from .gmail_utils import get_google_service
+
+# Days ahead covered by the full sync
+CALENDAR_WINDOW_DAYS = int(os.getenv("CALENDAR_WINDOW_DAYS", "180"))
+# Incremental syncs never extend the window, so a full sync is redone after this many
+# days; the cache always reaches at least CALENDAR_WINDOW_DAYS - CALENDAR_RESYNC_DAYS ahead
+CALENDAR_RESYNC_DAYS = int(os.getenv("CALENDAR_RESYNC_DAYS", "7"))
+# Events that ended longer ago than this are dropped (the full sync starts here too)
+PAST_DAYS = 1
+# Minimum seconds between syncs for the same user
+CALENDAR_SYNC_INTERVAL = int(os.getenv("CALENDAR_SYNC_INTERVAL", "30"))
+PAGE_SIZE = 2500
+
+# user_email -> {"events": {id: event}, "index": [(start, end, lowercased title, id)] or None,
+#                "sync_token": str, "synced_at": float, "window_end": datetime}
+_calendars = {}
+_locks = UserLocks()
+
+_stats = {
+    "full_syncs": 0, "incremental_syncs": 0, "changed_events": 0, "pruned_events": 0,
+    "lookups": 0, "live_fallbacks": 0
+}
+
+
+def event_start(event: dict) -> str:
+    return event.get('start', {}).get('dateTime', event.get('start', {}).get('date'))
+
+
+def _start_key(event: dict) -> datetime:
+    """Start time as an aware UTC datetime (all-day events start at midnight UTC)."""
+    start = event_start(event) or ''
+    try:
+        parsed = datetime.fromisoformat(start.replace('Z', '+00:00'))
+    except ValueError:
+        return datetime.max.replace(tzinfo=timezone.utc)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _end_key(event: dict) -> datetime:
+    end = event.get('end', {}).get('dateTime', event.get('end', {}).get('date')) or ''
+    try:
+        parsed = datetime.fromisoformat(end.replace('Z', '+00:00'))
+    except ValueError:
+        return _start_key(event)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _title_index(calendar: dict) -> list:
+    """Returns (start, end, lowercased title, id) for every event, ordered by start."""
+    index = calendar["index"]
+    if index is None:
+        index = sorted(
+            ((_start_key(e), _end_key(e), e.get('summary', '').lower(), e['id']) for e in calendar["events"].values()),
+            key=lambda entry: entry[0]
+        )
+        calendar["index"] = index
+    return index
+
+
+def _list_pages(service, sync_token: str = None, window: tuple = None):
+    """Yields every events.list page (the (start, end) window, or only changes since sync_token)."""
+    page_token = None
+    while True:
+        kwargs = {"calendarId": 'primary', "singleEvents": True, "maxResults": PAGE_SIZE}
+        if sync_token:
+            # timeMin/timeMax/orderBy cannot be combined with a sync token
+            kwargs["syncToken"] = sync_token
+        else:
+            kwargs["timeMin"] = window[0].isoformat()
+            kwargs["timeMax"] = window[1].isoformat()
+        if page_token:
+            kwargs["pageToken"] = page_token
+
+        page = service.events().list(**kwargs).execute()
+        yield page
+
+        page_token = page.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def _full_sync(service, user_email: str):
+    now = datetime.now(timezone.utc)
+    window = (now - timedelta(days=PAST_DAYS), now + timedelta(days=CALENDAR_WINDOW_DAYS))
+    calendar = {"events": {}, "index": None, "sync_token": None, "synced_at": 0, "window_end": window[1]}
+    for page in _list_pages(service, window=window):
+        for event in page.get('items', []):
+            if event.get('status') != 'cancelled':
+                calendar["events"][event['id']] = event
+        calendar["sync_token"] = page.get('nextSyncToken', calendar["sync_token"])
+
+    calendar["synced_at"] = time.time()
+    _calendars[user_email] = calendar
+    _stats["full_syncs"] += 1
+    print(f"📆 Calendar cache rebuilt for {user_email}: {len(calendar['events'])} events")
+
+
+def _incremental_sync(service, user_email: str, calendar: dict):
+    """Applies changes since the calendar's sync token to a copy, so readers never see a half-applied sync."""
+    events = dict(calendar["events"])
+    changed = 0
+    sync_token = calendar["sync_token"]
+    for page in _list_pages(service, sync_token):
+        for event in page.get('items', []):
+            events.pop(event['id'], None)
+            if event.get('status') != 'cancelled':
+                events[event['id']] = event
+            changed += 1
+        sync_token = page.get('nextSyncToken', sync_token)
+
+    # Drop events that have ended, so the cache does not grow for as long as the process runs
+    cutoff = datetime.now(timezone.utc) - timedelta(days=PAST_DAYS)
+    ended = [event_id for event_id, event in events.items() if _end_key(event) < cutoff]
+    for event_id in ended:
+        del events[event_id]
+
+    _calendars[user_email] = {
+        "events": events,
+        "index": None if changed or ended else calendar["index"],
+        "sync_token": sync_token,
+        "synced_at": time.time(),
+        "window_end": calendar["window_end"]
+    }
+    _stats["incremental_syncs"] += 1
+    _stats["changed_events"] += changed
+    _stats["pruned_events"] += len(ended)
+
+
+def _window_too_short(calendar: dict) -> bool:
+    """True once the synced window reaches less than CALENDAR_WINDOW_DAYS - CALENDAR_RESYNC_DAYS ahead."""
+    min_end = datetime.now(timezone.utc) + timedelta(days=CALENDAR_WINDOW_DAYS - CALENDAR_RESYNC_DAYS)
+    return calendar["window_end"] < min_end
+
+
+def _get_calendar(user_email: str):
+    """
+    Returns the user's synced calendar, syncing first if it is older than
+    CALENDAR_SYNC_INTERVAL, or None if Google could not be reached.
+    """
+    if not user_email:
+        return None
+
+    calendar = _calendars.get(user_email)
+    if calendar and time.time() - calendar["synced_at"] < CALENDAR_SYNC_INTERVAL:
+        return calendar
+
+    with _locks.hold(user_email):
+        calendar = _calendars.get(user_email)
+        if calendar and time.time() - calendar["synced_at"] < CALENDAR_SYNC_INTERVAL:
+            return calendar
+
+        service, error = get_google_service("calendar", "v3", user_email)
+        if error:
+            return None
+
+        try:
+            if calendar and calendar["sync_token"] and not _window_too_short(calendar):
+                try:
+                    _incremental_sync(service, user_email, calendar)
+                    return _calendars[user_email]
+                except HttpError as e:
+                    if e.resp.status != 410:
+                        raise
+                    # The sync token expired; start over with a full fetch
+                    print(f"⚠️ Calendar sync token expired for {user_email}, rebuilding")
+            _full_sync(service, user_email)
+            return _calendars[user_email]
+        except Exception as e:
+            print(f"⚠️ Calendar sync failed for {user_email}: {e}")
+            return None
+
+
+def mark_stale(user_email: str):
+    """Forces the next lookup to sync (call after creating, updating or deleting an event)."""
+    calendar = _calendars.get(user_email)
+    if calendar:
+        calendar["synced_at"] = 0
+
+
+def upcoming_events(user_email: str, max_results: int = 10):
+    """
+    Returns the next max_results events that have not ended, ordered by start
+    (like events.list with timeMin=now), or None if the cache is unavailable.
+    """
+    calendar = _get_calendar(user_email)
+    if calendar is None:
+        _stats["live_fallbacks"] += 1
+        return None
+    _stats["lookups"] += 1
+
+    now = datetime.now(timezone.utc)
+    events = calendar["events"]
+    upcoming = []
+    for start, end, title, event_id in _title_index(calendar):
+        if end > now:
+            upcoming.append(events[event_id])
+            if len(upcoming) >= max_results:
+                break
+    return upcoming
+
+
+def find_event_by_title(user_email: str, title: str):
+    """
+    Returns (event, ready): the soonest upcoming event whose title contains title
+    (case-insensitive), and whether the cache could be consulted at all.
+    """
+    calendar = _get_calendar(user_email)
+    if calendar is None:
+        _stats["live_fallbacks"] += 1
+        return None, False
+    _stats["lookups"] += 1
+
+    needle = title.lower().strip()
+    now = datetime.now(timezone.utc)
+    for start, end, lowered, event_id in _title_index(calendar):
+        if end > now and needle in lowered:
+            return calendar["events"][event_id], True
+    return None, True
+
+
+def get_calendar_cache_stats() -> dict:
+    return dict(_stats, users=len(_calendars))
@@ -1,5 +1,6 @@
 # backend/google_services/calendar_utils.py
 from .gmail_utils import get_google_service
+from . import calendar_cache
 from datetime import datetime, timedelta
 import pytz
 from logs.log_utils import log_execution
@@ -43,7 +44,8 @@ def create_calendar_event(summary: str, description: str, start_time: str, end_t
         ).execute()
         
         meet_link = event.get('hangoutLink')
-        
+        calendar_cache.mark_stale(user_email)
+
         return {
             "success": True,
             "message": f"Calendar event '{summary}' created successfully.",
@@ -57,6 +59,47 @@ def create_calendar_event(summary: str, description: str, start_time: str, end_t
         return {"success": False, "message": f"Failed to create calendar event: {e}"}
 
 
+def upcoming_events_request(service, max_results: int):
+    """Builds (without executing) the events.list request behind get_upcoming_events."""
+    import datetime
+    now = datetime.datetime.utcnow().isoformat() + 'Z'  # 'Z' indicates UTC time
+
+    return service.events().list(
+        calendarId='primary',
+        timeMin=now,
+        maxResults=max_results,
+        singleEvents=True,
+        orderBy='startTime'
+    )
+
+
+def upcoming_events_result(events_result: dict) -> dict:
+    """Formats an events.list response as the get_upcoming_events result."""
+    events = events_result.get('items', [])
+
+    if not events:
+        return {"success": False, "message": "No upcoming events found."}
+
+    event_list = []
+    for event in events:
+        event_data = {
+            'id': event.get('id'),
+            'summary': event.get('summary', 'No Title'),
+            'start': event.get('start', {}).get('dateTime', event.get('start', {}).get('date')),
+            'end': event.get('end', {}).get('dateTime', event.get('end', {}).get('date')),
+            'meet_link': event.get('hangoutLink', 'No Meet link'),
+            'description': event.get('description', ''),
+            'attendees': [attendee.get('email') for attendee in event.get('attendees', [])]
+        }
+        event_list.append(event_data)
+
+    return {
+        "success": True,
+        "message": f"Found {len(event_list)} upcoming events.",
+        "details": event_list
+    }
+
+
 def get_upcoming_events(max_results: int = 10, user_email: str = None):
     """
     Retrieves upcoming calendar events with their Meet links.
@@ -64,45 +107,16 @@ def get_upcoming_events(max_results: int = 10, user_email: str = None):
     :param max_results: Maximum number of events to return.
     :param user_email: Email of the user (for token retrieval).
     """
+    cached_events = calendar_cache.upcoming_events(user_email, max_results)
+    if cached_events is not None:
+        return upcoming_events_result({"items": cached_events})
+
     service, error = get_google_service("calendar", "v3", user_email)
     if error:
         return {"success": False, "message": error}
 
     try:
-        import datetime
-        now = datetime.datetime.utcnow().isoformat() + 'Z'  # 'Z' indicates UTC time
-
-        events_result = service.events().list(
-            calendarId='primary',
-            timeMin=now,
-            maxResults=max_results,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-
-        events = events_result.get('items', [])
-
-        if not events:
-            return {"success": False, "message": "No upcoming events found."}
-
-        event_list = []
-        for event in events:
-            event_data = {
-                'id': event.get('id'),
-                'summary': event.get('summary', 'No Title'),
-                'start': event.get('start', {}).get('dateTime', event.get('start', {}).get('date')),
-                'end': event.get('end', {}).get('dateTime', event.get('end', {}).get('date')),
-                'meet_link': event.get('hangoutLink', 'No Meet link'),
-                'description': event.get('description', ''),
-                'attendees': [attendee.get('email') for attendee in event.get('attendees', [])]
-            }
-            event_list.append(event_data)
-
-        return {
-            "success": True,
-            "message": f"Found {len(event_list)} upcoming events.",
-            "details": event_list
-        }
+        return upcoming_events_result(upcoming_events_request(service, max_results).execute())
 
     except Exception as e:
         return {"success": False, "message": f"Failed to retrieve upcoming events: {e}"}
@@ -148,6 +162,7 @@ def create_instant_meet(title: str = "Google Meet", attendees: list = None, user
         ).execute()
 
         meet_link = created_event.get('hangoutLink')
+        calendar_cache.mark_stale(user_email)
 
         if user_email:
             log_execution(user_email, "CALENDAR_INSTANT_MEET", "CREATED", {
@@ -201,20 +216,25 @@ def get_event_meet_link(event_id: str = None, summary_search: str = None, user_e
             }
 
         elif summary_search:
-            # Search for event by title
-            import datetime
-            now = datetime.datetime.utcnow().isoformat() + 'Z'
-
-            events_result = service.events().list(
-                calendarId='primary',
-                timeMin=now,
-                maxResults=10,
-                singleEvents=True,
-                orderBy='startTime',
-                q=summary_search
-            ).execute()
-
-            events = events_result.get('items', [])
+            # Search for event by title, locally first
+            event, _ = calendar_cache.find_event_by_title(user_email, summary_search)
+            if event:
+                events = [event]
+            else:
+                # Google's full-text search also matches descriptions and locations
+                import datetime
+                now = datetime.datetime.utcnow().isoformat() + 'Z'
+
+                events_result = service.events().list(
+                    calendarId='primary',
+                    timeMin=now,
+                    maxResults=10,
+                    singleEvents=True,
+                    orderBy='startTime',
+                    q=summary_search
+                ).execute()
+
+                events = events_result.get('items', [])
 
             if not events:
                 return {"success": False, "message": f"No upcoming events found matching '{summary_search}'."}
@@ -240,6 +260,30 @@ def get_event_meet_link(event_id: str = None, summary_search: str = None, user_e
         return {"success": False, "message": f"Failed to retrieve event: {e}"}
 
 
+def find_upcoming_event(service, title: str, user_email: str = None):
+    """
+    Returns the soonest upcoming event whose title contains title (case-insensitive), or None.
+    Uses the user's calendar cache; lists the next 50 events only if the cache is unavailable.
+    """
+    event, ready = calendar_cache.find_event_by_title(user_email, title)
+    if ready:
+        return event
+
+    now = datetime.now().isoformat() + 'Z'
+    events_result = service.events().list(
+        calendarId='primary',
+        timeMin=now,
+        maxResults=50,
+        singleEvents=True,
+        orderBy='startTime'
+    ).execute()
+
+    for event in events_result.get('items', []):
+        if title.lower() in event.get('summary', '').lower():
+            return event
+    return None
+
+
 def update_calendar_event(event_id: str = None, summary_search: str = None, new_summary: str = None,
                          new_start_time: str = None, new_end_time: str = None,
                          new_description: str = None, new_attendees: list = None, user_email: str = None):
@@ -263,23 +307,7 @@ def update_calendar_event(event_id: str = None, summary_search: str = None, new_
     try:
         # Find event if only summary_search is provided
         if not event_id and summary_search:
-            now = datetime.now().isoformat() + 'Z'
-
-            events_result = service.events().list(
-                calendarId='primary',
-                timeMin=now,
-                maxResults=50,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-
-            events = events_result.get('items', [])
-            matching_event = None
-
-            for event in events:
-                if summary_search.lower() in event.get('summary', '').lower():
-                    matching_event = event
-                    break
+            matching_event = find_upcoming_event(service, summary_search, user_email)
 
             if not matching_event:
                 return {"success": False, "message": f"No event found matching '{summary_search}'"}
@@ -310,6 +338,7 @@ def update_calendar_event(event_id: str = None, summary_search: str = None, new_
             eventId=event_id,
             body=event
         ).execute()
+        calendar_cache.mark_stale(user_email)
 
         if user_email:
             log_execution(user_email, "CALENDAR_UPDATE", "SUCCESS", {
@@ -352,23 +381,7 @@ def delete_calendar_event(event_id: str = None, summary: str = None, user_email:
     try:
         # If no event_id, search by summary
         if not event_id and summary:
-            now = datetime.now().isoformat() + 'Z'
-
-            events_result = service.events().list(
-                calendarId='primary',
-                timeMin=now,
-                maxResults=50,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-
-            events = events_result.get('items', [])
-            matching_event = None
-
-            for event in events:
-                if summary.lower() in event.get('summary', '').lower():
-                    matching_event = event
-                    break
+            matching_event = find_upcoming_event(service, summary, user_email)
 
             if not matching_event:
                 return {"success": False, "message": f"No event found with title '{summary}'"}
@@ -379,6 +392,7 @@ def delete_calendar_event(event_id: str = None, summary: str = None, user_email:
             return {"success": False, "message": "No event_id or summary provided"}
 
         service.events().delete(calendarId='primary', eventId=event_id).execute()
+        calendar_cache.mark_stale(user_email)
 
         if user_email:
             log_execution(user_email, "CALENDAR_DELETE", "SUCCESS", {
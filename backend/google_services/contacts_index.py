@@ -0,0 +1,311 @@
+# backend/google_services/contacts_index.py
+"""
+Local per-user contacts index (SQLite).
+
+The index is filled with a full paginated People API fetch and then kept fresh
+with People API sync tokens, so contact searches and recipient resolution read
+local rows instead of downloading connections on every call.
+"""
+import os
+import sqlite3
+import time
+from threading import Lock
+
+from googleapiclient.errors import HttpError
+
+from utils.local_store import UserLocks, escape_like
+from .gmail_utils import get_google_service
+
+CONTACTS_DB_PATH = os.path.join(os.path.dirname(__file__), "contacts_index.db")
+
+# Minimum seconds between incremental syncs for the same user
+CONTACTS_SYNC_INTERVAL = int(os.getenv("CONTACTS_SYNC_INTERVAL", "60"))
+
+PERSON_FIELDS = 'names,emailAddresses,phoneNumbers,metadata'
+PAGE_SIZE = 1000
+# connections.list answers an expired or invalid sync token with these; other errors
+# (rate limits, 5xx) are transient and the next sync retries incrementally
+EXPIRED_TOKEN_STATUSES = {400, 410}
+
+_db_lock = Lock()
+_sync_locks = UserLocks()
+
+# user_email -> (version, all contacts, contacts with an email); the same list objects
+# are returned until the index version changes, so callers can cache work derived from them.
+# The version lives in contacts_sync, so a sync run by another worker process is noticed too.
+_memory = {}
+
+
+def _connect():
+    return sqlite3.connect(CONTACTS_DB_PATH, timeout=10)
+
+
+def init_contacts_db():
+    """Creates the contacts index tables if they don't exist."""
+    with _db_lock:
+        conn = _connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS contacts (
+                user_email TEXT NOT NULL,
+                resource_name TEXT NOT NULL,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                phone TEXT NOT NULL,
+                search_text TEXT NOT NULL,
+                PRIMARY KEY (user_email, resource_name)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS contacts_sync (
+                user_email TEXT PRIMARY KEY,
+                sync_token TEXT,
+                synced_at REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Databases created before the version column
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(contacts_sync)")}
+        if "version" not in columns:
+            cursor.execute("ALTER TABLE contacts_sync ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        conn.commit()
+        conn.close()
+
+
+def _person_to_row(user_email: str, person: dict) -> tuple:
+    names = person.get('names', [])
+    emails = person.get('emailAddresses', [])
+    phones = person.get('phoneNumbers', [])
+
+    name = names[0].get('displayName', '') if names else ''
+    email = emails[0].get('value', '') if emails else ''
+    phone = phones[0].get('value', '') if phones else ''
+
+    # Match against every name and address, not just the primary ones
+    search_text = " ".join(
+        [n.get('displayName', '') for n in names] + [e.get('value', '') for e in emails]
+    ).lower()
+
+    return (user_email, person.get('resourceName'), name, email, phone, search_text)
+
+
+def _row_to_contact(row) -> dict:
+    return {
+        "name": row[0],
+        "email": row[1],
+        "phone": row[2],
+        "resource_name": row[3]
+    }
+
+
+def _list_pages(service, sync_token: str = None):
+    """Yields every page of connections (all of them, or only changes since sync_token)."""
+    page_token = None
+    while True:
+        kwargs = {
+            "resourceName": 'people/me',
+            "pageSize": PAGE_SIZE,
+            "personFields": PERSON_FIELDS,
+            "requestSyncToken": True
+        }
+        if sync_token:
+            kwargs["syncToken"] = sync_token
+        if page_token:
+            kwargs["pageToken"] = page_token
+
+        page = service.people().connections().list(**kwargs).execute()
+        yield page
+
+        page_token = page.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def _full_sync(service, user_email: str) -> str:
+    rows = []
+    next_sync_token = None
+    for page in _list_pages(service):
+        rows.extend(_person_to_row(user_email, p) for p in page.get('connections', []))
+        next_sync_token = page.get('nextSyncToken', next_sync_token)
+
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.execute("DELETE FROM contacts WHERE user_email = ?", (user_email,))
+            conn.executemany("INSERT OR REPLACE INTO contacts VALUES (?, ?, ?, ?, ?, ?)", rows)
+        conn.close()
+
+    print(f"📇 Contacts index rebuilt for {user_email}: {len(rows)} contacts")
+    return next_sync_token
+
+
+def _incremental_sync(service, user_email: str, sync_token: str):
+    """Applies changes since sync_token. Returns (next_sync_token, changed_count)."""
+    upserts = []
+    deletes = []
+    next_sync_token = sync_token
+    for page in _list_pages(service, sync_token):
+        for person in page.get('connections', []):
+            if person.get('metadata', {}).get('deleted'):
+                deletes.append((user_email, person.get('resourceName')))
+            else:
+                upserts.append(_person_to_row(user_email, person))
+        next_sync_token = page.get('nextSyncToken', next_sync_token)
+
+    if upserts or deletes:
+        with _db_lock:
+            conn = _connect()
+            with conn:
+                conn.executemany("DELETE FROM contacts WHERE user_email = ? AND resource_name = ?", deletes)
+                conn.executemany("INSERT OR REPLACE INTO contacts VALUES (?, ?, ?, ?, ?, ?)", upserts)
+            conn.close()
+
+    return next_sync_token, len(upserts) + len(deletes)
+
+
+def _get_sync_state(user_email: str):
+    with _db_lock:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT sync_token, synced_at FROM contacts_sync WHERE user_email = ?", (user_email,)
+        ).fetchone()
+        conn.close()
+    return row
+
+
+def _save_sync_state(user_email: str, sync_token: str, synced_at: float, changed: bool):
+    """Stores the sync token; changed=True bumps the version that tells every process to reload."""
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.execute("""
+                INSERT INTO contacts_sync (user_email, sync_token, synced_at, version) VALUES (?, ?, ?, 1)
+                ON CONFLICT (user_email) DO UPDATE SET
+                    sync_token = excluded.sync_token,
+                    synced_at = excluded.synced_at,
+                    version = version + ?
+            """, (user_email, sync_token, synced_at, int(changed)))
+        conn.close()
+
+
+def sync_contacts(user_email: str, force: bool = False):
+    """
+    Brings the user's index up to date: a full fetch the first time (or when the
+    sync token has expired), otherwise only the changes since the last sync.
+    Skipped if the last sync is younger than CONTACTS_SYNC_INTERVAL unless force=True.
+
+    :return: None on success, or an error message.
+    """
+    with _sync_locks.hold(user_email):
+        state = _get_sync_state(user_email)
+        if state and not force and time.time() - state[1] < CONTACTS_SYNC_INTERVAL:
+            return None
+
+        service, error = get_google_service("people", "v1", user_email)
+        if error:
+            return error
+
+        try:
+            sync_token = state[0] if state else None
+            changed = True
+            if sync_token:
+                try:
+                    sync_token, changed_count = _incremental_sync(service, user_email, sync_token)
+                    changed = changed_count > 0
+                except HttpError as e:
+                    if e.resp.status not in EXPIRED_TOKEN_STATUSES:
+                        raise
+                    # Sync tokens expire after 7 days; start over with a full fetch
+                    print(f"⚠️ Contacts sync token rejected for {user_email}, rebuilding: {e}")
+                    sync_token = _full_sync(service, user_email)
+            else:
+                sync_token = _full_sync(service, user_email)
+
+            _save_sync_state(user_email, sync_token, time.time(), changed)
+            return None
+
+        except Exception as e:
+            return f"Failed to sync contacts: {e}"
+
+
+def mark_stale(user_email: str):
+    """Forces the next lookup to sync (call after creating, updating or deleting a contact)."""
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.execute("UPDATE contacts_sync SET synced_at = 0 WHERE user_email = ?", (user_email,))
+        conn.close()
+
+
+def get_contacts(user_email: str, require_email: bool = False):
+    """
+    Returns (contacts, error) with every indexed contact for the user
+    (only those with an email address if require_email=True).
+    The returned list is shared and must not be modified.
+    """
+    error = sync_contacts(user_email)
+
+    with _db_lock:
+        conn = _connect()
+        state = conn.execute(
+            "SELECT version FROM contacts_sync WHERE user_email = ?", (user_email,)
+        ).fetchone()
+        cached = _memory.get(user_email)
+        rows = None
+        if state is not None and not (cached and cached[0] == state[0]):
+            rows = conn.execute(
+                "SELECT name, email, phone, resource_name FROM contacts WHERE user_email = ? ORDER BY name",
+                (user_email,)
+            ).fetchall()
+        conn.close()
+
+    # Serve a slightly stale index if the sync failed, but never an unsynced one
+    if state is None:
+        return (None, error) if error else ([], None)
+
+    if rows is None:
+        return cached[2 if require_email else 1], None
+
+    contacts = [_row_to_contact(row) for row in rows]
+    with_email = [c for c in contacts if c['email']]
+    _memory[user_email] = (state[0], contacts, with_email)
+    return (with_email if require_email else contacts), None
+
+
+def search_index(user_email: str, query: str):
+    """
+    Returns (contacts, error) for contacts whose names or emails contain query (case-insensitive).
+    """
+    error = sync_contacts(user_email)
+
+    pattern = f"%{escape_like(query.lower())}%"
+    with _db_lock:
+        conn = _connect()
+        rows = conn.execute(
+            """
+            SELECT name, email, phone, resource_name FROM contacts
+            WHERE user_email = ? AND search_text LIKE ? ESCAPE '\\'
+            ORDER BY name
+            """,
+            (user_email, pattern)
+        ).fetchall()
+        has_state = conn.execute(
+            "SELECT 1 FROM contacts_sync WHERE user_email = ?", (user_email,)
+        ).fetchone()
+        conn.close()
+
+    if error and not has_state:
+        return None, error
+
+    return [_row_to_contact(row) for row in rows], None
+
+
+def count_contacts(user_email: str) -> int:
+    with _db_lock:
+        conn = _connect()
+        count = conn.execute("SELECT COUNT(*) FROM contacts WHERE user_email = ?", (user_email,)).fetchone()[0]
+        conn.close()
+    return count
+
+
+init_contacts_db()
@@ -1,5 +1,6 @@
 # backend/google_services/contacts_utils.py
 from .gmail_utils import get_google_service
+from . import contacts_index
 
 def list_contacts(max_results: int = 20, user_email: str = None):
     """
@@ -54,58 +55,25 @@ def list_contacts(max_results: int = 20, user_email: str = None):
 def search_contacts(query: str, user_email: str = None):
     """
     Searches for contacts matching a query.
+    Reads the local contacts index (synced incrementally), so every contact is searched.
 
     :param query: Search query (name or email).
     :param user_email: Email of the user (for token retrieval).
     """
-    service, error = get_google_service("people", "v1", user_email)
+    matching_contacts, error = contacts_index.search_index(user_email, query or '')
     if error:
         return {"success": False, "message": error}
 
-    try:
-        results = service.people().connections().list(
-            resourceName='people/me',
-            pageSize=100,
-            personFields='names,emailAddresses,phoneNumbers'
-        ).execute()
-
-        connections = results.get('connections', [])
-
-        if not connections:
+    if not matching_contacts:
+        if contacts_index.count_contacts(user_email) == 0:
             return {"success": False, "message": "No contacts found."}
+        return {"success": False, "message": f"No contacts found matching '{query}'."}
 
-        query_lower = query.lower()
-        matching_contacts = []
-
-        for person in connections:
-            names = person.get('names', [])
-            emails = person.get('emailAddresses', [])
-            phones = person.get('phoneNumbers', [])
-
-            name = names[0].get('displayName') if names else ''
-            email = emails[0].get('value') if emails else ''
-            phone = phones[0].get('value') if phones else ''
-
-            if (query_lower in name.lower() or
-                query_lower in email.lower()):
-                matching_contacts.append({
-                    "name": name,
-                    "email": email,
-                    "phone": phone,
-                    "resource_name": person.get('resourceName')
-                })
-
-        if not matching_contacts:
-            return {"success": False, "message": f"No contacts found matching '{query}'."}
-
-        return {
-            "success": True,
-            "message": f"Found {len(matching_contacts)} contacts matching '{query}'.",
-            "details": matching_contacts
-        }
-
-    except Exception as e:
-        return {"success": False, "message": f"Failed to search contacts: {e}"}
+    return {
+        "success": True,
+        "message": f"Found {len(matching_contacts)} contacts matching '{query}'.",
+        "details": matching_contacts
+    }
 
 
 def get_contact_email(name_query: str, user_email: str = None):
@@ -181,6 +149,7 @@ def create_contact(given_name: str = None, family_name: str = None, name: str =
         ).execute()
 
         full_name = f"{given_name or ''} {family_name or ''}".strip() or name or "New Contact"
+        contacts_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -242,6 +211,7 @@ def update_contact(resource_name: str, name: str = None, email: str = None, phon
             updatePersonFields='names,emailAddresses,phoneNumbers',
             body=contact_data
         ).execute()
+        contacts_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -269,6 +239,7 @@ def delete_contact(resource_name: str, user_email: str = None):
 
     try:
         service.people().deleteContact(resourceName=resource_name).execute()
+        contacts_index.mark_stale(user_email)
 
         return {
             "success": True,
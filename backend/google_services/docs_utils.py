@@ -1,5 +1,6 @@
 # backend/google_services/docs_utils.py
 from .gmail_utils import get_google_service
+from . import drive_index
 
 def create_document(title: str, content: str = "", user_email: str = None):
     """
@@ -33,6 +34,7 @@ def create_document(title: str, content: str = "", user_email: str = None):
             ).execute()
 
         doc_url = f"https://docs.google.com/document/d/{doc_id}/edit"
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -79,6 +81,7 @@ def append_to_document(doc_id: str, content: str, user_email: str = None):
         ).execute()
 
         doc_url = f"https://docs.google.com/document/d/{doc_id}/edit"
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -188,6 +191,7 @@ def format_text_range(doc_id: str, start_index: int, end_index: int, bold: bool
         ).execute()
 
         doc_url = f"https://docs.google.com/document/d/{doc_id}/edit"
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -237,6 +241,7 @@ def replace_text_in_document(doc_id: str, find_text: str, replace_text: str, use
 
         replacements = result.get('replies', [{}])[0].get('replaceAllText', {}).get('occurrencesChanged', 0)
         doc_url = f"https://docs.google.com/document/d/{doc_id}/edit"
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -312,6 +317,7 @@ def delete_document(doc_id: str, user_email: str = None):
         doc_title = doc.get('title', 'Untitled')
 
         drive_service.files().delete(fileId=doc_id).execute()
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
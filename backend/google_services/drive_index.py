@@ -0,0 +1,394 @@
+# backend/google_services/drive_index.py
+"""
+Local per-user Drive metadata index (SQLite).
+
+File names, types, links, parents and modification times are fetched once in
+the background and then kept current with the Drive Changes API (from the
+stored startPageToken), so name searches, recent-file listings and folder-id
+lookups (e.g. the Keep notes folder) run locally. Search results are ranked
+(exact name, then prefix, then word, then substring; newest first within each)
+and are not capped at one files.list page.
+"""
+import os
+import sqlite3
+import time
+from threading import Lock
+
+from googleapiclient.errors import HttpError
+
+from utils.local_store import BackgroundSync, UserLocks, escape_like
+from .gmail_utils import get_google_service
+
+DRIVE_INDEX_DB_PATH = os.path.join(os.path.dirname(__file__), "drive_index.db")
+
+# Set DRIVE_INDEX_ENABLED=0 to always query Drive live
+DRIVE_INDEX_ENABLED = os.getenv("DRIVE_INDEX_ENABLED", "1") == "1"
+# Minimum seconds between change syncs for the same user
+DRIVE_SYNC_INTERVAL = int(os.getenv("DRIVE_SYNC_INTERVAL", "30"))
+# Larger Drives are not indexed (lookups stay live)
+DRIVE_INDEX_MAX_FILES = int(os.getenv("DRIVE_INDEX_MAX_FILES", "20000"))
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+FILE_FIELDS = "id, name, mimeType, webViewLink, modifiedTime, parents, trashed"
+PAGE_SIZE = 1000
+# Seconds before retrying to index a Drive that was over DRIVE_INDEX_MAX_FILES
+OVERSIZED_RETRY_SECONDS = 6 * 3600
+# changes.list answers an invalid or expired page token with one of these; anything
+# else (401/403 rate limits, 429, 5xx) is transient and the token is kept
+REJECTED_TOKEN_STATUSES = {400, 404, 410}
+
+_db_lock = Lock()
+_sync_locks = UserLocks()
+_oversized = {}  # user_email -> time the Drive was found too large to index
+
+_stats = {"local_answers": 0, "live_fallbacks": 0, "full_syncs": 0, "change_syncs": 0, "changes_applied": 0}
+
+
+def _connect():
+    return sqlite3.connect(DRIVE_INDEX_DB_PATH, timeout=10)
+
+
+def init_drive_index():
+    """Creates the index tables if they don't exist."""
+    with _db_lock:
+        conn = _connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS drive_files (
+                user_email TEXT NOT NULL,
+                file_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                name_lower TEXT NOT NULL,
+                mime_type TEXT NOT NULL,
+                link TEXT NOT NULL,
+                modified_time TEXT NOT NULL,
+                parents TEXT NOT NULL,
+                PRIMARY KEY (user_email, file_id)
+            )
+        """)
+        # Recent-file listings and newest-first ranking
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_drive_files_user_modified ON drive_files (user_email, modified_time)"
+        )
+        # Folder-id lookups by exact name
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_drive_files_user_name ON drive_files (user_email, name_lower)"
+        )
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS drive_sync (
+                user_email TEXT PRIMARY KEY,
+                page_token TEXT NOT NULL,
+                synced_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+
+def _file_to_row(user_email: str, file: dict) -> tuple:
+    # Padded so a parent can be matched with LIKE '% <id> %'
+    parents = " " + " ".join(file.get('parents', [])) + " "
+    return (
+        user_email, file['id'], file.get('name', ''), file.get('name', '').lower(), file.get('mimeType', ''),
+        file.get('webViewLink', ''), file.get('modifiedTime', ''), parents
+    )
+
+
+def _row_to_file(row) -> dict:
+    """Same shape as a files.list entry, so drive_utils formatters can be reused."""
+    return {
+        "id": row[0],
+        "name": row[1],
+        "mimeType": row[2],
+        "webViewLink": row[3],
+        "modifiedTime": row[4]
+    }
+
+
+def _full_sync(service, user_email: str) -> bool:
+    # A token from before the listing: changes.list replays anything edited while it runs
+    page_token = service.changes().getStartPageToken().execute()["startPageToken"]
+
+    rows = []
+    list_token = None
+    while True:
+        kwargs = {
+            "q": "trashed = false",
+            "pageSize": PAGE_SIZE,
+            "fields": f"nextPageToken, files({FILE_FIELDS})"
+        }
+        if list_token:
+            kwargs["pageToken"] = list_token
+        page = service.files().list(**kwargs).execute()
+        rows.extend(_file_to_row(user_email, file) for file in page.get('files', []))
+        if len(rows) > DRIVE_INDEX_MAX_FILES:
+            print(f"⚠️ Drive of {user_email} has more than {DRIVE_INDEX_MAX_FILES} files; not indexing it")
+            _oversized[user_email] = time.time()
+            return False
+        list_token = page.get('nextPageToken')
+        if not list_token:
+            break
+
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.execute("DELETE FROM drive_files WHERE user_email = ?", (user_email,))
+            conn.executemany("INSERT OR REPLACE INTO drive_files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO drive_sync (user_email, page_token, synced_at) VALUES (?, ?, ?)",
+                (user_email, page_token, time.time())
+            )
+        conn.close()
+
+    _stats["full_syncs"] += 1
+    print(f"🗂️ Drive index rebuilt for {user_email}: {len(rows)} files")
+    return True
+
+
+def _change_sync(service, user_email: str, page_token: str):
+    """Applies Drive changes since page_token and stores the new start token."""
+    upserts = {}
+    removals = set()
+    while True:
+        page = service.changes().list(
+            pageToken=page_token,
+            pageSize=PAGE_SIZE,
+            includeRemoved=True,
+            spaces='drive',
+            fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))"
+        ).execute()
+
+        for change in page.get('changes', []):
+            file_id = change.get('fileId')
+            file = change.get('file')
+            if change.get('removed') or not file or file.get('trashed'):
+                removals.add(file_id)
+                upserts.pop(file_id, None)
+            else:
+                upserts[file_id] = _file_to_row(user_email, file)
+                removals.discard(file_id)
+
+        if page.get('newStartPageToken'):
+            page_token = page['newStartPageToken']
+            break
+        page_token = page['nextPageToken']
+
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.executemany(
+                "DELETE FROM drive_files WHERE user_email = ? AND file_id = ?",
+                [(user_email, file_id) for file_id in removals]
+            )
+            conn.executemany("INSERT OR REPLACE INTO drive_files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", list(upserts.values()))
+            conn.execute(
+                "UPDATE drive_sync SET page_token = ?, synced_at = ? WHERE user_email = ?",
+                (page_token, time.time(), user_email)
+            )
+        conn.close()
+
+    _stats["change_syncs"] += 1
+    _stats["changes_applied"] += len(upserts) + len(removals)
+
+
+def _get_sync_state(user_email: str):
+    with _db_lock:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT page_token, synced_at FROM drive_sync WHERE user_email = ?", (user_email,)
+        ).fetchone()
+        conn.close()
+    return row
+
+
+def _drop_sync_state(user_email: str):
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.execute("DELETE FROM drive_sync WHERE user_email = ?", (user_email,))
+        conn.close()
+
+
+def _rebuild(user_email: str):
+    service, error = get_google_service("drive", "v3", user_email)
+    if error:
+        print(f"⚠️ Drive index sync skipped for {user_email}: {error}")
+        return
+    _full_sync(service, user_email)
+
+
+# Builds a user's index in a background thread (once at a time per user)
+_full_syncs = BackgroundSync("drive-index-sync", _sync_locks, _rebuild)
+
+
+def sync_drive(user_email: str, force: bool = False) -> bool:
+    """
+    Brings the user's index up to date with the Changes API.
+    The first call only starts the initial fill in the background.
+    Skipped if the last sync is younger than DRIVE_SYNC_INTERVAL unless force=True.
+
+    :return: True if the index is ready to answer lookups.
+    """
+    if not DRIVE_INDEX_ENABLED or not user_email:
+        return False
+
+    state = _get_sync_state(user_email)
+    if state is None:
+        if time.time() - _oversized.get(user_email, 0) > OVERSIZED_RETRY_SECONDS:
+            _full_syncs.start(user_email)
+        return False
+    if not force and time.time() - state[1] < DRIVE_SYNC_INTERVAL:
+        return True
+
+    with _sync_locks.hold(user_email):
+        state = _get_sync_state(user_email)
+        if state is None:
+            return False
+        if not force and time.time() - state[1] < DRIVE_SYNC_INTERVAL:
+            return True
+
+        service, error = get_google_service("drive", "v3", user_email)
+        if error:
+            return False
+
+        try:
+            _change_sync(service, user_email, state[0])
+            return True
+        except HttpError as e:
+            if e.resp.status not in REJECTED_TOKEN_STATUSES:
+                print(f"⚠️ Drive change sync failed for {user_email}: {e}")
+                return False
+            # The stored page token is no longer accepted; start over
+            print(f"⚠️ Drive change token rejected for {user_email}, rebuilding index")
+        except Exception as e:
+            print(f"⚠️ Drive change sync failed for {user_email}: {e}")
+            return False
+
+    _drop_sync_state(user_email)
+    _full_syncs.start(user_email)
+    return False
+
+
+def mark_stale(user_email: str):
+    """Forces the next lookup to sync (call after creating, renaming or deleting files)."""
+    if not user_email:
+        return
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.execute("UPDATE drive_sync SET synced_at = 0 WHERE user_email = ?", (user_email,))
+        conn.close()
+
+
+def _fallback(result):
+    _stats["live_fallbacks" if result is None else "local_answers"] += 1
+    return result
+
+
+def search_files(user_email: str, query: str, max_results: int = 10):
+    """
+    Returns files whose name contains query (case-insensitive), ranked, or None
+    if the index is not ready and Drive must be queried live.
+    """
+    if not sync_drive(user_email):
+        return _fallback(None)
+
+    needle = query.strip().lower()
+    escaped = escape_like(needle)
+    with _db_lock:
+        conn = _connect()
+        rows = conn.execute("""
+            SELECT file_id, name, mime_type, link, modified_time FROM drive_files
+            WHERE user_email = ? AND name_lower LIKE ? ESCAPE '\\'
+            ORDER BY
+                CASE
+                    WHEN name_lower = ? THEN 0
+                    WHEN name_lower LIKE ? ESCAPE '\\' THEN 1
+                    WHEN name_lower LIKE ? ESCAPE '\\' THEN 2
+                    ELSE 3
+                END,
+                modified_time DESC
+            LIMIT ?
+        """, (user_email, f"%{escaped}%", needle, f"{escaped}%", f"% {escaped}%", max_results)).fetchall()
+        conn.close()
+    return _fallback([_row_to_file(row) for row in rows])
+
+
+def recent_files(user_email: str, limit: int = 10):
+    """Returns the most recently modified files, or None if the index is not ready."""
+    if not sync_drive(user_email):
+        return _fallback(None)
+
+    with _db_lock:
+        conn = _connect()
+        rows = conn.execute("""
+            SELECT file_id, name, mime_type, link, modified_time FROM drive_files
+            WHERE user_email = ?
+            ORDER BY modified_time DESC
+            LIMIT ?
+        """, (user_email, limit)).fetchall()
+        conn.close()
+    return _fallback([_row_to_file(row) for row in rows])
+
+
+def find_folder_id(user_email: str, name: str):
+    """
+    Returns (folder_id, ready): the most recently modified folder named exactly
+    name, and whether the index could be consulted at all.
+    """
+    if not sync_drive(user_email):
+        _fallback(None)
+        return None, False
+
+    with _db_lock:
+        conn = _connect()
+        row = conn.execute("""
+            SELECT file_id FROM drive_files
+            WHERE user_email = ? AND name_lower = ? AND mime_type = ?
+            ORDER BY modified_time DESC
+            LIMIT 1
+        """, (user_email, name.lower(), FOLDER_MIME_TYPE)).fetchone()
+        conn.close()
+    _stats["local_answers"] += 1
+    return (row[0] if row else None), True
+
+
+def files_in_folder(user_email: str, folder_id: str, mime_type: str = None, limit: int = 50):
+    """Returns the folder's files, newest first, or None if the index is not ready."""
+    if not sync_drive(user_email):
+        return _fallback(None)
+
+    conditions = ["user_email = ?", "parents LIKE ? ESCAPE '\\'"]
+    args = [user_email, f"% {escape_like(folder_id)} %"]
+    if mime_type:
+        conditions.append("mime_type = ?")
+        args.append(mime_type)
+
+    with _db_lock:
+        conn = _connect()
+        rows = conn.execute(f"""
+            SELECT file_id, name, mime_type, link, modified_time FROM drive_files
+            WHERE {" AND ".join(conditions)}
+            ORDER BY modified_time DESC
+            LIMIT ?
+        """, args + [limit]).fetchall()
+        conn.close()
+    return _fallback([_row_to_file(row) for row in rows])
+
+
+def remember_file(user_email: str, file: dict):
+    """Adds a file the app just created, so lookups see it before the next change sync."""
+    if not user_email or _get_sync_state(user_email) is None:
+        return
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO drive_files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _file_to_row(user_email, file))
+        conn.close()
+
+
+def get_drive_index_stats() -> dict:
+    return dict(_stats)
+
+
+init_drive_index()
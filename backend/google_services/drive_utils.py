@@ -1,7 +1,33 @@
 # backend/google_services/drive_utils.py
 from .gmail_utils import get_google_service
+from . import drive_index
 import re
 
+# files.list returns at most this many files per page; index lookups are capped the same way
+DRIVE_MAX_RESULTS = 100
+
+
+def clamp_max_results(max_results, default: int = 10) -> int:
+    """Turns a planner-supplied count (None, "5", -1, 10000) into 1..DRIVE_MAX_RESULTS."""
+    try:
+        count = int(max_results or default)
+    except (TypeError, ValueError):
+        count = default
+    return max(1, min(count, DRIVE_MAX_RESULTS))
+
+
+def lookup_index(lookup, *args, not_ready=None):
+    """
+    Runs a drive_index lookup. A failing index is treated like one that is not
+    ready yet: the error is printed and not_ready is returned, so the caller queries Drive live.
+    """
+    try:
+        return lookup(*args)
+    except Exception as e:
+        print(f"⚠️ Drive index lookup failed, querying live: {e}")
+        return not_ready
+
+
 def escape_drive_query(text: str) -> str:
     """
     Escape special characters in Drive API query strings.
@@ -15,52 +41,66 @@ def escape_drive_query(text: str) -> str:
     text = text.replace("'", "\\'")
     return text
 
-def search_drive_files(query: str, user_email: str = None):
+def search_files_request(service, escaped_query: str, max_results: int = 10):
+    """Builds (without executing) the files.list request behind search_drive_files."""
+    # Search in name only for better relevance, include both owned and shared
+    search_query = f"name contains '{escaped_query}' and trashed = false"
+
+    return service.files().list(
+        q=search_query,
+        pageSize=clamp_max_results(max_results),
+        fields="nextPageToken, files(id, name, webViewLink, mimeType, modifiedTime, owners)",
+        orderBy="modifiedTime desc"
+    )
+
+
+def search_files_result(query: str, results: dict) -> dict:
+    """Formats a files.list response as the search_drive_files result."""
+    files = results.get('files', [])
+
+    if not files:
+        return {"success": False, "message": f"No files found matching '{query}'."}
+
+    file_list = [{
+        "id": file['id'],
+        "name": file['name'],
+        "link": file.get('webViewLink', ''),
+        "mimeType": file.get('mimeType', ''),
+        "modified": file.get('modifiedTime', '')
+    } for file in files]
+
+    return {
+        "success": True,
+        "message": f"Found {len(file_list)} files matching '{query}'.",
+        "details": file_list
+    }
+
+
+def search_drive_files(query: str, user_email: str = None, max_results: int = 10):
     """
     Searches Google Drive for files matching a query in name or content.
-    Includes both owned and shared files.
+    Includes both owned and shared files. Answered from the user's Drive index
+    (ranked by how well the name matches) once it is built.
 
     :param query: Text string to search for in file names or content.
     :param user_email: Email of the user (for token retrieval).
+    :param max_results: Maximum number of files to return.
     """
+    escaped_query = escape_drive_query(query)
+    if not escaped_query:
+        return {"success": False, "message": "Invalid search query."}
+
+    max_results = clamp_max_results(max_results)
+    indexed_files = lookup_index(drive_index.search_files, user_email, query, max_results)
+    if indexed_files is not None:
+        return search_files_result(query, {"files": indexed_files})
+
     service, error = get_google_service("drive", "v3", user_email)
     if error:
         return {"success": False, "message": error}
 
     try:
-        escaped_query = escape_drive_query(query)
-
-        if not escaped_query:
-            return {"success": False, "message": "Invalid search query."}
-
-        # Search in name only for better relevance, include both owned and shared
-        search_query = f"name contains '{escaped_query}' and trashed = false"
-
-        results = service.files().list(
-            q=search_query,
-            pageSize=10,
-            fields="nextPageToken, files(id, name, webViewLink, mimeType, modifiedTime, owners)",
-            orderBy="modifiedTime desc"
-        ).execute()
-
-        files = results.get('files', [])
-
-        if not files:
-            return {"success": False, "message": f"No files found matching '{query}'."}
-
-        file_list = [{
-            "id": file['id'],
-            "name": file['name'],
-            "link": file.get('webViewLink', ''),
-            "mimeType": file.get('mimeType', ''),
-            "modified": file.get('modifiedTime', '')
-        } for file in files]
-
-        return {
-            "success": True,
-            "message": f"Found {len(file_list)} files matching '{query}'.",
-            "details": file_list
-        }
+        return search_files_result(query, search_files_request(service, escaped_query, max_results).execute())
 
     except Exception as e:
         return {"success": False, "message": f"Failed to search Google Drive: {e}"}
@@ -73,19 +113,23 @@ def list_recent_files(limit: int = 10, user_email: str = None):
     :param limit: Maximum number of files to return (default 10).
     :param user_email: Email of the user (for token retrieval).
     """
-    service, error = get_google_service("drive", "v3", user_email)
-    if error:
-        return {"success": False, "message": error}
+    limit = clamp_max_results(limit)
+    files = lookup_index(drive_index.recent_files, user_email, limit)
+    if files is None:
+        service, error = get_google_service("drive", "v3", user_email)
+        if error:
+            return {"success": False, "message": error}
 
     try:
-        results = service.files().list(
-            q="trashed = false",
-            pageSize=limit,
-            fields="files(id, name, webViewLink, mimeType, modifiedTime)",
-            orderBy="modifiedTime desc"
-        ).execute()
+        if files is None:
+            results = service.files().list(
+                q="trashed = false",
+                pageSize=limit,
+                fields="files(id, name, webViewLink, mimeType, modifiedTime)",
+                orderBy="modifiedTime desc"
+            ).execute()
 
-        files = results.get('files', [])
+            files = results.get('files', [])
 
         if not files:
             return {"success": False, "message": "No recent files found."}
@@ -169,6 +213,7 @@ def upload_file(file_name: str, file_content: bytes, mime_type: str = 'text/plai
             media_body=media,
             fields='id, name, webViewLink'
         ).execute()
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -197,6 +242,7 @@ def delete_file(file_id: str, user_email: str = None):
 
     try:
         service.files().delete(fileId=file_id).execute()
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -230,6 +276,7 @@ def rename_file(file_id: str, new_name: str, user_email: str = None):
             body=file_metadata,
             fields='id, name, webViewLink'
         ).execute()
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -1,10 +1,10 @@
 # backend/google_services/gmail_compose.py
 import json
-import cohere
 import os
 from dotenv import load_dotenv
 from utils.recipient_resolver import resolve_recipients, parse_multiple_recipients
 from logs.log_utils import log_execution
+from utils import llm_client
 
 load_dotenv()
 COHERE_API_KEY = os.getenv("COHERE_API_KEY")
@@ -52,12 +52,11 @@ def generate_email_draft(user_instruction: str, recipient_name: str = "", user_f
     )
 
     try:
-        co = cohere.Client(COHERE_API_KEY)
-        response = co.chat(
-            model='command-a-03-2025',
+        response = llm_client.chat(
             message=full_prompt,
             max_tokens=300,
-            temperature=0.6
+            temperature=0.6,
+            timeout=15
         )
 
         response_text = response.text.strip()
@@ -0,0 +1,470 @@
+# backend/google_services/gmail_store.py
+"""
+Local per-user Gmail metadata store (SQLite).
+
+The store holds ids, thread ids, headers, snippets and labels for the user's
+most recent GMAIL_STORE_WINDOW messages plus every unread message. It is filled
+once in the background and then kept current with users.history.list from the
+stored historyId, so only new or changed messages are fetched from Gmail.
+
+search_local answers the simple header/label queries behind GMAIL_LIST_UNREAD
+and most GMAIL_SEARCH prompts from the store; anything it cannot answer exactly
+(free text, OR, has:attachment, results older than the stored window) returns
+None and goes to the live messages.list search.
+
+Like Gmail, from:/to:/subject: match whole tokens, not substrings: from:raj
+finds "Raj Patel" and raj@x.com but not "Niraj", and from:gmail.com finds every
+@gmail.com sender while from:ma finds none of them.
+"""
+import os
+import re
+import shlex
+import sqlite3
+import time
+from threading import Lock
+
+from googleapiclient.errors import HttpError
+
+from utils.local_store import BackgroundSync, UserLocks, escape_like
+from utils.tracing import span
+from .gmail_utils import get_google_service, summarize_message, metadata_request, GMAIL_BATCH_SIZE
+
+GMAIL_STORE_DB_PATH = os.path.join(os.path.dirname(__file__), "gmail_store.db")
+
+# Set GMAIL_STORE_ENABLED=0 to always search Gmail live
+GMAIL_STORE_ENABLED = os.getenv("GMAIL_STORE_ENABLED", "1") == "1"
+# Most recent messages kept in the store (unread messages are kept regardless)
+GMAIL_STORE_WINDOW = int(os.getenv("GMAIL_STORE_WINDOW", "200"))
+# Minimum seconds between history syncs for the same user
+GMAIL_SYNC_INTERVAL = int(os.getenv("GMAIL_SYNC_INTERVAL", "15"))
+
+HISTORY_TYPES = ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"]
+# Messages with these labels are not returned by messages.list, so they are not stored either
+EXCLUDED_LABELS = {"SPAM", "TRASH"}
+
+# Query operators answered from the store; anything else goes to Gmail
+LABEL_OPERATORS = {
+    "is:unread": ("UNREAD", True),
+    "is:read": ("UNREAD", False),
+    "is:starred": ("STARRED", True),
+    "is:important": ("IMPORTANT", True),
+    "in:inbox": ("INBOX", True),
+    "in:sent": ("SENT", True),
+}
+HEADER_OPERATORS = {"from": "from_addr", "to": "to_addr", "subject": "subject"}
+AGE_PATTERN = re.compile(r'^(newer_than|older_than):(\d+)([dmy])$')
+AGE_UNITS = {"d": 86400, "m": 30 * 86400, "y": 365 * 86400}
+# Gmail splits names and addresses into tokens at anything that is not a letter or digit
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+_db_lock = Lock()
+_sync_locks = UserLocks()
+
+_stats = {"local_answers": 0, "live_fallbacks": 0, "full_syncs": 0, "history_syncs": 0, "delta_fetches": 0}
+
+
+def _tokens(text: str) -> str:
+    """Lowercased tokens of text, space-separated and space-padded for run matching."""
+    return " " + " ".join(TOKEN_PATTERN.findall(text.lower())) + " "
+
+
+def _header_match(value: str, needle: str) -> bool:
+    """SQL header_match(column, needle): needle (from _tokens) is a run of whole tokens in value."""
+    return needle in _tokens(value or "")
+
+
+def _connect():
+    conn = sqlite3.connect(GMAIL_STORE_DB_PATH, timeout=10)
+    conn.create_function("header_match", 2, _header_match, deterministic=True)
+    return conn
+
+
+def init_gmail_store():
+    """Creates the store tables if they don't exist."""
+    with _db_lock:
+        conn = _connect()
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS gmail_messages (
+                user_email TEXT NOT NULL,
+                message_id TEXT NOT NULL,
+                thread_id TEXT,
+                internal_date INTEGER NOT NULL,
+                from_addr TEXT NOT NULL,
+                to_addr TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                date TEXT NOT NULL,
+                snippet TEXT NOT NULL,
+                labels TEXT NOT NULL,
+                PRIMARY KEY (user_email, message_id)
+            )
+        """)
+        # Newest-first scans for one user
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_gmail_messages_user_date ON gmail_messages (user_email, internal_date)"
+        )
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS gmail_sync (
+                user_email TEXT PRIMARY KEY,
+                history_id TEXT NOT NULL,
+                window_start INTEGER NOT NULL,
+                unread_complete INTEGER NOT NULL,
+                synced_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+
+def _message_to_row(user_email: str, msg_data: dict) -> tuple:
+    summary = summarize_message(msg_data)
+    # Padded so a label can be matched with LIKE '% UNREAD %'
+    labels = " " + " ".join(msg_data.get("labelIds", [])) + " "
+    return (
+        user_email, summary["id"], summary["threadId"], int(msg_data.get("internalDate", 0)),
+        summary["from"], summary["to"], summary["subject"], summary["date"], summary["snippet"], labels
+    )
+
+
+def _row_to_summary(row) -> dict:
+    return {
+        "id": row[0],
+        "threadId": row[1],
+        "from": row[2],
+        "to": row[3],
+        "subject": row[4],
+        "date": row[5],
+        "snippet": row[6]
+    }
+
+
+def _fetch_metadata(service, message_ids: list) -> list:
+    """Fetches metadata-format messages with Gmail batch requests (silently, unlike fetch_message_summaries)."""
+    messages = {}
+    failed = []
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            failed.append(request_id)
+        else:
+            messages[request_id] = response
+
+    for start in range(0, len(message_ids), GMAIL_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=on_response)
+        for message_id in message_ids[start:start + GMAIL_BATCH_SIZE]:
+            batch.add(metadata_request(service, message_id), request_id=message_id)
+        # BatchHttpRequest sends through http.request, bypassing the traced HttpRequest.execute
+        with span("google.batch", size=len(message_ids[start:start + GMAIL_BATCH_SIZE])):
+            batch.execute()
+
+    for message_id in failed:
+        try:
+            messages[message_id] = metadata_request(service, message_id).execute()
+        except HttpError as e:
+            # Deleted between the listing and the fetch
+            print(f"⚠️ Could not fetch metadata for message {message_id}: {e}")
+
+    return [messages[message_id] for message_id in message_ids if message_id in messages]
+
+
+def _list_ids(service, limit: int, query: str = None):
+    """Returns (message ids newest first, True if the listing ended before limit)."""
+    message_ids = []
+    page_token = None
+    while len(message_ids) < limit:
+        kwargs = {"userId": "me", "maxResults": min(500, limit - len(message_ids))}
+        if query:
+            kwargs["q"] = query
+        if page_token:
+            kwargs["pageToken"] = page_token
+        page = service.users().messages().list(**kwargs).execute()
+        message_ids.extend(msg["id"] for msg in page.get("messages", []))
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            return message_ids, True
+    return message_ids, False
+
+
+def _full_sync(service, user_email: str):
+    # Take the historyId first so changes made during the listing are replayed by the next history sync
+    history_id = service.users().getProfile(userId="me").execute()["historyId"]
+
+    recent_ids, mailbox_complete = _list_ids(service, GMAIL_STORE_WINDOW)
+    unread_ids, unread_complete = _list_ids(service, GMAIL_STORE_WINDOW, "is:unread")
+    messages = _fetch_metadata(service, list(dict.fromkeys(recent_ids + unread_ids)))
+    rows = [_message_to_row(user_email, msg) for msg in messages]
+
+    # Everything newer than the oldest recent message is in the store
+    recent = set(recent_ids)
+    window_start = 0
+    if not mailbox_complete:
+        window_start = min((row[3] for row in rows if row[1] in recent), default=0)
+
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.execute("DELETE FROM gmail_messages WHERE user_email = ?", (user_email,))
+            conn.executemany("INSERT OR REPLACE INTO gmail_messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO gmail_sync VALUES (?, ?, ?, ?, ?)",
+                (user_email, history_id, window_start, int(unread_complete), time.time())
+            )
+        conn.close()
+
+    _stats["full_syncs"] += 1
+    print(f"📬 Gmail store rebuilt for {user_email}: {len(rows)} messages")
+
+
+def _history_sync(service, user_email: str, history_id: str):
+    """Applies mailbox changes since history_id. Returns the new historyId."""
+    to_fetch = {}  # message id -> None (ordered set)
+    label_updates = {}  # message id -> current label ids
+    deletes = set()
+
+    page_token = None
+    while True:
+        kwargs = {"userId": "me", "startHistoryId": history_id, "historyTypes": HISTORY_TYPES}
+        if page_token:
+            kwargs["pageToken"] = page_token
+        page = service.users().history().list(**kwargs).execute()
+
+        for record in page.get("history", []):
+            for added in record.get("messagesAdded", []):
+                to_fetch[added["message"]["id"]] = None
+                deletes.discard(added["message"]["id"])
+            for deleted in record.get("messagesDeleted", []):
+                deletes.add(deleted["message"]["id"])
+                to_fetch.pop(deleted["message"]["id"], None)
+            # The message in a label change carries its complete, current label set
+            for changed in record.get("labelsAdded", []) + record.get("labelsRemoved", []):
+                label_updates[changed["message"]["id"]] = changed["message"].get("labelIds", [])
+
+        history_id = page.get("historyId", history_id)
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            break
+
+    with _db_lock:
+        conn = _connect()
+        stored = {row[0] for row in conn.execute(
+            "SELECT message_id FROM gmail_messages WHERE user_email = ?", (user_email,)
+        )}
+        conn.close()
+
+    label_rows = []
+    for message_id, label_ids in label_updates.items():
+        if message_id in deletes or message_id in to_fetch:
+            continue
+        if set(label_ids) & EXCLUDED_LABELS:
+            deletes.add(message_id)
+        elif message_id in stored:
+            label_rows.append((" " + " ".join(label_ids) + " ", user_email, message_id))
+        elif "UNREAD" in label_ids:
+            # An older message marked unread joins the store so the unread set stays complete
+            to_fetch[message_id] = None
+
+    messages = _fetch_metadata(service, list(to_fetch)) if to_fetch else []
+    _stats["delta_fetches"] += len(messages)
+    upserts = []
+    for msg in messages:
+        if set(msg.get("labelIds", [])) & EXCLUDED_LABELS:
+            deletes.add(msg["id"])
+        else:
+            upserts.append(_message_to_row(user_email, msg))
+
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.executemany(
+                "DELETE FROM gmail_messages WHERE user_email = ? AND message_id = ?",
+                [(user_email, message_id) for message_id in deletes]
+            )
+            conn.executemany("INSERT OR REPLACE INTO gmail_messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", upserts)
+            conn.executemany("UPDATE gmail_messages SET labels = ? WHERE user_email = ? AND message_id = ?", label_rows)
+            conn.execute(
+                "UPDATE gmail_sync SET history_id = ?, synced_at = ? WHERE user_email = ?",
+                (history_id, time.time(), user_email)
+            )
+        conn.close()
+
+    _stats["history_syncs"] += 1
+    return history_id
+
+
+def _get_sync_state(user_email: str):
+    with _db_lock:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT history_id, window_start, unread_complete, synced_at FROM gmail_sync WHERE user_email = ?",
+            (user_email,)
+        ).fetchone()
+        conn.close()
+    return row
+
+
+def _rebuild(user_email: str):
+    service, error = get_google_service("gmail", "v1", user_email)
+    if error:
+        print(f"⚠️ Gmail store sync skipped for {user_email}: {error}")
+        return
+    _full_sync(service, user_email)
+
+
+# Builds a user's store in a background thread (once at a time per user)
+_full_syncs = BackgroundSync("gmail-store-sync", _sync_locks, _rebuild)
+
+
+def sync_mailbox(user_email: str, force: bool = False) -> bool:
+    """
+    Brings the user's store up to date with one history sync.
+    The first call only starts the initial fill in the background.
+    Skipped if the last sync is younger than GMAIL_SYNC_INTERVAL unless force=True.
+
+    :return: True if the store is ready to answer queries.
+    """
+    state = _get_sync_state(user_email)
+    if state is None:
+        _full_syncs.start(user_email)
+        return False
+
+    if not force and time.time() - state[3] < GMAIL_SYNC_INTERVAL:
+        return True
+
+    with _sync_locks.hold(user_email):
+        state = _get_sync_state(user_email)
+        if state is None:
+            return False
+        if not force and time.time() - state[3] < GMAIL_SYNC_INTERVAL:
+            return True
+
+        service, error = get_google_service("gmail", "v1", user_email)
+        if error:
+            return False
+
+        try:
+            _history_sync(service, user_email, state[0])
+            return True
+        except HttpError as e:
+            if e.resp.status != 404:
+                print(f"⚠️ Gmail history sync failed for {user_email}: {e}")
+                return False
+            # The stored historyId is too old; start over
+            print(f"⚠️ Gmail historyId expired for {user_email}, rebuilding store")
+        except Exception as e:
+            print(f"⚠️ Gmail history sync failed for {user_email}: {e}")
+            return False
+
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.execute("DELETE FROM gmail_sync WHERE user_email = ?", (user_email,))
+        conn.close()
+    _full_syncs.start(user_email)
+    return False
+
+
+def mark_stale(user_email: str):
+    """Forces the next lookup to sync (call after sending, relabelling or deleting mail)."""
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.execute("UPDATE gmail_sync SET synced_at = 0 WHERE user_email = ?", (user_email,))
+        conn.close()
+
+
+def _compile_query(query: str):
+    """
+    Translates a Gmail query into (SQL conditions, args, unread_only).
+    Returns None if the query uses anything the store cannot evaluate exactly.
+    """
+    try:
+        terms = shlex.split(query.lower())
+    except ValueError:
+        return None
+
+    conditions = []
+    args = []
+    unread_only = False
+    for term in terms:
+        if term in LABEL_OPERATORS:
+            label, present = LABEL_OPERATORS[term]
+            conditions.append("labels " + ("LIKE" if present else "NOT LIKE") + " ?")
+            args.append(f"% {label} %")
+            unread_only = unread_only or term == "is:unread"
+            continue
+
+        age = AGE_PATTERN.match(term)
+        if age:
+            cutoff = int((time.time() - int(age.group(2)) * AGE_UNITS[age.group(3)]) * 1000)
+            conditions.append("internal_date " + (">= ?" if age.group(1) == "newer_than" else "< ?"))
+            args.append(cutoff)
+            continue
+
+        operator, _, value = term.partition(":")
+        needle = _tokens(value)
+        if operator in HEADER_OPERATORS and needle.strip():
+            column = HEADER_OPERATORS[operator]
+            # A LIKE on the first token is a cheap prefilter for the token match
+            conditions.append(f"lower({column}) LIKE ? ESCAPE '\\' AND header_match({column}, ?)")
+            args.extend([f"%{escape_like(needle.split()[0])}%", needle])
+            continue
+
+        # Free text searches message bodies, which the store does not have
+        return None
+
+    return conditions, args, unread_only
+
+
+def search_local(user_email: str, query: str, max_results: int):
+    """
+    Answers a Gmail search from the store.
+
+    :return: List of email summaries (newest first), or None if the query must go to Gmail.
+    """
+    if not GMAIL_STORE_ENABLED or not user_email:
+        return None
+
+    compiled = _compile_query(query or "")
+    if compiled is None or not sync_mailbox(user_email):
+        _stats["live_fallbacks"] += 1
+        return None
+
+    conditions, args, unread_only = compiled
+    state = _get_sync_state(user_email)
+    if state is None:
+        _stats["live_fallbacks"] += 1
+        return None
+
+    where = " AND ".join(["user_email = ?"] + conditions)
+    with _db_lock:
+        conn = _connect()
+        rows = conn.execute(f"""
+            SELECT message_id, thread_id, from_addr, to_addr, subject, date, snippet, internal_date
+            FROM gmail_messages
+            WHERE {where}
+            ORDER BY internal_date DESC
+            LIMIT ?
+        """, [user_email] + args + [max_results]).fetchall()
+        conn.close()
+
+    # Exact only if every match the page needs lies inside the stored window
+    # (or the query is restricted to unread mail and the store holds all of it)
+    window_start, unread_complete = state[1], state[2]
+    covered = unread_only and unread_complete
+    if not covered and len(rows) == max_results:
+        covered = all(row[7] >= window_start for row in rows)
+    if not covered and window_start == 0:
+        covered = True
+    if not covered:
+        _stats["live_fallbacks"] += 1
+        return None
+
+    _stats["local_answers"] += 1
+    return [_row_to_summary(row) for row in rows]
+
+
+def get_gmail_store_stats() -> dict:
+    return dict(_stats)
+
+
+init_gmail_store()
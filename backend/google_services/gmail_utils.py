@@ -2,14 +2,22 @@
 
 import base64
 from email.mime.text import MIMEText
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from flask import session
+from flask import session, has_request_context
 import json
 from models.session_store import store_token, init_db, get_token
+from auth.token_refresh import ensure_fresh_token
+from .service_cache import get_cached_service
+from utils.stream_events import emit
+from utils.tracing import span
 
 init_db()  # ensure token DB exists
 
+# Gmail accepts up to 100 calls per batch but recommends at most 50 to avoid rate limiting
+GMAIL_BATCH_SIZE = 50
+# messages.list returns at most 500 messages per page
+GMAIL_MAX_RESULTS = 500
+SUMMARY_HEADERS = ["From", "To", "Subject", "Date"]
+
 def get_token_from_db(user_email):
     """
     Retrieves the token JSON string from the Supabase database using the imported get_token function.
@@ -22,23 +30,41 @@ def get_token_from_db(user_email):
 def get_google_service(api_name: str, api_version: str, user_email=None):
     """
     Initializes a Google API service object using session or DB token.
+    Tokens close to expiry are refreshed first; built services are reused
+    from the per-user service cache.
     """
-    token_data = session.get("google_token")
-    if not token_data and user_email:
-        # If token is not in the ephemeral session, look up the persisted token
-        token_data = get_token_from_db(user_email) # Calls the function that uses session_store.get_token()
+    with span("google.token", api=api_name):
+        # No Flask session when called from a worker thread or the async executor
+        session_token = session.get("google_token") if has_request_context() else None
+        token_data = session_token
+        if not token_data and user_email:
+            # If token is not in the ephemeral session, look up the persisted token
+            token_data = get_token_from_db(user_email) # Calls the function that uses session_store.get_token()
+
+        if not token_data:
+            return None, "Error: Google token not found. Please re-login."
 
-    if not token_data:
-        return None, "Error: Google token not found. Please re-login."
+        if user_email:
+            # Refresh ahead of expiry and persist, instead of refreshing in-band on every request
+            token_data = ensure_fresh_token(user_email, token_data)
+            if session_token and token_data is not session_token:
+                session["google_token"] = token_data
 
     try:
-        creds = Credentials.from_authorized_user_info(token_data)
-        service = build(api_name, api_version, credentials=creds)
+        with span("google.service", api=api_name):
+            service = get_cached_service(api_name, api_version, token_data, user_email)
         return service, None
     except Exception as e:
         return None, f"Error building {api_name} service: {e}"
 
 
+def _mark_store_stale(user_email):
+    """Makes the next local mailbox lookup pick up a change made through this module."""
+    if user_email:
+        from .gmail_store import mark_stale
+        mark_stale(user_email)
+
+
 def create_message(to, subject, body, cc=None, bcc=None):
     """
     Creates an email message with optional CC and BCC.
@@ -115,6 +141,8 @@ def send_draft_email(to: str, subject: str, body: str, cc: str = None, bcc: str
             bcc_list = bcc if isinstance(bcc, list) else [bcc]
             recipients += f" (BCC: {', '.join(bcc_list)})"
 
+        _mark_store_stale(user_email)
+
         from logs.log_utils import log_execution
         if user_email:
             log_execution(user_email, "GMAIL_SENT", "SUCCESS", {
@@ -139,61 +167,140 @@ def send_draft_email(to: str, subject: str, body: str, cc: str = None, bcc: str
         return {"success": False, "message": f"Failed to send email: {e}"}
 
 
+def summarize_message(msg_data: dict) -> dict:
+    """Builds the email summary dict returned by search_inbox from a metadata-format message."""
+    headers = {h["name"]: h["value"] for h in msg_data.get("payload", {}).get("headers", [])}
+
+    return {
+        "id": msg_data.get("id"),
+        "threadId": msg_data.get("threadId"),
+        "from": headers.get("From", "Unknown"),
+        "to": headers.get("To", "Unknown"),
+        "subject": headers.get("Subject", "(No Subject)"),
+        "date": headers.get("Date", "Unknown"),
+        "snippet": msg_data.get("snippet", "")
+    }
+
+
+def metadata_request(service, message_id: str):
+    return service.users().messages().get(
+        userId="me",
+        id=message_id,
+        format="metadata",
+        metadataHeaders=SUMMARY_HEADERS
+    )
+
+
+def fetch_message_summaries(service, message_ids: list) -> list:
+    """
+    Fetches header metadata for many messages with Gmail batch requests
+    (one HTTP round trip per GMAIL_BATCH_SIZE messages instead of one per message).
+
+    :param service: Gmail service object
+    :param message_ids: Message IDs, in the order the summaries should be returned
+    :return: List of email summary dicts (messages that could not be fetched are skipped)
+
+    Each summary is also emitted as an "email" stream event as soon as it arrives.
+    """
+    message_ids = list(dict.fromkeys(message_ids))
+    summaries = {}
+    failed = []
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            failed.append(request_id)
+        else:
+            summaries[request_id] = summarize_message(response)
+            emit("email", summaries[request_id])
+
+    for start in range(0, len(message_ids), GMAIL_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=on_response)
+        for message_id in message_ids[start:start + GMAIL_BATCH_SIZE]:
+            batch.add(metadata_request(service, message_id), request_id=message_id)
+        # BatchHttpRequest sends through http.request, bypassing the traced HttpRequest.execute
+        with span("google.batch", size=len(message_ids[start:start + GMAIL_BATCH_SIZE])):
+            batch.execute()
+
+    # Retry one by one whatever the batch could not fetch (e.g. per-part rate limiting)
+    for message_id in failed:
+        try:
+            summaries[message_id] = summarize_message(metadata_request(service, message_id).execute())
+            emit("email", summaries[message_id])
+        except Exception as e:
+            print(f"⚠️ Could not fetch metadata for message {message_id}: {e}")
+
+    return [summaries[message_id] for message_id in message_ids if message_id in summaries]
+
+
+def inbox_search_request(service, query: str, max_results: int):
+    """Builds (without executing) the messages.list request behind search_inbox."""
+    max_results = max(1, min(int(max_results or 10), GMAIL_MAX_RESULTS))
+    return service.users().messages().list(
+        userId="me",
+        q=query,
+        maxResults=max_results
+    )
+
+
+def inbox_search_result(query: str, email_summaries: list) -> dict:
+    """Search response for the fetched summaries (None when the query matched nothing)."""
+    if email_summaries is None:
+        return {
+            "success": True,
+            "message": f"No emails found matching: {query}",
+            "emails": []
+        }
+
+    return {
+        "success": True,
+        "message": f"Found {len(email_summaries)} email(s) matching: {query}",
+        "emails": email_summaries
+    }
+
+
+def search_local_store(user_email: str, query: str, max_results: int):
+    """
+    Answers the search from the local mailbox store when it can do so exactly.
+    Returns the summaries (each emitted as an "email" stream event), or None to search Gmail.
+    """
+    from .gmail_store import search_local
+
+    try:
+        summaries = search_local(user_email, query, max(1, min(int(max_results or 10), GMAIL_MAX_RESULTS)))
+    except Exception as e:
+        print(f"⚠️ Local Gmail store lookup failed, searching live: {e}")
+        return None
+
+    if summaries is not None:
+        for summary in summaries:
+            emit("email", summary)
+    return summaries
+
+
 def search_inbox(query: str, max_results: int = 10, user_email=None):
     """
     Search for emails in the user's inbox using a query string.
 
     :param query: Search query (e.g., "from:someone@example.com", "subject:meeting", "is:unread")
-    :param max_results: Maximum number of results to return
+    :param max_results: Maximum number of results to return (capped at GMAIL_MAX_RESULTS)
     :param user_email: Email of the user (for token retrieval)
     :return: Dictionary with success status and list of email summaries
     """
+    local_summaries = search_local_store(user_email, query, max_results)
+    if local_summaries is not None:
+        return inbox_search_result(query, local_summaries or None)
+
     service, error = get_google_service("gmail", "v1", user_email)
     if error:
         return {"success": False, "message": error}
 
     try:
-        results = service.users().messages().list(
-            userId="me",
-            q=query,
-            maxResults=max_results
-        ).execute()
-
-        messages = results.get("messages", [])
-
-        if not messages:
-            return {
-                "success": True,
-                "message": f"No emails found matching: {query}",
-                "emails": []
-            }
-
-        email_summaries = []
-        for msg in messages:
-            msg_data = service.users().messages().get(
-                userId="me",
-                id=msg["id"],
-                format="metadata",
-                metadataHeaders=["From", "To", "Subject", "Date"]
-            ).execute()
+        results = inbox_search_request(service, query, max_results).execute()
+        message_ids = [msg["id"] for msg in results.get("messages", [])]
+        if not message_ids:
+            return inbox_search_result(query, None)
 
-            headers = {h["name"]: h["value"] for h in msg_data.get("payload", {}).get("headers", [])}
-
-            email_summaries.append({
-                "id": msg["id"],
-                "threadId": msg.get("threadId"),
-                "from": headers.get("From", "Unknown"),
-                "to": headers.get("To", "Unknown"),
-                "subject": headers.get("Subject", "(No Subject)"),
-                "date": headers.get("Date", "Unknown"),
-                "snippet": msg_data.get("snippet", "")
-            })
-
-        return {
-            "success": True,
-            "message": f"Found {len(email_summaries)} email(s) matching: {query}",
-            "emails": email_summaries
-        }
+        return inbox_search_result(query, fetch_message_summaries(service, message_ids))
     except Exception as e:
         return {"success": False, "message": f"Failed to search inbox: {e}"}
 
@@ -335,6 +442,7 @@ def update_email_labels(message_id: str, add_labels: list = None, remove_labels:
             id=message_id,
             body=body
         ).execute()
+        _mark_store_stale(user_email)
 
         from logs.log_utils import log_execution
         if user_email:
@@ -413,6 +521,7 @@ def delete_email(message_id: str, permanent: bool = False, user_email=None):
         else:
             service.users().messages().trash(userId="me", id=message_id).execute()
             action = "moved to trash"
+        _mark_store_stale(user_email)
 
         from logs.log_utils import log_execution
         if user_email:
@@ -6,6 +6,29 @@ Notes are saved as Google Docs in a special "Keep Notes" folder.
 """
 from .gmail_utils import get_google_service
 from .docs_utils import create_document
+from . import drive_index
+from .drive_utils import clamp_max_results, lookup_index
+
+NOTES_FOLDER_NAME = "Keep Notes (Vocal Agent)"
+NOTE_MIME_TYPE = 'application/vnd.google-apps.document'
+
+
+def _find_notes_folder(drive_service, user_email: str = None):
+    """Returns the notes folder id, or None; looked up in the Drive index when it is ready."""
+    folder_id, ready = lookup_index(drive_index.find_folder_id, user_email, NOTES_FOLDER_NAME, not_ready=(None, False))
+    if ready:
+        return folder_id
+
+    query = f"name='{NOTES_FOLDER_NAME}' and mimeType='{drive_index.FOLDER_MIME_TYPE}' and trashed=false"
+    results = drive_service.files().list(
+        q=query,
+        spaces='drive',
+        fields='files(id, name)'
+    ).execute()
+
+    folders = results.get('files', [])
+    return folders[0]['id'] if folders else None
+
 
 def create_note(title: str, content: str, user_email: str = None):
     """
@@ -21,29 +44,20 @@ def create_note(title: str, content: str, user_email: str = None):
         return {"success": False, "message": drive_error}
 
     try:
-        folder_name = "Keep Notes (Vocal Agent)"
-
-        query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        results = drive_service.files().list(
-            q=query,
-            spaces='drive',
-            fields='files(id, name)'
-        ).execute()
+        folder_id = _find_notes_folder(drive_service, user_email)
 
-        folders = results.get('files', [])
-
-        if folders:
-            folder_id = folders[0]['id']
-        else:
+        if not folder_id:
             file_metadata = {
-                'name': folder_name,
-                'mimeType': 'application/vnd.google-apps.folder'
+                'name': NOTES_FOLDER_NAME,
+                'mimeType': drive_index.FOLDER_MIME_TYPE
             }
             folder = drive_service.files().create(
                 body=file_metadata,
-                fields='id'
+                fields='id, name, mimeType, webViewLink, modifiedTime, parents'
             ).execute()
             folder_id = folder.get('id')
+            # Visible to the next note before the index's next change sync
+            drive_index.remember_file(user_email, folder)
 
         doc_result = create_document(title, content, user_email)
 
@@ -57,6 +71,7 @@ def create_note(title: str, content: str, user_email: str = None):
             addParents=folder_id,
             fields='id, parents'
         ).execute()
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -83,32 +98,24 @@ def list_notes(max_results: int = 10, user_email: str = None):
     if error:
         return {"success": False, "message": error}
 
+    max_results = clamp_max_results(max_results)
     try:
-        folder_name = "Keep Notes (Vocal Agent)"
-
-        query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        results = drive_service.files().list(
-            q=query,
-            spaces='drive',
-            fields='files(id, name)'
-        ).execute()
-
-        folders = results.get('files', [])
+        folder_id = _find_notes_folder(drive_service, user_email)
 
-        if not folders:
+        if not folder_id:
             return {"success": False, "message": "Keep Notes folder not found. Create a note first."}
 
-        folder_id = folders[0]['id']
-
-        query = f"'{folder_id}' in parents and mimeType='application/vnd.google-apps.document' and trashed=false"
-        results = drive_service.files().list(
-            q=query,
-            pageSize=max_results,
-            fields='files(id, name, modifiedTime, webViewLink)',
-            orderBy='modifiedTime desc'
-        ).execute()
+        notes = lookup_index(drive_index.files_in_folder, user_email, folder_id, NOTE_MIME_TYPE, max_results)
+        if notes is None:
+            query = f"'{folder_id}' in parents and mimeType='{NOTE_MIME_TYPE}' and trashed=false"
+            results = drive_service.files().list(
+                q=query,
+                pageSize=max_results,
+                fields='files(id, name, modifiedTime, webViewLink)',
+                orderBy='modifiedTime desc'
+            ).execute()
 
-        notes = results.get('files', [])
+            notes = results.get('files', [])
 
         if not notes:
             return {"success": False, "message": "No notes found."}
@@ -221,6 +228,7 @@ def delete_note(note_id: str, user_email: str = None):
             fileId=note_id,
             body={'trashed': True}
         ).execute()
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -0,0 +1,108 @@
+# backend/google_services/service_cache.py
+"""
+Per-user cache of built Google API service objects.
+
+googleapiclient.discovery.build parses the whole discovery document on every
+call, so get_google_service keeps built services in a bounded LRU keyed by
+(user_email, api_name, api_version, token fingerprint). Entries expire with the
+access token and are dropped whenever session_store stores or deletes the
+user's token.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+import httplib2
+import google_auth_httplib2
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+
+from models.session_store import add_token_listener
+from utils.cache import LRUTTLCache, MISSING
+from utils.tracing import span
+
+SERVICE_CACHE_SIZE = int(os.getenv("SERVICE_CACHE_SIZE", "128"))
+SERVICE_CACHE_TTL = int(os.getenv("SERVICE_CACHE_TTL", "3000"))  # seconds
+
+# Stop serving a cached service this many seconds before its token expires
+EXPIRY_MARGIN_SECONDS = 60
+
+_service_cache = LRUTTLCache(max_size=SERVICE_CACHE_SIZE, default_ttl=SERVICE_CACHE_TTL)
+
+
+def token_fingerprint(token_data: dict) -> str:
+    """Short stable hash of a token dict, so a new token never reuses an old service."""
+    raw = json.dumps(token_data, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _ttl_for(creds: Credentials) -> float:
+    """Cache lifetime for a service: the default TTL, capped by the access token's expiry."""
+    if not creds.expiry:
+        return SERVICE_CACHE_TTL
+
+    # google-auth keeps expiry as a naive UTC datetime
+    remaining = (creds.expiry - datetime.utcnow()).total_seconds() - EXPIRY_MARGIN_SECONDS
+    return min(SERVICE_CACHE_TTL, remaining)
+
+
+class TracedHttpRequest(HttpRequest):
+    """HttpRequest whose execute() is recorded as a google.execute span of the current trace."""
+
+    def execute(self, *args, **kwargs):
+        with span("google.execute", method=self.methodId):
+            return super().execute(*args, **kwargs)
+
+
+def _request_builder(creds: Credentials):
+    """
+    Builds HttpRequests on a per-thread AuthorizedHttp.
+
+    httplib2.Http is not thread-safe, so a service shared through the cache must
+    not hand the same connection to two threads. Each thread keeps its own
+    keep-alive connection for this service instead.
+    """
+    local = threading.local()
+
+    def build_request(http, *args, **kwargs):
+        thread_http = getattr(local, "http", None)
+        if thread_http is None:
+            thread_http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+            local.http = thread_http
+        return TracedHttpRequest(thread_http, *args, **kwargs)
+
+    return build_request
+
+
+def get_cached_service(api_name: str, api_version: str, token_data: dict, user_email: str = None):
+    """
+    Returns a Google API service for the token, building it only on a cache miss.
+    Raises whatever Credentials/build raise for an unusable token.
+    """
+    key = (user_email, api_name, api_version, token_fingerprint(token_data))
+
+    service = _service_cache.get(key)
+    if service is not MISSING:
+        return service
+
+    creds = Credentials.from_authorized_user_info(token_data)
+    with span("google.build", api=api_name):
+        service = build(api_name, api_version, credentials=creds, requestBuilder=_request_builder(creds))
+    _service_cache.set(key, service, ttl=_ttl_for(creds))
+    return service
+
+
+def invalidate_user_services(user_email: str) -> int:
+    """Drops every cached service built for user_email. Returns the number removed."""
+    return _service_cache.invalidate(lambda key: key[0] == user_email)
+
+
+def get_service_cache_stats() -> dict:
+    return _service_cache.stats()
+
+
+# Rebuild services whenever the stored token changes
+add_token_listener(invalidate_user_services)
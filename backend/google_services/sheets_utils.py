@@ -1,5 +1,6 @@
 # backend/google_services/sheets_utils.py
 from .gmail_utils import get_google_service
+from . import drive_index
 
 def create_spreadsheet(title: str, user_email: str = None):
     """
@@ -26,6 +27,7 @@ def create_spreadsheet(title: str, user_email: str = None):
 
         sheet_id = spreadsheet.get('spreadsheetId')
         sheet_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit"
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -66,6 +68,7 @@ def add_row_to_sheet(sheet_id: str, range_name: str, values: list, user_email: s
         ).execute()
 
         sheet_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit"
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -146,6 +149,7 @@ def update_sheet_cell(sheet_id: str, range_name: str, value: str, user_email: st
         ).execute()
 
         sheet_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit"
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -188,6 +192,7 @@ def bulk_update_rows(sheet_id: str, range_name: str, values: list, user_email: s
         ).execute()
 
         sheet_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit"
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
@@ -219,6 +224,7 @@ def delete_spreadsheet(sheet_id: str, user_email: str = None):
 
     try:
         service.files().delete(fileId=sheet_id).execute()
+        drive_index.mark_stale(user_email)
 
         return {
             "success": True,
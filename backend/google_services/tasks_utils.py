@@ -74,6 +74,36 @@ def create_task(title: str, notes: str = "", due_date: str = None, tasklist_id:
         return {"success": False, "message": f"Failed to create task: {e}"}
 
 
+def list_tasks_request(service, tasklist_id: str, max_results: int):
+    """Builds (without executing) the tasks.list request behind list_tasks."""
+    return service.tasks().list(
+        tasklist=tasklist_id,
+        maxResults=max_results
+    )
+
+
+def list_tasks_result(results: dict) -> dict:
+    """Formats a tasks.list response as the list_tasks result."""
+    tasks = results.get('items', [])
+
+    if not tasks:
+        return {"success": False, "message": "No tasks found in this list."}
+
+    task_data = [{
+        "id": task['id'],
+        "title": task['title'],
+        "status": task.get('status', 'needsAction'),
+        "notes": task.get('notes', ''),
+        "due": task.get('due', 'No due date')
+    } for task in tasks]
+
+    return {
+        "success": True,
+        "message": f"Found {len(task_data)} tasks.",
+        "details": task_data
+    }
+
+
 def list_tasks(tasklist_id: str = "@default", max_results: int = 10, user_email: str = None):
     """
     Lists tasks from a specific task list.
@@ -87,29 +117,7 @@ def list_tasks(tasklist_id: str = "@default", max_results: int = 10, user_email:
         return {"success": False, "message": error}
 
     try:
-        results = service.tasks().list(
-            tasklist=tasklist_id,
-            maxResults=max_results
-        ).execute()
-
-        tasks = results.get('items', [])
-
-        if not tasks:
-            return {"success": False, "message": "No tasks found in this list."}
-
-        task_data = [{
-            "id": task['id'],
-            "title": task['title'],
-            "status": task.get('status', 'needsAction'),
-            "notes": task.get('notes', ''),
-            "due": task.get('due', 'No due date')
-        } for task in tasks]
-
-        return {
-            "success": True,
-            "message": f"Found {len(task_data)} tasks.",
-            "details": task_data
-        }
+        return list_tasks_result(list_tasks_request(service, tasklist_id, max_results).execute())
 
     except Exception as e:
         return {"success": False, "message": f"Failed to list tasks: {e}"}
@@ -0,0 +1,147 @@
+# backend/logs/log_retention.py
+"""
+Retention for logs.db.
+
+Rows older than LOG_RETENTION_DAYS are moved into gzip-compressed JSONL files,
+one per day (archive/logs-YYYY-MM-DD.jsonl.gz), and deleted from the table.
+The freed pages are returned to the filesystem with incremental VACUUM.
+run_retention_if_due is called by the log writer thread between batches, or,
+with LOG_SYNC_MODE=1 (no writer thread), after inline writes, in a background
+thread so the request that triggered it is not delayed.
+"""
+import datetime
+import gzip
+import json
+import os
+import threading
+import time
+
+from . import log_utils
+
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "30"))
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", os.path.join(os.path.dirname(__file__), "archive"))
+# Seconds between retention runs
+LOG_RETENTION_INTERVAL = int(os.getenv("LOG_RETENTION_INTERVAL", "21600"))
+# Rows moved per transaction, and pages released per incremental VACUUM
+ARCHIVE_BATCH_SIZE = 5000
+VACUUM_PAGES = 2000
+
+_last_run = None
+_run_lock = threading.Lock()  # one retention run at a time
+_stats = {"runs": 0, "archived": 0, "vacuumed_pages": 0, "errors": 0}
+
+
+def _archive_path(day: str) -> str:
+    return os.path.join(LOG_ARCHIVE_DIR, f"logs-{day}.jsonl.gz")
+
+
+def _write_archive(rows: list):
+    """Appends rows to their day's archive (each append adds a gzip member, which gzip readers concatenate)."""
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(row[1][:10], []).append(row)
+
+    os.makedirs(LOG_ARCHIVE_DIR, exist_ok=True)
+    for day, day_rows in by_day.items():
+        with gzip.open(_archive_path(day), "at", encoding="utf-8") as archive:
+            for row in day_rows:
+                archive.write(json.dumps({
+                    "id": row[0],
+                    "timestamp": row[1],
+                    "user_email": row[2],
+                    "action": row[3],
+                    "status": row[4],
+                    "details": json.loads(row[5]) if row[5] else {}
+                }) + "\n")
+
+
+def archive_old_logs(retention_days: int = None) -> int:
+    """
+    Moves logs older than retention_days (default LOG_RETENTION_DAYS) to the daily archives.
+
+    :return: Number of rows archived
+    """
+    retention_days = LOG_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = (datetime.datetime.now() - datetime.timedelta(days=retention_days)).isoformat()
+
+    archived = 0
+    while True:
+        with log_utils._db_lock:
+            rows = log_utils._get_conn().execute("""
+                SELECT id, timestamp, user_email, action, status, details
+                FROM logs
+                WHERE timestamp < ?
+                ORDER BY id
+                LIMIT ?
+            """, (cutoff, ARCHIVE_BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+
+        # Archive first: a crash before the delete duplicates rows in the archive instead of losing them
+        _write_archive(rows)
+        with log_utils._db_lock:
+            conn = log_utils._get_conn()
+            with conn:
+                conn.executemany("DELETE FROM logs WHERE id = ?", [(row[0],) for row in rows])
+        archived += len(rows)
+
+    if archived:
+        print(f"🗄️ Archived {archived} log(s) older than {retention_days} days to {LOG_ARCHIVE_DIR}")
+    return archived
+
+
+def incremental_vacuum(pages: int = VACUUM_PAGES) -> int:
+    """
+    Releases up to pages free pages back to the filesystem.
+
+    :return: Number of pages released
+    """
+    with log_utils._db_lock:
+        conn = log_utils._get_conn()
+        free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # execute() would step the pragma once (one page); executescript runs it to completion
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return free_before - free_after
+
+
+def run_retention():
+    """Archives expired rows, then compacts the database file."""
+    global _last_run
+    _last_run = time.monotonic()
+    try:
+        _stats["archived"] += archive_old_logs()
+        _stats["vacuumed_pages"] += incremental_vacuum()
+        _stats["runs"] += 1
+    except Exception as e:
+        _stats["errors"] += 1
+        print(f"Error during log retention: {e}")
+
+
+def _run_and_release():
+    try:
+        run_retention()
+    finally:
+        _run_lock.release()
+
+
+def run_retention_if_due(background: bool = False):
+    """
+    Runs retention if LOG_RETENTION_INTERVAL has passed since the last run (or it never ran)
+    and no other run is in progress.
+
+    :param background: Run it in a daemon thread instead of on the caller's thread
+    """
+    if _last_run is not None and time.monotonic() - _last_run < LOG_RETENTION_INTERVAL:
+        return
+    if not _run_lock.acquire(blocking=False):
+        return
+
+    if background:
+        threading.Thread(target=_run_and_release, name="log-retention", daemon=True).start()
+    else:
+        _run_and_release()
+
+
+def get_retention_stats() -> dict:
+    return dict(_stats, retention_days=LOG_RETENTION_DAYS)
@@ -1,21 +1,68 @@
 # backend/logs/log_utils.py
+import atexit
 import datetime
 import json
+import queue
 import sqlite3
 import os
+import threading
 from threading import Lock
 
+from utils.tracing import traced
+
 # SQLite3 database path
 DB_PATH = os.path.join(os.path.dirname(__file__), "logs.db")
 
+# Maximum events waiting for the writer; beyond this log_execution writes inline
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Maximum events committed in one transaction
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+# Serialized details larger than this are truncated on write (0 disables the cap)
+LOG_DETAILS_MAX_BYTES = int(os.getenv("LOG_DETAILS_MAX_BYTES", "16384"))
+# How long the idle writer waits before checking whether retention is due
+RETENTION_CHECK_SECONDS = 60
+# Default and maximum page sizes for get_logs
+LOGS_PAGE_SIZE = 50
+LOGS_MAX_PAGE_SIZE = 200
+# Write every event inline instead of through the background writer (tests, scripts)
+LOG_SYNC_MODE = os.getenv("LOG_SYNC_MODE", "0") == "1"
+
 # Thread-safe lock for database operations
 _db_lock = Lock()
 
+# Long-lived writer connection, reopened after a fork
+_conn = None
+_conn_pid = None
+
+_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_writer_thread = None
+_writer_guard = Lock()
+
+_stats = {"written": 0, "batches": 0, "inline_writes": 0, "errors": 0}
+
+
+def _get_conn():
+    """Returns the shared WAL-mode connection (callers hold _db_lock)."""
+    global _conn, _conn_pid
+    if _conn is None or _conn_pid != os.getpid():
+        _conn = sqlite3.connect(DB_PATH, timeout=10, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        # WAL stays consistent with NORMAL; only the last commits can be lost on power failure
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn_pid = os.getpid()
+    return _conn
+
+
 def init_log_db():
     """Initializes SQLite3 database for logs storage."""
     with _db_lock:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _get_conn()
         cursor = conn.cursor()
+        # Let log retention return freed pages with incremental VACUUM;
+        # the VACUUM applies the mode to a database created without it (one time)
+        if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            cursor.execute("VACUUM")
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS logs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -26,13 +73,107 @@ def init_log_db():
                 details TEXT NOT NULL
             )
         """)
+        # Serves the per-user, newest-first pages read by get_logs
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_user_id ON logs (user_email, id)")
         conn.commit()
-        conn.close()
         print(f"SQLite3 logs storage initialized at {DB_PATH}")
 
+
+def set_sync_mode(enabled: bool):
+    """Switches between inline writes (True) and the background writer (False)."""
+    global LOG_SYNC_MODE
+    if enabled:
+        flush_logs()
+    LOG_SYNC_MODE = enabled
+
+
+def _write_rows(rows: list):
+    """Inserts rows in a single transaction."""
+    try:
+        with _db_lock:
+            conn = _get_conn()
+            with conn:
+                conn.executemany("""
+                    INSERT INTO logs (timestamp, user_email, action, status, details)
+                    VALUES (?, ?, ?, ?, ?)
+                """, rows)
+        _stats["written"] += len(rows)
+        _stats["batches"] += 1
+    except Exception as e:
+        _stats["errors"] += 1
+        print(f"Error writing {len(rows)} log(s): {e}")
+
+
+def _cap_details(serialized: str) -> str:
+    """Replaces details over LOG_DETAILS_MAX_BYTES with a truncated preview."""
+    size = len(serialized.encode("utf-8"))
+    if not LOG_DETAILS_MAX_BYTES or size <= LOG_DETAILS_MAX_BYTES:
+        return serialized
+    return json.dumps({
+        "truncated": True,
+        "original_bytes": size,
+        "preview": serialized.encode("utf-8")[:LOG_DETAILS_MAX_BYTES].decode("utf-8", "ignore")
+    })
+
+
+def _writer_loop():
+    from logs.log_retention import run_retention_if_due
+
+    while True:
+        # Retention runs on this thread between batches, so it never races another writer
+        run_retention_if_due()
+        try:
+            batch = [_queue.get(timeout=RETENTION_CHECK_SECONDS)]
+        except queue.Empty:
+            continue
+        while len(batch) < LOG_BATCH_SIZE:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # Flush markers (threading.Event) are released once the rows queued before them are written
+        rows = [item for item in batch if isinstance(item, tuple)]
+        if rows:
+            _write_rows(rows)
+        for item in batch:
+            if isinstance(item, threading.Event):
+                item.set()
+
+
+def _start_writer():
+    """Starts the writer thread once per process (lazily, so it survives gunicorn forks)."""
+    global _writer_thread
+    if _writer_thread is not None and _writer_thread.is_alive():
+        return
+    with _writer_guard:
+        if _writer_thread is not None and _writer_thread.is_alive():
+            return
+        _writer_thread = threading.Thread(target=_writer_loop, name="log-writer", daemon=True)
+        _writer_thread.start()
+
+
+def flush_logs(timeout: float = 5.0) -> bool:
+    """
+    Blocks until every event queued so far has been written.
+    :return: False if the writer did not catch up within timeout
+    """
+    if _writer_thread is None or not _writer_thread.is_alive():
+        return True
+    marker = threading.Event()
+    try:
+        _queue.put(marker, timeout=timeout)
+    except queue.Full:
+        return False
+    return marker.wait(timeout)
+
+
+@traced("log")
 def log_execution(user_email: str, action: str, status: str, details: dict):
     """
     Records an agent execution event into SQLite3.
+    Events are queued and committed in batches by a background writer;
+    if the queue is full (or sync mode is on) the event is written inline.
 
     :param user_email: The email of the user who triggered the action.
     :param action: The high-level action being performed (e.g., GMAIL_SEND).
@@ -40,56 +181,105 @@ def log_execution(user_email: str, action: str, status: str, details: dict):
     :param details: Dictionary containing execution results or parameters.
     """
     try:
-        with _db_lock:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO logs (timestamp, user_email, action, status, details)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                datetime.datetime.now().isoformat(),
-                user_email,
-                action,
-                status,
-                json.dumps(details)
-            ))
-            conn.commit()
-            conn.close()
-            print(f"Log recorded: {action} - {status}")
+        row = (
+            datetime.datetime.now().isoformat(),
+            user_email,
+            action,
+            status,
+            _cap_details(json.dumps(details))
+        )
     except Exception as e:
         print(f"Error writing log: {e}")
+        return
+
+    if LOG_SYNC_MODE:
+        _write_rows([row])
+        # There is no writer thread to run retention in sync mode
+        from logs.log_retention import run_retention_if_due
+        run_retention_if_due(background=True)
+    else:
+        _start_writer()
+        try:
+            _queue.put_nowait(row)
+        except queue.Full:
+            # Apply backpressure by writing inline rather than dropping the event
+            _stats["inline_writes"] += 1
+            _write_rows([row])
+    print(f"Log recorded: {action} - {status}")
+
+
+def get_log_writer_stats() -> dict:
+    return dict(_stats, queued=_queue.qsize(), sync_mode=LOG_SYNC_MODE)
+
 
-def get_logs(user_email: str):
+def get_logs(user_email: str, limit: int = LOGS_PAGE_SIZE, before_id: int = None,
+             action: str = None, status: str = None, include_details: bool = True):
     """
-    Retrieves all execution logs for a specific user, ordered by newest first.
+    Retrieves one page of execution logs for a specific user, newest first.
 
     :param user_email: The email of the user to fetch logs for.
-    :return: A list of log dictionaries with id, timestamp, user_email, action, status, details.
+    :param limit: Page size (capped at LOGS_MAX_PAGE_SIZE).
+    :param before_id: Cursor; only logs with a smaller id are returned.
+    :param action: Only logs for this action (e.g., GMAIL_SEND).
+    :param status: Only logs with this status (e.g., FAILED).
+    :param include_details: Decode and return the details payloads (False skips reading them).
+    :return: Dictionary with "logs" (dicts with id, timestamp, user_email, action, status, details)
+             and "next_before_id", the cursor for the next page or None on the last page.
     """
+    limit = max(1, min(int(limit or LOGS_PAGE_SIZE), LOGS_MAX_PAGE_SIZE))
+
+    conditions = ["user_email = ?"]
+    args = [user_email]
+    if before_id is not None:
+        conditions.append("id < ?")
+        args.append(int(before_id))
+    if action:
+        conditions.append("action = ?")
+        args.append(action)
+    if status:
+        conditions.append("status = ?")
+        args.append(status)
+
+    columns = "id, timestamp, user_email, action, status" + (", details" if include_details else "")
+
+    # Make events queued by this request visible
+    flush_logs()
     try:
-        with _db_lock:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, timestamp, user_email, action, status, details
-                FROM logs
-                WHERE user_email = ?
-                ORDER BY timestamp DESC
-            """, (user_email,))
-            rows = cursor.fetchall()
-            conn.close()
-
-            logs = []
-            for row in rows:
-                logs.append({
-                    "id": row[0],
-                    "timestamp": row[1],
-                    "user_email": row[2],
-                    "action": row[3],
-                    "status": row[4],
-                    "details": json.loads(row[5]) if row[5] else {}
-                })
-            return logs
+        # WAL lets this read run alongside the writer, so it does not take _db_lock
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        # One extra row tells whether another page exists
+        cursor.execute(f"""
+            SELECT {columns}
+            FROM logs
+            WHERE {" AND ".join(conditions)}
+            ORDER BY id DESC
+            LIMIT ?
+        """, args + [limit + 1])
+        rows = cursor.fetchall()
+        conn.close()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        logs = []
+        for row in rows:
+            log = {
+                "id": row[0],
+                "timestamp": row[1],
+                "user_email": row[2],
+                "action": row[3],
+                "status": row[4]
+            }
+            if include_details:
+                log["details"] = json.loads(row[5]) if row[5] else {}
+            logs.append(log)
+
+        return {"logs": logs, "next_before_id": logs[-1]["id"] if has_more else None}
     except Exception as e:
         print(f"Error retrieving logs for {user_email}: {e}")
-        return []
+        return {"logs": [], "next_before_id": None}
+
+
+# Write out queued events on interpreter shutdown
+atexit.register(flush_logs)
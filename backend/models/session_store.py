@@ -3,6 +3,8 @@ import json
 import os
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from utils.cache import LRUTTLCache, MISSING
+from utils.local_store import UserLocks
 
 load_dotenv()
 
@@ -17,13 +19,40 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 print(f"✅ Supabase client initialized successfully with service role")
 
+# In-process token cache: hits skip the Supabase round trip entirely.
+# Unknown users are cached as None for a shorter window (negative caching).
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))  # seconds
+TOKEN_NEGATIVE_CACHE_TTL = int(os.getenv("TOKEN_NEGATIVE_CACHE_TTL", "30"))  # seconds
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+
+_token_cache = LRUTTLCache(max_size=TOKEN_CACHE_SIZE, default_ttl=TOKEN_CACHE_TTL)
+
+# Per-user locks so concurrent cache misses trigger a single Supabase fetch
+_fetch_locks = UserLocks()
+
+# Callbacks notified with a user's email whenever their stored token changes
+_token_listeners = []
+
+
+def add_token_listener(callback):
+    """Registers callback(email) to run after store_token/delete_token for that user."""
+    if callback not in _token_listeners:
+        _token_listeners.append(callback)
+
+def _notify_token_listeners(email: str):
+    for callback in list(_token_listeners):
+        try:
+            callback(email)
+        except Exception as e:
+            print(f"⚠️ Token listener failed for {email}: {e}")
+
 
 def init_db():
     """No-op for backward compatibility. Supabase table already exists."""
     print("Using Supabase for token storage (oauth_tokens table)")
 
 def store_token(email: str, token_json: str):
-    """Store or update a user's token in Supabase."""
+    """Store or update a user's token in Supabase (write-through to the token cache)."""
     try:
         print(f"💾 Attempting to store token for: {email}")
 
@@ -38,6 +67,7 @@ def store_token(email: str, token_json: str):
         }).execute()
 
         print(f"✅ Token stored/updated in Supabase for {email} (ID: {result.data})")
+        _token_cache.set(email, json.dumps(token_data))
 
     except Exception as e:
         # Fallback to PostgREST API if RPC fails
@@ -56,70 +86,86 @@ def store_token(email: str, token_json: str):
                     "token_json": token_data
                 }).execute()
                 print(f"✅ Token stored via PostgREST for {email}")
+            _token_cache.set(email, json.dumps(token_data))
         except Exception as fallback_error:
             print(f"❌ Error storing token in Supabase for {email}: {fallback_error}")
+            _token_cache.pop(email)
             import traceback
             traceback.print_exc()
 
-def get_token(email: str):
-    """Fetch token JSON string for a given user email from Supabase."""
+    _notify_token_listeners(email)
+
+def _normalize_token(token_json):
+    """Token column may come back as a dict or a JSON string; always return a string."""
+    if isinstance(token_json, dict):
+        return json.dumps(token_json)
+    if isinstance(token_json, str):
+        return token_json
+    print(f"❌ Unexpected token format: {type(token_json)}")
+    return None
+
+def _fetch_token_from_supabase(email: str):
+    """
+    Reads the token from Supabase. Returns None when the user has no token;
+    raises if Supabase could not be queried at all.
+    """
+    # Use database function to bypass schema cache issues
     try:
-        print(f"🔍 Attempting to retrieve token for: {email}")
+        result = supabase.rpc('get_oauth_token', {
+            'p_email': email
+        }).execute()
 
-        # Use database function to bypass schema cache issues
-        try:
-            result = supabase.rpc('get_oauth_token', {
-                'p_email': email
-            }).execute()
-
-            token_json = result.data
-
-            if token_json:
-                print(f"✅ Token retrieved via RPC from Supabase for {email}")
-                if isinstance(token_json, dict):
-                    return json.dumps(token_json)
-                elif isinstance(token_json, str):
-                    return token_json
-                else:
-                    print(f"❌ Unexpected token format: {type(token_json)}")
-                    return None
-            else:
-                print(f"⚠️ No token found in Supabase for {email}")
-                return None
+        if result.data:
+            print(f"✅ Token retrieved via RPC from Supabase for {email}")
+            return _normalize_token(result.data)
 
-        except Exception as rpc_error:
-            print(f"⚠️ RPC method failed, trying PostgREST API: {rpc_error}")
+        print(f"⚠️ No token found in Supabase for {email}")
+        return None
 
-        # Fallback to PostgREST API
-        result = supabase.table("oauth_tokens").select("token_json").eq("user_email", email).execute()
+    except Exception as rpc_error:
+        print(f"⚠️ RPC method failed, trying PostgREST API: {rpc_error}")
 
-        print(f"🔍 Supabase query executed. Has data: {bool(result.data)}")
+    # Fallback to PostgREST API
+    result = supabase.table("oauth_tokens").select("token_json").eq("user_email", email).execute()
 
-        if result.data and len(result.data) > 0:
-            print(f"✅ Token retrieved from Supabase for {email}")
-            token_json = result.data[0].get("token_json")
+    if result.data and len(result.data) > 0:
+        print(f"✅ Token retrieved from Supabase for {email}")
+        return _normalize_token(result.data[0].get("token_json"))
 
-            if isinstance(token_json, dict):
-                print(f"✅ Token is dict, converting to JSON string")
-                return json.dumps(token_json)
-            elif isinstance(token_json, str):
-                print(f"✅ Token is string, returning as-is")
-                return token_json
-            else:
-                print(f"❌ Unexpected token format: {type(token_json)}")
-                return None
+    print(f"⚠️ No token found in Supabase for {email}")
+    return None
 
-        print(f"⚠️ No token found in Supabase for {email}")
-        return None
+def get_token(email: str):
+    """Fetch token JSON string for a given user email (token cache first, then Supabase)."""
+    token_json = _token_cache.get(email)
+    if token_json is not MISSING:
+        return token_json
 
-    except Exception as e:
-        print(f"❌ Error retrieving token from Supabase for {email}: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+    with _fetch_locks.hold(email):
+        # Another thread may have fetched it while we waited for the lock
+        token_json = _token_cache.get(email)
+        if token_json is not MISSING:
+            return token_json
+
+        try:
+            token_json = _fetch_token_from_supabase(email)
+        except Exception as e:
+            # Don't cache failures: the next call should retry Supabase
+            print(f"❌ Error retrieving token from Supabase for {email}: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+        ttl = TOKEN_CACHE_TTL if token_json else TOKEN_NEGATIVE_CACHE_TTL
+        _token_cache.set(email, token_json, ttl=ttl)
+        return token_json
+
+def get_token_cache_stats() -> dict:
+    return _token_cache.stats()
 
 def delete_token(email: str):
-    """Delete token for a given user email from Supabase."""
+    """Delete token for a given user email from Supabase and the token cache."""
+    _token_cache.pop(email)
     try:
         # Use database function to bypass schema cache issues
         result = supabase.rpc('delete_oauth_token', {
@@ -135,3 +181,6 @@ def delete_token(email: str):
         print(f"❌ Error deleting token from Supabase for {email}: {e}")
         import traceback
         traceback.print_exc()
+
+    _notify_token_listeners(email)
+
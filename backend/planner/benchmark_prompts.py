@@ -0,0 +1,94 @@
+# backend/planner/benchmark_prompts.py
+"""
+Compares the tiered planner prompts with the full prompt.
+
+    python -m planner.benchmark_prompts                # preamble sizes only (no API calls)
+    python -m planner.benchmark_prompts --live --runs 3
+
+Offline, token counts are estimated (~4 characters per token). With --live,
+tokens are counted with Cohere's tokenizer and each request is planned with
+both preambles, reporting time to first token and total latency.
+"""
+import argparse
+import statistics
+import time
+
+from utils import llm_client
+from planner.prompt_templates import PLANNER_SYSTEM_PROMPT, select_planner_prompt
+
+SAMPLE_REQUESTS = [
+    "hi",
+    "Send email to Jubi saying I can't attend class tomorrow",
+    "Show me unread emails",
+    "Search my inbox for emails from john",
+    "Schedule a team meeting for tomorrow at 9 AM",
+    "Delete the event Daily Sync",
+    "What is Swara's email?",
+    "Search my drive for Devops Report",
+    "Remind me to submit the report on Friday",
+    "Add a row with Rent, 12000 to my budget sheet",
+    "Append meeting notes to my project doc",
+    "Show my unread emails and today's events and my tasks",
+]
+
+
+def _count_tokens(text: str, live: bool) -> int:
+    if not live:
+        return round(len(text) / 4)
+    return len(llm_client.get_client().tokenize(text=text, model=llm_client.COHERE_MODEL).tokens)
+
+
+def _time_plan(user_input: str, preamble: str):
+    """Returns (seconds to first token, total seconds) for one streamed planner call."""
+    started = time.perf_counter()
+    first_token = None
+    for _ in llm_client.chat_stream(
+        message=f"User request: {user_input}\n\nRespond with ONLY valid JSON:",
+        preamble=preamble,
+        max_tokens=800,
+        temperature=0.2,
+        timeout=20,
+    ):
+        if first_token is None:
+            first_token = time.perf_counter() - started
+    total = time.perf_counter() - started
+    return (first_token if first_token is not None else total), total
+
+
+def run_benchmark(live: bool = False, runs: int = 1):
+    full_tokens = _count_tokens(PLANNER_SYSTEM_PROMPT, live)
+    unit = "tokens" if live else "~tokens"
+    print(f"Full prompt: {len(PLANNER_SYSTEM_PROMPT)} chars, {full_tokens} {unit}\n")
+
+    savings = []
+    timings = {"full": {"ttft": [], "total": []}, "tiered": {"ttft": [], "total": []}}
+    for user_input in SAMPLE_REQUESTS:
+        preamble, domains = select_planner_prompt(user_input)
+        tokens = full_tokens if preamble is PLANNER_SYSTEM_PROMPT else _count_tokens(preamble, live)
+        savings.append(1 - tokens / full_tokens)
+        print(f"{user_input[:55]:<55} {'+'.join(domains):<32} {tokens:>6} {unit} ({savings[-1]:.0%} smaller)")
+
+        if live:
+            for _ in range(runs):
+                for tier, prompt in (("full", PLANNER_SYSTEM_PROMPT), ("tiered", preamble)):
+                    ttft, total = _time_plan(user_input, prompt)
+                    timings[tier]["ttft"].append(ttft)
+                    timings[tier]["total"].append(total)
+
+    print(f"\nMean preamble reduction: {statistics.mean(savings):.0%}")
+
+    if live:
+        for tier, samples in timings.items():
+            print(
+                f"{tier:<7} time to first token: median {statistics.median(samples['ttft']) * 1000:.0f} ms, "
+                f"total: median {statistics.median(samples['total']) * 1000:.0f} ms "
+                f"({len(samples['total'])} calls)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare tiered and full planner prompts")
+    parser.add_argument("--live", action="store_true", help="Call Cohere to count tokens and time planner calls")
+    parser.add_argument("--runs", type=int, default=1, help="Timed calls per request and prompt (with --live)")
+    args = parser.parse_args()
+    run_benchmark(live=args.live, runs=args.runs)
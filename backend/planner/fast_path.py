@@ -0,0 +1,179 @@
+# backend/planner/fast_path.py
+"""
+Rule-based pre-planner.
+
+Unambiguous prompts ("show me unread emails", "list my tasks", "hi") are turned
+into the same JSON plans the LLM would return, skipping the 1-3 s Cohere call.
+Anything the rules are not confident about returns None and goes to run_planner.
+"""
+import re
+from threading import Lock
+from utils.intent_classifier import classify_intent_heuristic
+
+# Plans below this confidence fall through to the LLM planner
+FAST_PATH_MIN_CONFIDENCE = 0.9
+
+# Words that signal a write action or a second request; never fast-path these
+MUTATION_WORDS = re.compile(
+    r'\b(send|compose|draft|reply|forward|create|add|book|set up|remind|'
+    r'delete|remove|cancel|trash|archive|star|mark|complete|finish|update|edit|change|'
+    r'modify|rename|move|reschedule|upload|share)\b'
+)
+COMPOUND_WORDS = re.compile(r'\b(and|then|also|after that)\b|[,;]')
+
+GREETING_REPLIES = [
+    (re.compile(r'^(hi|hello|hey|hey there|hi there|hello there|howdy|greetings|good (morning|afternoon|evening))( agent)?$'),
+     "Hello! How can I help you today?"),
+    (re.compile(r'^(how are you|how are you doing|how r u|what\'?s up|whats up|sup)( agent| today)?$'),
+     "I'm doing well, thanks for asking! How can I help you today?"),
+    (re.compile(r'^(thanks|thank you|thanks a lot|thank you so much|thx|ty)( agent)?$'),
+     "You're welcome! Anything else I can help with?"),
+    (re.compile(r'^(bye|goodbye|see you|see ya|good night)( agent)?$'),
+     "Goodbye! Have a great day."),
+]
+
+LEAD_IN = r'^(hey agent |ok agent |agent |please |can you |could you |hey )?'
+READ_VERB = r'(show|list|get|check|read|display|see|view|open|tell me|give me|what are|what\'?s|whats|any)'
+COUNT = r'(?:(?:last|latest|recent|top|first|next)\s+)?(?P<count>\d{1,3})?'
+
+UNREAD_PATTERN = re.compile(
+    LEAD_IN + r'(' + READ_VERB + r'\s+)?(me\s+)?(all\s+)?(my\s+)?' + COUNT +
+    r'\s*(new\s+)?unread\s+(e-?mails?|mails?|messages?|inbox)( in my inbox)?( please)?$'
+)
+UNREAD_SHORT_PATTERN = re.compile(r'^(do i have )?(any )?unread (e-?mails?|mails?|messages?)\??$')
+
+CALENDAR_LIST_PATTERN = re.compile(
+    LEAD_IN + r'(' + READ_VERB + r'\s+)?(me\s+)?(all\s+)?(my\s+)?' + COUNT +
+    r'\s*(upcoming\s+|next\s+)?(events?|meetings?|calendar events?|appointments?|schedule)( on my calendar)?( please)?$'
+)
+CALENDAR_ON_PATTERN = re.compile(r'^what\'?s on my (calendar|schedule)$')
+
+TASKS_LIST_PATTERN = re.compile(
+    LEAD_IN + r'(' + READ_VERB + r'\s+)?(me\s+)?(all\s+)?(my\s+)?' + COUNT +
+    r'\s*(pending\s+|open\s+)?(tasks?|to-?dos?|todo list)( please)?$'
+)
+
+DRIVE_FOR_PATTERN = re.compile(
+    LEAD_IN + r'(search|find|look (for|up)|look through)\s+(in\s+)?(my\s+)?(google\s+)?drive\s+(for|to find)\s+(?P<term>.+)$'
+)
+DRIVE_IN_PATTERN = re.compile(
+    LEAD_IN + r'(search|find|look for|look up)\s+(?P<term>.+?)\s+(in|on|from)\s+(my\s+)?(google\s+)?drive$'
+)
+
+# Generic nouns dropped from drive search terms ("Swara's documents" -> "Swara")
+DRIVE_TERM_NOISE = re.compile(r'\b(documents?|docs?|files?|folders?|stuff|things)\b')
+
+_stats_lock = Lock()
+_latency_stats = {}
+
+
+def _normalize(prompt: str) -> str:
+    text = re.sub(r'\s+', ' ', prompt.lower()).strip()
+    return text.strip(" .!?")
+
+
+def _count(match) -> int:
+    count = match.group('count')
+    return min(int(count), 50) if count else 10
+
+
+def extract_drive_term(raw_term: str) -> str:
+    """Reduces a spoken drive query to its key term (rule 7 of the planner prompt)."""
+    term = raw_term.strip(" '\"")
+    term = re.sub(r"'s\b", "", term)
+    term = re.sub(r'^(the|my|a|an|all)\s+', '', term, flags=re.IGNORECASE)
+    term = re.sub(r'\b(named|called|titled)\b', '', term, flags=re.IGNORECASE)
+    stripped = DRIVE_TERM_NOISE.sub('', term.lower())
+    if stripped.strip():
+        # Keep the user's original casing for the remaining words
+        kept = [w for w in term.split() if not DRIVE_TERM_NOISE.fullmatch(w.lower())]
+        term = " ".join(kept)
+    return re.sub(r'\s+', ' ', term).strip(" '\"")
+
+
+def _match_small_talk(text: str):
+    for pattern, reply in GREETING_REPLIES:
+        if pattern.match(text):
+            return {"action": "SMALL_TALK", "response": reply}, 0.97
+    return None, 0
+
+
+def _match_read_intent(text: str):
+    match = UNREAD_PATTERN.match(text) or UNREAD_SHORT_PATTERN.match(text)
+    if match:
+        max_results = _count(match) if 'count' in match.groupdict() else 10
+        return {"action": "GMAIL_LIST_UNREAD", "max_results": max_results}, 0.95
+
+    match = CALENDAR_LIST_PATTERN.match(text)
+    if match:
+        return {"action": "CALENDAR_LIST", "max_results": _count(match)}, 0.92
+    if CALENDAR_ON_PATTERN.match(text):
+        return {"action": "CALENDAR_LIST", "max_results": 10}, 0.92
+
+    match = TASKS_LIST_PATTERN.match(text)
+    if match:
+        return {"action": "TASKS_LIST", "max_results": _count(match)}, 0.95
+
+    return None, 0
+
+
+def _match_drive_search(prompt: str, text: str):
+    match = DRIVE_FOR_PATTERN.match(text) or DRIVE_IN_PATTERN.match(text)
+    if not match:
+        return None, 0
+
+    # Re-extract the term from the original prompt to keep its casing
+    original = re.sub(r'\s+', ' ', prompt).strip().strip(" .!?")
+    start, end = match.span('term')
+    term = extract_drive_term(original[start:end] if len(original) == len(text) else match.group('term'))
+    if not term:
+        return None, 0
+
+    # The heuristic classifier must agree this is a drive request (ignoring a "hey agent" lead-in)
+    core = re.sub(LEAD_IN, '', text)
+    confidence = 0.93 if classify_intent_heuristic(core)["intent"] == "drive" else 0.8
+    return {"action": "DRIVE_SEARCH", "query": term}, confidence
+
+
+def plan_fast_path(prompt: str):
+    """
+    Returns a planner-shaped JSON plan for unambiguous prompts, or None to use the LLM planner.
+    """
+    text = _normalize(prompt)
+    if not text:
+        return None
+
+    plan, confidence = _match_small_talk(text)
+
+    if not plan and not COMPOUND_WORDS.search(text):
+        if MUTATION_WORDS.search(text):
+            return None
+        plan, confidence = _match_read_intent(text)
+        if not plan:
+            plan, confidence = _match_drive_search(prompt, text)
+
+    if plan and confidence >= FAST_PATH_MIN_CONFIDENCE:
+        return plan
+    return None
+
+
+def record_planner_latency(path: str, seconds: float):
+    """Accumulates planning latency for 'fast_path' or 'llm' requests."""
+    ms = seconds * 1000
+    with _stats_lock:
+        stats = _latency_stats.setdefault(path, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += ms
+        stats["max_ms"] = max(stats["max_ms"], ms)
+
+
+def get_fast_path_stats() -> dict:
+    with _stats_lock:
+        return {
+            path: {
+                "count": stats["count"],
+                "avg_ms": round(stats["total_ms"] / stats["count"], 2),
+                "max_ms": round(stats["max_ms"], 2)
+            }
+            for path, stats in _latency_stats.items()
+        }
@@ -0,0 +1,62 @@
+# backend/planner/plan_cache.py
+import copy
+import os
+import re
+from datetime import datetime
+import pytz
+from utils.cache import LRUTTLCache, MISSING
+
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "512"))
+PLAN_CACHE_TTL = int(os.getenv("PLAN_CACHE_TTL", "600"))  # seconds
+
+# Read-only intents whose plan depends only on the prompt text
+CACHEABLE_ACTIONS = {
+    "GMAIL_LIST_UNREAD", "GMAIL_SEARCH", "CALENDAR_LIST", "TASKS_LIST",
+    "DRIVE_SEARCH", "CONTACTS_SEARCH", "SHEETS_READ", "DOCS_READ", "SMALL_TALK"
+}
+
+# Prompts mentioning relative time get a per-day key, so "tomorrow" is re-planned each day
+TIME_RELATIVE_PATTERN = re.compile(
+    r'\b(today|tonight|tomorrow|yesterday|now|next|this|last|week|weekend|month|year|'
+    r'morning|afternoon|evening|monday|tuesday|wednesday|thursday|friday|saturday|sunday|'
+    r'am|pm|\d{1,2}(:\d{2})?\s*(am|pm))\b'
+)
+
+_plan_cache = LRUTTLCache(max_size=PLAN_CACHE_SIZE, default_ttl=PLAN_CACHE_TTL)
+
+
+def normalize_prompt(text: str) -> str:
+    """Lowercases, collapses whitespace and strips surrounding punctuation."""
+    text = re.sub(r'\s+', ' ', text.lower()).strip()
+    return text.strip(" .,!?;:'\"")
+
+
+def plan_cache_key(user_input: str) -> tuple:
+    normalized = normalize_prompt(user_input)
+    date_bucket = None
+    if TIME_RELATIVE_PATTERN.search(normalized):
+        date_bucket = datetime.now(pytz.timezone('Asia/Kolkata')).date().isoformat()
+    return (normalized, date_bucket)
+
+
+def get_cached_plan(user_input: str):
+    """Returns a copy of the cached plan for this prompt, or None."""
+    plan = _plan_cache.get(plan_cache_key(user_input))
+    if plan is MISSING:
+        return None
+    return copy.deepcopy(plan)
+
+
+def cache_plan(user_input: str, plan: dict):
+    """Caches the plan if its action (every action, for multi-step plans) is read-only and deterministic for the prompt."""
+    steps = plan.get("actions")
+    if isinstance(steps, list):
+        cacheable = bool(steps) and all(isinstance(step, dict) and step.get("action") in CACHEABLE_ACTIONS for step in steps)
+    else:
+        cacheable = plan.get("action") in CACHEABLE_ACTIONS
+    if cacheable:
+        _plan_cache.set(plan_cache_key(user_input), copy.deepcopy(plan))
+
+
+def get_plan_cache_stats() -> dict:
+    return _plan_cache.stats()
@@ -0,0 +1,376 @@
+# backend/planner/plan_parser.py
+"""
+Tolerant parsing of planner replies.
+
+parse_plan_text() turns the raw LLM reply into a plan without asking the model again:
+1. the reply (minus any ``` fence) is read with json.loads;
+2. if that fails, the first balanced {...} object is cut out of the surrounding
+   text and common slips are repaired: trailing commas, single-quoted strings,
+   Python literals (True/False/None), curly quotes, raw newlines inside strings
+   and unquoted keys;
+3. the plan is checked against the action registry: action names are normalised,
+   parameters are coerced to their schema types ("5" -> 5 for max_results,
+   "a@x.com, b@x.com" -> a list for recipients) and plans without a known
+   action are rejected.
+
+A reply cut off by the token limit (an unterminated string or object) is only
+accepted when every step is a read-only action and no step was dropped on the
+way: a truncated body, title or event summary must never reach a send, update
+or delete, and a cut-off "GMAIL_SE..." must not quietly vanish from the plan.
+"""
+import json
+import re
+from threading import Lock
+
+# Actions the executor handles itself, outside the action registry
+CONTROL_ACTIONS = {"SMALL_TALK", "ERROR", "ASK_USER"}
+
+# Fields that hold lists; a single string is split on commas or wrapped
+LIST_FIELDS = {"to", "cc", "bcc", "attendees", "new_attendees"}
+WRAPPED_LIST_FIELDS = {"values"}
+
+# Cell values keep whatever type the model gave (numbers stay numbers in the sheet)
+RAW_FIELDS = {"value"}
+
+# Characters after which a quote starts a key or value (so apostrophes in words are left alone)
+VALUE_STARTS = {"{", "[", ",", ":"}
+
+# Multi-action plan bookkeeping, kept as-is on each step
+STEP_FIELDS = {"id", "depends_on"}
+
+TRUE_STRINGS = {"true", "yes", "1"}
+FALSE_STRINGS = {"false", "no", "0", ""}
+
+CURLY_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+_stats = {"parsed": 0, "repaired": 0, "coerced": 0, "rejected": 0}
+_stats_lock = Lock()
+
+
+def _count(outcome: str):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def _strip_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+        text = text.strip()
+    return text
+
+
+def extract_json_object(text: str):
+    """
+    Returns the first balanced {...} in text (brackets inside strings are ignored),
+    or everything from the first '{' if the object is never closed. None if there is no '{'.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    depth = 0
+    quote = None
+    escape = False
+    prev = ""  # last non-space character outside strings
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == quote:
+                quote = None
+                prev = char
+            continue
+
+        # A single quote only opens a string where a JSON key or value could start
+        if char == '"' or (char == "'" and prev in VALUE_STARTS):
+            quote = char
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+        if not char.isspace():
+            prev = char
+    return text[start:]
+
+
+def repair_json(text: str):
+    """
+    Rewrites near-JSON into JSON: single-quoted strings become double-quoted,
+    Python literals become JSON literals and trailing commas are dropped.
+    Unclosed strings, objects and arrays are closed so the result still parses.
+
+    :return: (json_text, truncated) where truncated is True if anything had to be closed
+    """
+    text = text.translate(CURLY_QUOTES)
+    out = []
+    stack = []
+    prev = ""  # last non-space character written outside strings
+    open_string = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+
+        if char == '"' or (char == "'" and prev in VALUE_STARTS):
+            # Copy a string, re-quoting single-quoted ones
+            quote = char
+            i += 1
+            chars = []
+            closed = False
+            while i < len(text):
+                c = text[i]
+                if c == "\\" and i + 1 < len(text):
+                    chars.append(text[i:i + 2])
+                    i += 2
+                    continue
+                if c == quote:
+                    closed = True
+                    i += 1
+                    break
+                chars.append(c)
+                i += 1
+            body = "".join(chars)
+            if quote == "'":
+                body = body.replace("\\'", "'").replace('"', '\\"')
+            out.append('"' + body + '"')
+            prev = '"'
+            if not closed:
+                open_string = True
+                break
+            continue
+
+        if char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            # Drop a trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+        elif char.isalpha() or char == "_":
+            word = re.match(r"\w+", text[i:]).group(0)
+            i += len(word)
+            if prev in "{," and re.match(r"\s*:", text[i:]):
+                # Unquoted key
+                out.append('"' + word + '"')
+            else:
+                out.append(PYTHON_LITERALS.get(word, word))
+            prev = word[-1]
+            continue
+
+        out.append(char)
+        if not char.isspace():
+            prev = char
+        i += 1
+
+    truncated = open_string or bool(stack)
+
+    # Close whatever the token limit cut off
+    while out and (out[-1].isspace() or out[-1] in ",:"):
+        out.pop()
+    out.extend(reversed(stack))
+    return "".join(out), truncated
+
+
+def _get_action_spec(name: str):
+    # Imported here: the registry pulls in every Google service module
+    from agent.action_registry import get_action
+    return get_action(name)
+
+
+def _coerce_bool(value):
+    if isinstance(value, str) and value.strip().lower() in TRUE_STRINGS | FALSE_STRINGS:
+        return value.strip().lower() in TRUE_STRINGS
+    if isinstance(value, (int, float)):
+        return bool(value)
+    return value
+
+
+def _coerce_int(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return value
+
+
+def _coerce_field(name: str, value, default, text_field: bool = False):
+    """
+    Returns value converted to the type the action expects for name.
+
+    :param default: The parameter's schema default (None if the schema does not list it)
+    :param text_field: True for schema parameters that take text (numbers become strings)
+    """
+    if name in LIST_FIELDS:
+        if value is None:
+            # None can mean "leave unchanged" (CALENDAR_UPDATE new_attendees)
+            return [] if isinstance(default, list) else None
+        if isinstance(value, str):
+            return [part.strip() for part in value.split(",") if part.strip()]
+        return value
+    if name in WRAPPED_LIST_FIELDS:
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return [value]
+        return value
+    if isinstance(default, bool):
+        return _coerce_bool(value)
+    if isinstance(default, int):
+        return _coerce_int(value)
+    if text_field and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def _validate_step(plan: dict):
+    """
+    Returns (plan, coerced) for a single-action plan, or (None, reason) if it cannot be run.
+    """
+    action = plan.get("action")
+    if not isinstance(action, str) or not action.strip():
+        return None, "missing action"
+
+    normalized = re.sub(r"[\s\-]+", "_", action.strip()).upper()
+    spec = _get_action_spec(normalized)
+    if spec is None and normalized not in CONTROL_ACTIONS:
+        return None, f"unknown action {action!r}"
+
+    validated = dict(plan, action=normalized)
+    for name, value in plan.items():
+        if name == "action" or name in STEP_FIELDS:
+            continue
+        in_schema = spec is not None and name in spec.params
+        default = spec.params[name] if in_schema else None
+        text_field = in_schema and name not in RAW_FIELDS and (default is None or isinstance(default, str))
+        validated[name] = _coerce_field(name, value, default, text_field)
+
+    if normalized == "SMALL_TALK" and not isinstance(validated.get("response"), str):
+        validated["response"] = "I'm here to help!"
+
+    return validated, validated != plan
+
+
+def validate_plan(plan):
+    """
+    Checks a decoded plan against the action registry and coerces parameter types.
+
+    :return: (plan, coerced) or (None, reason) if no step of the plan can be run
+    """
+    if isinstance(plan, list):
+        plan = {"actions": plan}
+    if not isinstance(plan, dict):
+        return None, "plan is not an object"
+
+    if "actions" not in plan:
+        return _validate_step(plan)
+
+    if not isinstance(plan["actions"], list):
+        return None, "actions is not a list"
+
+    steps = []
+    coerced = False
+    for step in plan["actions"]:
+        if not isinstance(step, dict):
+            coerced = True
+            continue
+        validated, changed = _validate_step(step)
+        if validated is None:
+            print(f"⚠️ Dropping plan step: {changed}")
+            coerced = True
+            continue
+        steps.append(validated)
+        coerced = coerced or changed
+
+    if not steps:
+        return None, "no runnable steps"
+    return dict(plan, actions=steps), coerced
+
+
+def _plan_steps(plan: dict) -> list:
+    return plan["actions"] if "actions" in plan else [plan]
+
+
+def _step_count(decoded) -> int:
+    """Number of steps in a decoded plan before validation drops any."""
+    if isinstance(decoded, list):
+        return len(decoded)
+    if isinstance(decoded, dict) and isinstance(decoded.get("actions"), list):
+        return len(decoded["actions"])
+    return 1
+
+
+def _is_read_only(plan: dict) -> bool:
+    """True if every step of a validated plan is a registry action that only reads."""
+    for step in _plan_steps(plan):
+        spec = _get_action_spec(step["action"])
+        if spec is None or not spec.read_only:
+            return False
+    return True
+
+
+def parse_plan_text(response_text: str):
+    """
+    Turns a raw planner reply into a validated plan dict, repairing it if needed.
+
+    :return: (plan, repaired) where repaired is True if the reply was not valid JSON;
+             plan is None if the reply cannot be recovered
+    """
+    text = _strip_fence(response_text)
+
+    repaired = False
+    truncated = False
+    try:
+        plan = json.loads(text)
+    except json.JSONDecodeError as e:
+        print(f"🔧 Planner reply is not valid JSON ({e}), repairing")
+        candidate = extract_json_object(text)
+        if candidate is None:
+            _count("rejected")
+            return None, True
+        try:
+            # strict=False accepts raw newlines and tabs inside strings
+            repaired_text, truncated = repair_json(candidate)
+            plan = json.loads(repaired_text, strict=False)
+        except json.JSONDecodeError as e:
+            print(f"❌ Planner reply could not be repaired: {e}")
+            _count("rejected")
+            return None, True
+        repaired = True
+
+    step_count = _step_count(plan)
+    plan, coerced = validate_plan(plan)
+    if plan is None:
+        print(f"❌ Planner reply rejected: {coerced}")
+        _count("rejected")
+        return None, repaired
+
+    if truncated and (len(_plan_steps(plan)) < step_count or not _is_read_only(plan)):
+        # Whatever was cut off (a body, a title, the rest of a summary, a half-written
+        # action name) must not be sent, written or silently left out
+        print("❌ Planner reply was cut off mid-plan; refusing to run a truncated change")
+        _count("rejected")
+        return None, repaired
+
+    if repaired:
+        _count("repaired")
+    elif coerced:
+        _count("coerced")
+    else:
+        _count("parsed")
+    if coerced:
+        print("🔧 Plan parameters coerced to their schema types")
+    return plan, repaired
+
+
+def get_plan_parser_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,456 @@
+# backend/planner/prompt_templates.py
+"""
+Planner system prompt, split by domain.
+
+The monolithic prompt carries every action schema, rule and example. For most
+requests only one or two domains are relevant, so select_planner_prompt() picks
+the domains the request mentions (utils.intent_classifier.classify_planner_domains)
+and assembles a preamble with just their intent hints, schemas, rules and
+examples. Requests that mention no known domain get the full prompt.
+"""
+import os
+import re
+from functools import lru_cache
+from threading import Lock
+
+from utils.intent_classifier import classify_planner_domains, is_greeting_or_smalltalk
+
+# Set PLANNER_TIERED_PROMPTS=0 to always send the full prompt
+PLANNER_TIERED_PROMPTS = os.getenv("PLANNER_TIERED_PROMPTS", "1") == "1"
+
+# Requests that may need more than one step get the multi-action format too
+COMPOUND_PATTERN = re.compile(r'\b(and|also|then|plus|after that)\b', re.IGNORECASE)
+
+HEADER = """YOU MUST RETURN ONLY VALID JSON. NO TEXT. NO EXPLANATIONS. NO MARKDOWN. ONLY JSON.
+
+CRITICAL: Your response MUST be parseable by json.loads(). Do not write anything except JSON.
+
+TIMEZONE: ALL DATES AND TIMES MUST BE IN INDIAN STANDARD TIME (IST, UTC+5:30). When parsing dates like "tomorrow at 2 PM", calculate IST time."""
+
+MULTI_ACTION = """MULTIPLE REQUESTS IN ONE PROMPT:
+If the user asks for several things at once ("and", "also", "then"), return one object with an "actions" list.
+Each item uses one of the formats above plus an "id", and "depends_on" listing the ids of steps that must finish first.
+Leave "depends_on" empty for steps that do not need another step's outcome, so they can run in parallel.
+{
+  "actions": [
+    {"id": "1", "action": "GMAIL_LIST_UNREAD", "max_results": 10, "depends_on": []},
+    {"id": "2", "action": "CALENDAR_LIST", "max_results": 10, "depends_on": []}
+  ]
+}"""
+
+MULTI_ACTION_EXAMPLE = """User: "Show my unread emails and today's events and my tasks"
+{"actions": [{"id": "1", "action": "GMAIL_LIST_UNREAD", "max_results": 10, "depends_on": []}, {"id": "2", "action": "CALENDAR_LIST", "max_results": 10, "depends_on": []}, {"id": "3", "action": "TASKS_LIST", "max_results": 10, "depends_on": []}]}"""
+
+FINAL_RULE = "Return ONLY JSON - no markdown, no text, no explanations"
+
+FOOTER = "REMEMBER: ONLY JSON OUTPUT. NO OTHER TEXT."
+
+# Per domain: intent hints, JSON formats, strict rules and examples.
+# Domains are listed in the order their sections appear in the full prompt.
+DOMAIN_SECTIONS = {
+    "email": {
+        "intents": """- PRIORITY #1 - Email send keywords: "send", "email", "mail", "compose", "draft", "message to" -> GMAIL_COMPOSE
+  ALWAYS use GMAIL_COMPOSE for ANY email send request, even if information is incomplete
+- Email search: "search email", "find email", "search inbox", "emails from" -> GMAIL_SEARCH
+- Email read: "read email", "show email", "open email" (requires message_id) -> GMAIL_READ
+- Email unread: "unread emails", "list unread", "show unread" -> GMAIL_LIST_UNREAD
+- Email update: "mark as read", "mark as unread", "archive email", "star email" -> GMAIL_UPDATE
+- Email delete: "delete email", "trash email", "remove email" -> GMAIL_DELETE""",
+        "formats": """GMAIL_COMPOSE (for sending email):
+{
+  "action": "GMAIL_COMPOSE",
+  "to": ["recipient@email.com"],
+  "cc": [],
+  "bcc": [],
+  "subject": "Email Subject",
+  "body": "Email body with greeting and signature"
+}
+
+GMAIL_SEARCH (for searching inbox):
+{
+  "action": "GMAIL_SEARCH",
+  "query": "search term or Gmail query syntax",
+  "max_results": 10
+}
+
+GMAIL_READ (for reading specific email):
+{
+  "action": "GMAIL_READ",
+  "message_id": "message_id_here"
+}
+
+GMAIL_LIST_UNREAD (for listing unread emails):
+{
+  "action": "GMAIL_LIST_UNREAD",
+  "max_results": 10
+}
+
+GMAIL_UPDATE (for updating email labels):
+{
+  "action": "GMAIL_UPDATE",
+  "message_id": "message_id_here",
+  "operation": "mark_read|mark_unread|archive|star"
+}
+
+GMAIL_DELETE (for deleting emails):
+{
+  "action": "GMAIL_DELETE",
+  "message_id": "message_id_here"
+}""",
+        "rules": [
+            "**CRITICAL EMAIL RULE**: ANY email/send/mail/compose/draft request MUST ALWAYS use GMAIL_COMPOSE action. NEVER use SMALL_TALK for emails.",
+            "For emails: If user mentions name without email, use \"name@placeholder.com\" for to field",
+            "For emails: Always generate complete subject and body, even if user only provides partial info",
+        ],
+        "examples": """User: "Send email to Jubi saying I can't attend class tomorrow"
+{"action": "GMAIL_COMPOSE", "to": ["jubi@placeholder.com"], "cc": [], "bcc": [], "subject": "Unable to Attend Class Tomorrow", "body": "Hi Jubi,\n\nI wanted to let you know that I won't be able to attend class tomorrow.\n\nThank you for understanding.\n\nBest regards"}
+
+User: "Send email to swarapawanekar@gmail.com cc swarasameerpawanekar@gmail.com bcc 1ms22ai063@msrit.edu saying This is my resume subject Resume"
+{"action": "GMAIL_COMPOSE", "to": ["swarapawanekar@gmail.com"], "cc": ["swarasameerpawanekar@gmail.com"], "bcc": ["1ms22ai063@msrit.edu"], "subject": "Resume", "body": "This is my resume"}
+
+User: "Search my inbox for emails from john"
+{"action": "GMAIL_SEARCH", "query": "from:john", "max_results": 10}
+
+User: "Show me unread emails"
+{"action": "GMAIL_LIST_UNREAD", "max_results": 10}
+
+User: "Find emails about project update"
+{"action": "GMAIL_SEARCH", "query": "project update", "max_results": 10}""",
+    },
+    "calendar": {
+        "intents": """- Calendar keywords: "schedule", "meeting", "appointment", "calendar", "create event" -> CALENDAR_CREATE
+- Calendar list: "list events", "upcoming events", "my events" -> CALENDAR_LIST
+- Calendar delete: "delete event", "remove event", "cancel event" -> CALENDAR_DELETE
+- Calendar update: "modify event", "reschedule", "change event", "update event" -> CALENDAR_UPDATE""",
+        "formats": """CALENDAR_CREATE (for scheduling):
+{
+  "action": "CALENDAR_CREATE",
+  "summary": "Meeting Title",
+  "description": "Meeting details",
+  "start_time": "2025-12-08T14:00:00+05:30",
+  "end_time": "2025-12-08T15:00:00+05:30",
+  "attendees": [],
+  "instant": false
+}
+
+CALENDAR_LIST (for viewing events):
+{
+  "action": "CALENDAR_LIST",
+  "max_results": 10
+}
+
+CALENDAR_DELETE (for deleting events):
+{
+  "action": "CALENDAR_DELETE",
+  "event_id": "",
+  "summary": "event title to find"
+}
+
+CALENDAR_UPDATE (for modifying/rescheduling events):
+{
+  "action": "CALENDAR_UPDATE",
+  "event_id": "",
+  "summary_search": "event title to find",
+  "new_summary": "",
+  "new_start_time": "2025-12-10T10:00:00+05:30",
+  "new_end_time": "2025-12-10T11:00:00+05:30",
+  "new_description": "",
+  "new_attendees": []
+}""",
+        "rules": [
+            "For calendar: Parse dates like \"tomorrow\", \"next Monday\" to ISO format",
+            "For calendar: \"instant meeting\" or \"meeting now\" sets instant: true",
+            "For calendar delete: Extract event title into \"summary\" field",
+        ],
+        "examples": """User: "Delete the event Daily Sync"
+{"action": "CALENDAR_DELETE", "event_id": "", "summary": "Daily Sync"}
+
+User: "Schedule a team meeting for tomorrow at 9 AM"
+{"action": "CALENDAR_CREATE", "summary": "Team Meeting", "description": "Scheduled via Vocal Agent", "start_time": "2025-12-08T09:00:00+05:30", "end_time": "2025-12-08T10:00:00+05:30", "attendees": [], "instant": false}""",
+    },
+    "contacts": {
+        "intents": """- Contact keywords: "what is", "email", "phone number", "contact" -> CONTACTS_SEARCH
+- Contact create: "add contact", "create contact", "new contact" -> CONTACTS_CREATE
+- Contact update: "update contact", "change contact", "edit contact" -> CONTACTS_UPDATE
+- Contact delete: "delete contact", "remove contact" -> CONTACTS_DELETE""",
+        "formats": """CONTACTS_SEARCH (for finding contacts):
+{
+  "action": "CONTACTS_SEARCH",
+  "query": "person name"
+}
+
+CONTACTS_CREATE (for creating new contacts):
+{
+  "action": "CONTACTS_CREATE",
+  "given_name": "John",
+  "family_name": "Doe",
+  "email": "john@example.com",
+  "phone": "+1234567890"
+}
+
+CONTACTS_UPDATE (for updating contacts):
+{
+  "action": "CONTACTS_UPDATE",
+  "resource_name": "people/c1234567890",
+  "name": "New Name",
+  "email": "newemail@example.com",
+  "phone": "+9876543210"
+}
+
+CONTACTS_DELETE (for deleting contacts):
+{
+  "action": "CONTACTS_DELETE",
+  "resource_name": "people/c1234567890"
+}""",
+        "rules": [],
+        "examples": """User: "What is Swara's email?"
+{"action": "CONTACTS_SEARCH", "query": "Swara"}""",
+    },
+    "drive": {
+        "intents": """- Drive keywords: "search drive", "find file", "look for", "my documents" -> DRIVE_SEARCH
+- Drive upload: "upload file", "create file", "add file to drive" -> DRIVE_CREATE
+- Drive rename: "rename file", "change file name" -> DRIVE_UPDATE
+- Drive delete: "delete file", "remove file from drive" -> DRIVE_DELETE""",
+        "formats": """DRIVE_SEARCH (for finding files):
+{
+  "action": "DRIVE_SEARCH",
+  "query": "search keywords"
+}
+
+DRIVE_CREATE (for uploading files):
+{
+  "action": "DRIVE_CREATE",
+  "file_name": "filename.txt",
+  "content": "file content"
+}
+
+DRIVE_UPDATE (for renaming files):
+{
+  "action": "DRIVE_UPDATE",
+  "file_id": "file_id_here",
+  "new_name": "new filename"
+}
+
+DRIVE_DELETE (for deleting files):
+{
+  "action": "DRIVE_DELETE",
+  "file_id": "file_id_here"
+}""",
+        "rules": [
+            "For drive: Extract KEY TERM (e.g., \"Swara's documents\" -> \"Swara\", \"DevOps project\" -> \"DevOps\")",
+        ],
+        "examples": """User: "Search my drive for Devops Report"
+{"action": "DRIVE_SEARCH", "query": "Devops Report"}
+
+User: "Hey agent search Drive for Swara's documents"
+{"action": "DRIVE_SEARCH", "query": "Swara"}""",
+    },
+    "tasks": {
+        "intents": """- Task create: "create task", "add task", "new task", "remind me to" -> TASKS_CREATE
+- Task list: "list tasks", "show tasks", "my tasks" -> TASKS_LIST
+- Task complete: "mark task complete", "complete task", "finish task" -> TASKS_COMPLETE
+- Task update: "update task", "edit task", "change task" -> TASKS_UPDATE
+- Task delete: "delete task", "remove task" -> TASKS_DELETE""",
+        "formats": """TASKS_CREATE (for creating tasks):
+{
+  "action": "TASKS_CREATE",
+  "title": "Task title",
+  "notes": "Task description",
+  "due_date": "2025-12-10T00:00:00Z"
+}
+
+TASKS_LIST (for listing tasks):
+{
+  "action": "TASKS_LIST",
+  "max_results": 10
+}
+
+TASKS_COMPLETE (for marking tasks complete):
+{
+  "action": "TASKS_COMPLETE",
+  "task_id": "",
+  "title_search": "task title to find"
+}
+
+TASKS_UPDATE (for updating tasks):
+{
+  "action": "TASKS_UPDATE",
+  "task_id": "task_id_here",
+  "title": "new title",
+  "notes": "new notes",
+  "due_date": "2025-12-15T00:00:00Z"
+}
+
+TASKS_DELETE (for deleting tasks):
+{
+  "action": "TASKS_DELETE",
+  "task_id": "task_id_here"
+}""",
+        "rules": [],
+        "examples": "",
+    },
+    "sheets": {
+        "intents": """- Sheets create: "create spreadsheet", "new spreadsheet", "make a sheet" -> SHEETS_CREATE
+- Sheets add row: "add row to sheet", "append to spreadsheet" -> SHEETS_ADD_ROW
+- Sheets read: "read sheet", "get sheet data", "show spreadsheet" -> SHEETS_READ
+- Sheets update: "update cell", "change cell", "modify spreadsheet" -> SHEETS_UPDATE
+- Sheets delete: "delete spreadsheet", "remove spreadsheet" -> SHEETS_DELETE""",
+        "formats": """SHEETS_CREATE (for creating spreadsheets):
+{
+  "action": "SHEETS_CREATE",
+  "title": "Spreadsheet Title"
+}
+
+SHEETS_ADD_ROW (for adding data to spreadsheet):
+{
+  "action": "SHEETS_ADD_ROW",
+  "sheet_id": "spreadsheet_id",
+  "range_name": "Sheet1!A:D",
+  "values": ["Value1", "Value2", "Value3"]
+}
+
+SHEETS_READ (for reading spreadsheet data):
+{
+  "action": "SHEETS_READ",
+  "sheet_id": "spreadsheet_id",
+  "range_name": "Sheet1!A1:D10"
+}
+
+SHEETS_UPDATE (for updating cells):
+{
+  "action": "SHEETS_UPDATE",
+  "sheet_id": "spreadsheet_id",
+  "range_name": "Sheet1!A1",
+  "value": "new value"
+}
+
+SHEETS_DELETE (for deleting spreadsheets):
+{
+  "action": "SHEETS_DELETE",
+  "sheet_id": "spreadsheet_id"
+}""",
+        "rules": [],
+        "examples": "",
+    },
+    "docs": {
+        "intents": """- Docs create: "create document", "new doc", "make a document" -> DOCS_CREATE
+- Docs read: "read document", "show document", "get document content" -> DOCS_READ
+- Docs append: "add to document", "append to doc", "write to document" -> DOCS_APPEND
+- Docs update: "update document", "replace text in doc", "edit document" -> DOCS_UPDATE
+- Docs delete: "delete document", "remove document" -> DOCS_DELETE""",
+        "formats": """DOCS_CREATE (for creating documents):
+{
+  "action": "DOCS_CREATE",
+  "title": "Document Title"
+}
+
+DOCS_READ (for reading document content):
+{
+  "action": "DOCS_READ",
+  "doc_id": "document_id"
+}
+
+DOCS_APPEND (for adding text to document):
+{
+  "action": "DOCS_APPEND",
+  "doc_id": "document_id",
+  "text": "Text to append"
+}
+
+DOCS_UPDATE (for replacing text in document):
+{
+  "action": "DOCS_UPDATE",
+  "doc_id": "document_id",
+  "find_text": "text to find",
+  "replace_text": "replacement text"
+}
+
+DOCS_DELETE (for deleting documents):
+{
+  "action": "DOCS_DELETE",
+  "doc_id": "document_id"
+}""",
+        "rules": [],
+        "examples": "",
+    },
+    # Always included, so there is a valid answer for anything that is not a service request
+    "chat": {
+        "intents": """- Small talk: "hi", "hello", "how are you", "thanks", "goodbye" -> SMALL_TALK""",
+        "formats": """SMALL_TALK (only for greetings/casual chat):
+{
+  "action": "SMALL_TALK",
+  "response": "Your response"
+}""",
+        "rules": [],
+        "examples": """User: "hi"
+{"action": "SMALL_TALK", "response": "Hello! How can I help you today?"}""",
+    },
+}
+
+ALL_DOMAINS = tuple(DOMAIN_SECTIONS)
+
+_stats = {"tiered": 0, "full": 0, "tiered_chars": 0, "full_chars": 0}
+_stats_lock = Lock()
+
+
+@lru_cache(maxsize=None)
+def build_planner_prompt(domains: tuple = ALL_DOMAINS, multi_action: bool = True) -> str:
+    """
+    Assembles the planner preamble for the given domains (kept in DOMAIN_SECTIONS order).
+
+    :param domains: Domain names from DOMAIN_SECTIONS; "chat" is always added
+    :param multi_action: Include the multi-action format and its example
+    """
+    sections = [DOMAIN_SECTIONS[name] for name in ALL_DOMAINS if name in domains or name == "chat"]
+
+    rules = [rule for section in sections for rule in section["rules"]] + [FINAL_RULE]
+    examples = [section["examples"] for section in sections if section["examples"]]
+    if multi_action:
+        examples.append(MULTI_ACTION_EXAMPLE)
+
+    parts = [
+        HEADER,
+        "DETECT USER INTENT (MOST IMPORTANT FIRST):\n" + "\n".join(section["intents"] for section in sections),
+        "JSON OUTPUT FORMATS (COPY EXACTLY):\n\n" + "\n\n".join(section["formats"] for section in sections),
+    ]
+    if multi_action:
+        parts.append(MULTI_ACTION)
+    parts.append("STRICT RULES (NEVER BREAK THESE):\n" + "\n".join(f"{i}. {rule}" for i, rule in enumerate(rules, 1)))
+    parts.append("EXAMPLES:\n\n" + "\n\n".join(examples))
+    parts.append(FOOTER)
+    return "\n\n".join(parts)
+
+
+PLANNER_SYSTEM_PROMPT = build_planner_prompt()
+
+
+def select_planner_prompt(user_input: str):
+    """
+    Returns (preamble, domains) for a request: only the domains it mentions,
+    or the full prompt (domains == ALL_DOMAINS) if it mentions none.
+    """
+    domains = tuple(classify_planner_domains(user_input))
+    if not domains and is_greeting_or_smalltalk(user_input):
+        domains = ("chat",)
+
+    if not PLANNER_TIERED_PROMPTS or not domains:
+        preamble, domains = PLANNER_SYSTEM_PROMPT, ALL_DOMAINS
+    else:
+        multi_action = len(domains) > 1 or bool(COMPOUND_PATTERN.search(user_input))
+        preamble = build_planner_prompt(domains, multi_action)
+
+    with _stats_lock:
+        tier = "full" if domains == ALL_DOMAINS else "tiered"
+        _stats[tier] += 1
+        _stats[f"{tier}_chars"] += len(preamble)
+    return preamble, domains
+
+
+def get_prompt_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    for tier in ("tiered", "full"):
+        count = stats.pop(f"{tier}_chars")
+        stats[f"avg_{tier}_chars"] = round(count / stats[tier]) if stats[tier] else 0
+    stats["full_prompt_chars"] = len(PLANNER_SYSTEM_PROMPT)
+    return stats
@@ -0,0 +1,97 @@
+# backend/planner/stream_parser.py
+import json
+
+
+class IncrementalPlanParser:
+    """
+    Incremental scanner for a streamed JSON plan.
+
+    feed() accepts text chunks as the LLM produces them and returns the top-level
+    scalar fields ("action", "query", ...) completed by that chunk, so callers can
+    act on the action long before the whole object has arrived. Text before the
+    first '{' (such as a ```json fence) is ignored; nested values are skipped.
+
+    A value it cannot decode stops the partial fields (failed is set) without
+    raising: the caller still collects the whole reply for plan_parser to repair.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.buffer = []  # current string or scalar being read at depth 1
+        self.key = None
+        self.expecting_value = False
+        self.reading_scalar = False
+        self.done = False
+        self.failed = False
+
+    def _finish_scalar(self, completed: list):
+        raw = "".join(self.buffer).strip()
+        self.buffer = []
+        self.reading_scalar = False
+        self.expecting_value = False
+        try:
+            completed.append((self.key, json.loads(raw)))
+        except ValueError:
+            pass
+
+    def feed(self, chunk: str) -> list:
+        """Returns a list of (key, value) pairs for top-level scalar fields completed in this chunk."""
+        completed = []
+        for char in chunk:
+            if self.done:
+                break
+
+            if self.in_string:
+                if self.depth == 1:
+                    self.buffer.append(char)
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        try:
+                            # strict=False: models write raw newlines and tabs inside bodies
+                            text = json.loads('"' + "".join(self.buffer), strict=False)
+                        except ValueError:
+                            self.failed = self.done = True
+                            break
+                        self.buffer = []
+                        if self.expecting_value:
+                            completed.append((self.key, text))
+                            self.expecting_value = False
+                        else:
+                            self.key = text
+                continue
+
+            if self.reading_scalar:
+                if char in ",}":
+                    self._finish_scalar(completed)
+                else:
+                    self.buffer.append(char)
+                    continue
+
+            if char == '"':
+                if self.depth >= 1:
+                    self.in_string = True
+                    self.buffer = []
+            elif char in "{[":
+                self.depth += 1
+                if self.depth > 1:
+                    # Nested object/array value: not a scalar, skip it
+                    self.expecting_value = False
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.done = True
+            elif self.depth == 1:
+                if char == ":":
+                    self.expecting_value = True
+                elif self.expecting_value and not char.isspace():
+                    self.reading_scalar = True
+                    self.buffer = [char]
+
+        return completed
@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+# Modules import each other as top-level packages (planner.*, agent.*), as app.py runs them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,77 @@
+# backend/tests/test_local_store.py
+import sqlite3
+import threading
+import time
+
+from utils.local_store import BackgroundSync, UserLocks, escape_like
+
+
+def test_user_locks_exclude_per_user_and_are_dropped_when_idle():
+    locks = UserLocks()
+    inside = []
+    overlap = []
+
+    def work(user):
+        with locks.hold(user):
+            if user in inside:
+                overlap.append(user)
+            inside.append(user)
+            time.sleep(0.01)
+            inside.remove(user)
+
+    threads = [threading.Thread(target=work, args=(user,)) for user in ["a", "a", "a", "b", "b"]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlap == []
+    assert len(locks) == 0
+
+
+def test_background_sync_runs_once_per_user_at_a_time():
+    release = threading.Event()
+    calls = []
+
+    def sync(user):
+        calls.append(user)
+        release.wait(1)
+
+    syncs = BackgroundSync("test-sync", UserLocks(), sync)
+    assert syncs.start("a") is True
+    assert syncs.start("a") is False
+    assert syncs.is_running("a")
+    release.set()
+    for _ in range(100):
+        if not syncs.is_running("a"):
+            break
+        time.sleep(0.01)
+    assert calls == ["a"]
+    assert syncs.start("a") is True
+
+
+def test_background_sync_survives_errors():
+    def sync(user):
+        raise RuntimeError("boom")
+
+    syncs = BackgroundSync("test-sync", UserLocks(), sync)
+    syncs.start("a")
+    for _ in range(100):
+        if not syncs.is_running("a"):
+            break
+        time.sleep(0.01)
+    assert not syncs.is_running("a")
+
+
+def test_escape_like_matches_wildcards_literally():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (name TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?)", [("50% off",), ("500 off",), ("a_b",), ("axb",), ("c\\d",)])
+
+    def like(text):
+        rows = conn.execute("SELECT name FROM t WHERE name LIKE ? ESCAPE '\\' ORDER BY name", (f"%{escape_like(text)}%",))
+        return [row[0] for row in rows]
+
+    assert like("0%") == ["50% off"]
+    assert like("a_b") == ["a_b"]
+    assert like("c\\d") == ["c\\d"]
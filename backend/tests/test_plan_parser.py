@@ -0,0 +1,151 @@
+# backend/tests/test_plan_parser.py
+from types import SimpleNamespace
+
+import pytest
+
+from planner import plan_parser
+from planner.plan_parser import extract_json_object, parse_plan_text, repair_json, validate_plan
+
+# The parts of the action registry the parser reads, copied from agent/action_registry.py
+# (importing it pulls in Flask and every Google client): parameter defaults and read_only
+ACTIONS = {
+    "GMAIL_SEARCH": SimpleNamespace(params={"query": "", "max_results": 10}, read_only=True),
+    "GMAIL_SEND": SimpleNamespace(
+        params={"to": None, "subject": None, "body": None, "cc": None, "bcc": None, "approved": False},
+        read_only=False
+    ),
+    "CALENDAR_LIST": SimpleNamespace(params={"max_results": 10}, read_only=True),
+    "CALENDAR_CREATE": SimpleNamespace(
+        params={
+            "summary": None, "description": "Scheduled via Vocal Agent", "start_time": None,
+            "end_time": None, "attendees": [], "instant": False
+        },
+        read_only=False
+    ),
+    "CALENDAR_UPDATE": SimpleNamespace(
+        params={
+            "event_id": None, "summary_search": None, "new_summary": None, "new_start_time": None,
+            "new_end_time": None, "new_description": None, "new_attendees": None
+        },
+        read_only=False
+    ),
+    "CALENDAR_DELETE": SimpleNamespace(params={"event_id": None, "summary": None}, read_only=False),
+    "TASKS_LIST": SimpleNamespace(params={"max_results": 10}, read_only=True),
+    "TASKS_CREATE": SimpleNamespace(params={"title": None, "notes": "", "due_date": None}, read_only=False),
+    "DOCS_APPEND": SimpleNamespace(params={"doc_id": None, "text": None}, read_only=False),
+    "SHEETS_UPDATE": SimpleNamespace(params={"sheet_id": None, "range_name": None, "value": None}, read_only=False),
+}
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(plan_parser, "_get_action_spec", ACTIONS.get)
+
+
+def parse(reply):
+    plan, _ = parse_plan_text(reply)
+    return plan
+
+
+def test_valid_json_is_parsed_unchanged():
+    plan = parse('{"action": "GMAIL_SEARCH", "query": "from:john", "max_results": 5}')
+    assert plan == {"action": "GMAIL_SEARCH", "query": "from:john", "max_results": 5}
+
+
+def test_code_fence_and_surrounding_text():
+    reply = 'Here you go:\n```json\n{"action": "CALENDAR_LIST", "max_results": 3}\n```'
+    assert parse(reply) == {"action": "CALENDAR_LIST", "max_results": 3}
+    assert parse('Sure! {"action": "TASKS_LIST"} Let me know.') == {"action": "TASKS_LIST"}
+
+
+@pytest.mark.parametrize("reply", [
+    "{'action': 'GMAIL_SEND', 'to': ['a@x.com'], 'subject': 'Hi', 'body': \"I can't make it\"}",
+    '{"action": "GMAIL_SEND", "to": ["a@x.com"], "subject": "Hi", "body": "I can\'t make it",}',
+    '{action: "GMAIL_SEND", to: ["a@x.com"], subject: "Hi", body: "I can\'t make it"}',
+    '{“action”: “GMAIL_SEND”, “to”: [“a@x.com”], “subject”: “Hi”, “body”: “I can\'t make it”}',
+])
+def test_repairs_near_json(reply):
+    assert parse(reply) == {
+        "action": "GMAIL_SEND", "to": ["a@x.com"], "subject": "Hi", "body": "I can't make it"
+    }
+
+
+def test_python_literals_and_raw_newlines():
+    plan = parse('{"action": "CALENDAR_CREATE", "summary": "Line one\nline two", "instant": True, "extra": None}')
+    assert plan == {"action": "CALENDAR_CREATE", "summary": "Line one\nline two", "instant": True, "extra": None}
+
+
+def test_coerces_parameter_types():
+    plan = parse('{"action": "gmail-send", "to": "a@x.com, b@x.com", "subject": 42, "body": "x"}')
+    assert plan == {"action": "GMAIL_SEND", "to": ["a@x.com", "b@x.com"], "subject": "42", "body": "x"}
+    assert parse('{"action": "CALENDAR_LIST", "max_results": "5"}')["max_results"] == 5
+    assert parse('{"action": "CALENDAR_CREATE", "summary": "t", "instant": "yes"}')["instant"] is True
+
+
+def test_none_list_field_stays_none_without_list_default():
+    plan = parse('{"action": "CALENDAR_UPDATE", "summary_search": "Sync", "new_attendees": null}')
+    assert plan["new_attendees"] is None
+
+
+def test_sheet_values_keep_their_type():
+    plan = parse('{"action": "SHEETS_UPDATE", "sheet_id": "s", "range_name": "A1", "value": 12000}')
+    assert plan["value"] == 12000
+
+
+def test_rejects_unknown_action_and_non_json():
+    assert parse('{"action": "LAUNCH_ROCKET"}') is None
+    assert parse("I'm not sure what you mean.") is None
+    assert parse('{"query": "from:john"}') is None
+
+
+def test_multi_action_drops_unknown_steps():
+    plan = parse('{"actions": [{"action": "TASKS_LIST"}, {"action": "NOPE"}, "junk"]}')
+    assert plan == {"actions": [{"action": "TASKS_LIST"}]}
+    assert validate_plan({"actions": [{"action": "NOPE"}]}) == (None, "no runnable steps")
+
+
+@pytest.mark.parametrize("reply", [
+    '{"action": "DOCS_APPEND", "doc_id": "1abc", "text": "Meeting notes: we agreed to ship on Fri',
+    '{"action": "SHEETS_UPDATE", "sheet_id": "s", "range_name": "B2", "value": "12',
+    '{"action": "CALENDAR_DELETE", "summary": "Team',
+    '{"action": "GMAIL_SEND", "to": ["a@x.com"], "subject": "Hi", "body": "Done"',
+    '{"actions": [{"action": "TASKS_LIST"}, {"action": "TASKS_CREATE", "title": "Bu',
+    '{"actions": [{"action": "TASKS_CREATE", "title": "Buy milk"}, {"action": "TASKS_LIST"}',
+    '{"actions": [{"action": "GMAIL_SEARCH", "query": "from:john"}, {"action": "GMAIL_SE',
+])
+def test_truncated_changes_are_rejected(reply):
+    before = plan_parser.get_plan_parser_stats()["rejected"]
+    assert parse(reply) is None
+    assert plan_parser.get_plan_parser_stats()["rejected"] == before + 1
+
+
+def test_truncated_reads_are_accepted():
+    assert parse('{"action": "GMAIL_SEARCH", "query": "from:john", "max_results": 5') == {
+        "action": "GMAIL_SEARCH", "query": "from:john", "max_results": 5
+    }
+    assert parse('{"actions": [{"action": "TASKS_LIST"}, {"action": "CALENDAR_LIST"') == {
+        "actions": [{"action": "TASKS_LIST"}, {"action": "CALENDAR_LIST"}]
+    }
+
+
+def test_reports_repaired_replies():
+    assert parse_plan_text('{"action": "TASKS_LIST"}') == ({"action": "TASKS_LIST"}, False)
+    assert parse_plan_text('{"action": "CALENDAR_LIST", "max_results": "5"}') == (
+        {"action": "CALENDAR_LIST", "max_results": 5}, False
+    )
+    assert parse_plan_text("{'action': 'TASKS_LIST',}") == ({"action": "TASKS_LIST"}, True)
+    assert parse_plan_text('{"action": "TASKS_LIST", "max_results": 3') == (
+        {"action": "TASKS_LIST", "max_results": 3}, True
+    )
+
+
+def test_extract_json_object():
+    assert extract_json_object('x {"a": "}{", "b": [1, {"c": 2}]} y {"d": 1}') == '{"a": "}{", "b": [1, {"c": 2}]}'
+    assert extract_json_object('{"a": [1, 2') == '{"a": [1, 2'
+    assert extract_json_object("no object") is None
+
+
+def test_repair_json_reports_truncation():
+    assert repair_json('{"a": 1,}') == ('{"a": 1}', False)
+    assert repair_json('{"a": "tex') == ('{"a": "tex"}', True)
+    assert repair_json('{"a": [1, 2,') == ('{"a": [1, 2]}', True)
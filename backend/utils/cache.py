@@ -0,0 +1,91 @@
+# backend/utils/cache.py
+import time
+from collections import OrderedDict
+from threading import RLock
+
+# Sentinel returned by LRUTTLCache.get when a key is absent or expired
+MISSING = object()
+
+
+class LRUTTLCache:
+    """
+    Thread-safe, size-bounded LRU cache with a per-entry TTL and hit/miss counters.
+
+    Entries expire after their TTL (monotonic clock); when the cache is full the
+    least recently used entry is evicted.
+    """
+
+    def __init__(self, max_size: int = 256, default_ttl: float = 300):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        """Return the cached value for key, or default if absent/expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        """Store value under key for ttl seconds (default_ttl if None). ttl <= 0 skips caching."""
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove key and return its value (expired or not)."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[1] if entry else default
+
+    def invalidate(self, predicate) -> int:
+        """Remove every entry whose key satisfies predicate(key). Returns the number removed."""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Size, capacity and hit/miss counters for diagnostics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,50 @@
+# backend/utils/fuzzy_index.py
+from collections import defaultdict
+
+
+def trigrams(text: str) -> set:
+    """Padded character trigrams, so short strings and word starts still produce grams."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to the ids of the strings containing them.
+
+    candidates() ranks ids by trigram overlap (Dice coefficient) with the query,
+    so expensive similarity scoring only needs to run on the few best candidates.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(list)  # trigram -> [ids]
+        self._gram_counts = {}  # id -> number of distinct trigrams
+
+    def add(self, item_id, text: str):
+        if not text:
+            return
+        grams = trigrams(text)
+        self._gram_counts[item_id] = len(grams)
+        for gram in grams:
+            self._postings[gram].append(item_id)
+
+    def candidates(self, query: str, limit: int = 25) -> list:
+        """Returns up to limit (id, overlap_score) pairs, best first. Ids sharing no trigram are skipped."""
+        if not query:
+            return []
+
+        query_grams = trigrams(query)
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for item_id in self._postings.get(gram, ()):
+                shared[item_id] += 1
+
+        scored = [
+            (item_id, 2.0 * count / (len(query_grams) + self._gram_counts[item_id]))
+            for item_id, count in shared.items()
+        ]
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        return scored[:limit]
+
+    def __len__(self):
+        return len(self._gram_counts)
@@ -2,7 +2,7 @@
 import re
 import json
 from logs.log_utils import log_execution
-import cohere
+from utils import llm_client
 import os
 from dotenv import load_dotenv
 
@@ -40,55 +40,65 @@ MEET_PATTERNS = [
     r'\b(meet link|google meet)\b'
 ]
 
-def is_greeting_or_smalltalk(text: str) -> bool:
-    """Check if text is greeting or small talk."""
-    text_lower = text.lower()
+# Intents in priority order with their confidence: the first intent with a
+# pattern matching anywhere in the text wins
+INTENT_RULES = [
+    ("chat", 0.95, GREETING_PATTERNS + SMALL_TALK_PATTERNS),
+    ("email", 0.85, EMAIL_PATTERNS),
+    ("meet", 0.9, MEET_PATTERNS),
+    ("calendar", 0.85, CALENDAR_PATTERNS),
+    ("drive", 0.85, DRIVE_PATTERNS),
+]
 
-    for pattern in GREETING_PATTERNS + SMALL_TALK_PATTERNS:
-        if re.search(pattern, text_lower, re.IGNORECASE):
-            return True
+def _compile_intent_matcher(rules) -> re.Pattern:
+    """
+    Compiles the rules into one anchored alternation, one branch per intent in
+    priority order. Each branch is a lookahead that searches the whole text for
+    the intent's patterns, then captures an empty group named after the intent,
+    so match().lastgroup is the highest-priority intent found.
+
+    A plain finditer over a combined alternation would not keep the priorities:
+    a long lower-priority match (".*drive") could swallow an email keyword.
+    """
+    branches = []
+    for intent, _, patterns in rules:
+        alternatives = "|".join(f"(?:{pattern})" for pattern in patterns)
+        branches.append(f"(?=(?s:.*?)(?:{alternatives}))(?P<{intent}>)")
+    # Patterns are lowercase and run on lowercased text: IGNORECASE would roughly double the cost
+    return re.compile("^(?:" + "|".join(branches) + ")")
+
+INTENT_MATCHER = _compile_intent_matcher(INTENT_RULES)
+INTENT_CONFIDENCE = {intent: confidence for intent, confidence, _ in INTENT_RULES}
+SMALLTALK_MATCHER = re.compile("|".join(f"(?:{p})" for p in GREETING_PATTERNS + SMALL_TALK_PATTERNS))
+
+# Planner domains and the words that pull their actions into the planner prompt.
+# Matching is generous on purpose: an extra domain only costs prompt tokens,
+# a missing one leaves the planner without the action it needs.
+PLANNER_DOMAIN_PATTERNS = {
+    "email": re.compile(r'\b(e-?mails?|mails?|inbox|unread|send|compose|draft|reply|forward|messages?|star|starred|archive|mark as)\b'),
+    "calendar": re.compile(r'\b(calendar|meetings?|meet|events?|schedule|appointments?|reschedule|agenda|calls?|instant)\b'),
+    "contacts": re.compile(r'\b(contacts?|phone|numbers?|email address|email id|what is|who is)\b|\'s (e-?mail|phone|number)\b'),
+    "drive": re.compile(r'\b(drive|files?|folders?|upload|rename|my documents|look for)\b'),
+    "tasks": re.compile(r'\b(tasks?|to-?dos?|to do list|remind me|reminders?)\b'),
+    "sheets": re.compile(r'\b(sheets?|spreadsheets?|cells?|rows?|columns?)\b'),
+    "docs": re.compile(r'\b(docs?|documents?)\b'),
+}
 
-    return False
+def is_greeting_or_smalltalk(text: str) -> bool:
+    """Check if text is greeting or small talk."""
+    return SMALLTALK_MATCHER.search(text.lower()) is not None
 
 def classify_intent_heuristic(text: str) -> dict:
     """
     Heuristic-based intent classification (fast, no LLM).
+    One call to the precompiled INTENT_MATCHER finds the highest-priority intent.
     Returns: {"intent": "chat|email|drive|calendar|meet", "confidence": 0-1, "method": "heuristic"}
     """
-    text_lower = text.lower()
-
-    if is_greeting_or_smalltalk(text):
-        return {
-            "intent": "chat",
-            "confidence": 0.95,
-            "method": "heuristic"
-        }
-
-    if any(re.search(pattern, text_lower, re.IGNORECASE) for pattern in EMAIL_PATTERNS):
+    match = INTENT_MATCHER.match(text.lower())
+    if match:
         return {
-            "intent": "email",
-            "confidence": 0.85,
-            "method": "heuristic"
-        }
-
-    if any(re.search(pattern, text_lower, re.IGNORECASE) for pattern in MEET_PATTERNS):
-        return {
-            "intent": "meet",
-            "confidence": 0.9,
-            "method": "heuristic"
-        }
-
-    if any(re.search(pattern, text_lower, re.IGNORECASE) for pattern in CALENDAR_PATTERNS):
-        return {
-            "intent": "calendar",
-            "confidence": 0.85,
-            "method": "heuristic"
-        }
-
-    if any(re.search(pattern, text_lower, re.IGNORECASE) for pattern in DRIVE_PATTERNS):
-        return {
-            "intent": "drive",
-            "confidence": 0.85,
+            "intent": match.lastgroup,
+            "confidence": INTENT_CONFIDENCE[match.lastgroup],
             "method": "heuristic"
         }
 
@@ -98,6 +108,14 @@ def classify_intent_heuristic(text: str) -> dict:
         "method": "heuristic"
     }
 
+def classify_planner_domains(text: str) -> list:
+    """
+    Returns every planner domain the text mentions, in PLANNER_DOMAIN_PATTERNS order
+    (empty if none). Used to send the planner only the relevant action schemas.
+    """
+    text_lower = text.lower()
+    return [domain for domain, pattern in PLANNER_DOMAIN_PATTERNS.items() if pattern.search(text_lower)]
+
 def classify_intent_llm(text: str) -> dict:
     """
     LLM-based intent classification for ambiguous cases.
@@ -113,12 +131,12 @@ def classify_intent_llm(text: str) -> dict:
     )
 
     try:
-        co = cohere.Client(COHERE_API_KEY)
-        response = co.chat(
-            model='command-a-03-2025',
+        response = llm_client.chat(
             message=prompt,
             max_tokens=100,
-            temperature=0.3
+            temperature=0.3,
+            timeout=5,
+            retries=1
         )
 
         result_text = response.text.strip()
@@ -0,0 +1,144 @@
+# backend/utils/llm_client.py
+"""
+Process-wide Cohere client.
+
+One cohere.Client backed by a pooled keep-alive httpx.Client is shared by every
+LLM call site, so requests reuse TLS connections instead of paying a handshake
+each time. chat() adds per-call timeouts and retry with exponential backoff;
+chat_stream() yields the reply as it is generated.
+"""
+import os
+import random
+import threading
+import time
+
+import cohere
+import httpx
+from dotenv import load_dotenv
+
+from utils.tracing import span
+
+load_dotenv()
+COHERE_API_KEY = os.getenv("COHERE_API_KEY")
+COHERE_MODEL = 'command-a-03-2025'
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))  # seconds, default per call
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))  # seconds
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> cohere.Client:
+    """Returns the shared Cohere client, creating it on first use (after any gunicorn fork)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=LLM_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                        keepalive_expiry=120
+                    ),
+                    timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+                )
+                _client = cohere.Client(api_key=COHERE_API_KEY, httpx_client=http_client, timeout=LLM_TIMEOUT)
+    return _client
+
+
+def _is_transient(error: Exception) -> bool:
+    """Network failures, timeouts, rate limits and 5xx responses are worth retrying."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code == 429 or (status_code is not None and status_code >= 500)
+
+
+def _backoff(attempt: int) -> float:
+    return LLM_BACKOFF_BASE * (2 ** attempt) * (1 + random.random() * 0.25)
+
+
+def chat(message: str, preamble: str = None, max_tokens: int = 400, temperature: float = 0.7,
+         timeout: float = None, retries: int = None, model: str = COHERE_MODEL):
+    """
+    Sends a chat request through the shared client.
+
+    :param message: User message
+    :param preamble: Optional system preamble
+    :param timeout: Per-attempt timeout in seconds (default LLM_TIMEOUT)
+    :param retries: Retries on transient errors (default LLM_MAX_RETRIES)
+    :return: Cohere chat response
+    :raises: The last error once retries are exhausted, or any non-transient error
+    """
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    retries = LLM_MAX_RETRIES if retries is None else retries
+
+    kwargs = {
+        "model": model,
+        "message": message,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        # Retries are handled here so backoff applies to timeouts too
+        "request_options": {"timeout_in_seconds": timeout, "max_retries": 0},
+    }
+    if preamble:
+        kwargs["preamble"] = preamble
+
+    attempt = 0
+    while True:
+        try:
+            with span("cohere", attempt=attempt):
+                return get_client().chat(**kwargs)
+        except Exception as e:
+            if attempt >= retries or not _is_transient(e):
+                raise
+            delay = _backoff(attempt)
+            print(f"⚠️ Cohere call failed ({e}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
+def chat_stream(message: str, preamble: str = None, max_tokens: int = 400, temperature: float = 0.7,
+                timeout: float = None, retries: int = None, model: str = COHERE_MODEL):
+    """
+    Streams a chat reply through the shared client, yielding text chunks as they are generated.
+    Transient errors are retried only until the first chunk has been yielded.
+
+    :param timeout: Per-attempt timeout in seconds (default LLM_TIMEOUT)
+    :param retries: Retries on transient errors (default LLM_MAX_RETRIES)
+    :raises: The last error once retries are exhausted, any non-transient error,
+             or any error after output has started
+    """
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    retries = LLM_MAX_RETRIES if retries is None else retries
+
+    kwargs = {
+        "model": model,
+        "message": message,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "request_options": {"timeout_in_seconds": timeout, "max_retries": 0},
+    }
+    if preamble:
+        kwargs["preamble"] = preamble
+
+    attempt = 0
+    started = False
+    while True:
+        try:
+            for event in get_client().chat_stream(**kwargs):
+                if event.event_type == "text-generation" and event.text:
+                    started = True
+                    yield event.text
+            return
+        except Exception as e:
+            if started or attempt >= retries or not _is_transient(e):
+                raise
+            delay = _backoff(attempt)
+            print(f"⚠️ Cohere stream failed ({e}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,88 @@
+# backend/utils/local_store.py
+"""
+Shared plumbing for the per-user local mirrors of Google data (Gmail store,
+Drive index, contacts index, calendar cache) and other per-user critical sections.
+
+- UserLocks: one lock per user, dropped as soon as nobody holds or waits for it,
+  so the table does not grow with every user the process has ever served.
+- BackgroundSync: runs a user's full sync in a daemon thread, at most one per
+  user at a time, under that user's lock.
+- escape_like: escapes text for a SQLite LIKE pattern used with ESCAPE '\\'.
+"""
+import threading
+from contextlib import contextmanager
+from threading import Lock
+
+
+class UserLocks:
+    """Per-user mutual exclusion: with locks.hold(user_email): ..."""
+
+    def __init__(self):
+        self._entries = {}  # user_email -> [lock, threads holding or waiting]
+        self._guard = Lock()
+
+    @contextmanager
+    def hold(self, user_email: str):
+        with self._guard:
+            entry = self._entries.get(user_email)
+            if entry is None:
+                entry = self._entries[user_email] = [Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._entries[user_email]
+
+    def __len__(self):
+        with self._guard:
+            return len(self._entries)
+
+
+class BackgroundSync:
+    """
+    Starts sync(user_email) in a daemon thread under the user's lock in locks.
+    A start for a user whose sync is already running is ignored; errors are printed.
+    """
+
+    def __init__(self, name: str, locks: UserLocks, sync):
+        """
+        :param name: Thread name and log label (e.g. "drive-index-sync")
+        :param sync: function(user_email) doing the full sync
+        """
+        self.name = name
+        self.locks = locks
+        self.sync = sync
+        self._running = set()
+        self._guard = Lock()
+
+    def _run(self, user_email: str):
+        try:
+            with self.locks.hold(user_email):
+                self.sync(user_email)
+        except Exception as e:
+            print(f"⚠️ {self.name} failed for {user_email}: {e}")
+        finally:
+            with self._guard:
+                self._running.discard(user_email)
+
+    def start(self, user_email: str) -> bool:
+        """:return: True if a new sync was started"""
+        with self._guard:
+            if user_email in self._running:
+                return False
+            self._running.add(user_email)
+        threading.Thread(target=self._run, args=(user_email,), name=self.name, daemon=True).start()
+        return True
+
+    def is_running(self, user_email: str) -> bool:
+        with self._guard:
+            return user_email in self._running
+
+
+def escape_like(text: str) -> str:
+    """Escapes LIKE wildcards in text; the query must say ESCAPE '\\'. Add % yourself."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -1,11 +1,20 @@
 # backend/utils/recipient_resolver.py
 import re
 from difflib import SequenceMatcher
-from google_services.contacts_utils import list_contacts, search_contacts
+from google_services.contacts_index import get_contacts
 from logs.log_utils import log_execution
+from utils.cache import LRUTTLCache, MISSING
+from utils.fuzzy_index import TrigramIndex
 
 EMAIL_REGEX = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
 
+# Only this many best trigram candidates (per field) are scored with SequenceMatcher
+MATCH_CANDIDATE_LIMIT = 25
+
+# Matchers keyed by id() of the contact list they index; contacts_index returns the
+# same list object until the user's contacts change
+_matcher_cache = LRUTTLCache(max_size=64, default_ttl=3600)
+
 def extract_emails_from_text(text: str) -> list:
     """Extract all email addresses from text using regex."""
     emails = EMAIL_REGEX.findall(text)
@@ -24,6 +33,75 @@ def calculate_similarity(a: str, b: str) -> float:
     """Calculate string similarity ratio."""
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
+def _similarity_above_half(a: str, b: str) -> float:
+    """
+    calculate_similarity, but returns 0 early when the ratio cannot exceed 0.5
+    (quick_ratio is an upper bound), since such scores never count as a match.
+    """
+    matcher = SequenceMatcher(None, a.lower(), b.lower())
+    if matcher.real_quick_ratio() <= 0.5 or matcher.quick_ratio() <= 0.5:
+        return 0.0
+    return matcher.ratio()
+
+class ContactMatcher:
+    """
+    Precomputed trigram indexes over a contact list's normalized names and emails.
+    Only the best trigram candidates are scored with calculate_similarity, so the
+    scores (and the 0.7 / 0.85 thresholds) are the same as a full scan.
+    """
+
+    def __init__(self, contacts: list):
+        self.contacts = contacts
+        self._names = []
+        self._emails = []
+        self._name_index = TrigramIndex()
+        self._email_index = TrigramIndex()
+
+        for i, contact in enumerate(contacts):
+            name_norm = normalize_name(contact.get('name', ''))
+            email_lower = contact.get('email', '').lower()
+            self._names.append(name_norm)
+            self._emails.append(email_lower)
+            self._name_index.add(i, name_norm)
+            self._email_index.add(i, email_lower)
+
+    def match(self, query: str, candidate_limit: int = MATCH_CANDIDATE_LIMIT) -> list:
+        """Returns [{"contact", "score", "matched_field"}] with score > 0.5, best first."""
+        query_norm = normalize_name(query)
+        query_lower = query.lower()
+
+        candidate_ids = {i for i, _ in self._name_index.candidates(query_norm, candidate_limit)}
+        candidate_ids.update(i for i, _ in self._email_index.candidates(query_lower, candidate_limit))
+
+        matches = []
+        for i in candidate_ids:
+            score_name = _similarity_above_half(query_norm, self._names[i])
+            score_email = _similarity_above_half(query_lower, self._emails[i])
+
+            best_score = max(score_name, score_email)
+
+            if best_score > 0.5:
+                matches.append({
+                    "contact": self.contacts[i],
+                    "score": best_score,
+                    "matched_field": "name" if score_name > score_email else "email"
+                })
+
+        matches.sort(key=lambda x: x['score'], reverse=True)
+        return matches
+
+
+def get_contact_matcher(contacts: list) -> ContactMatcher:
+    """Returns the matcher for this contact list, building it only the first time the list is seen."""
+    entry = _matcher_cache.get(id(contacts))
+    if entry is not MISSING and entry.contacts is contacts:
+        return entry
+
+    matcher = ContactMatcher(contacts)
+    _matcher_cache.set(id(contacts), matcher)
+    return matcher
+
+
 def fuzzy_match_contact(query: str, contacts: list, threshold: float = 0.7) -> dict:
     """
     Fuzzy match a query against a list of contacts.
@@ -35,27 +113,7 @@ def fuzzy_match_contact(query: str, contacts: list, threshold: float = 0.7) -> d
         "best_score": highest similarity score
     }
     """
-    query_norm = normalize_name(query)
-    matches = []
-
-    for contact in contacts:
-        contact_name = contact.get('name', '')
-        contact_email = contact.get('email', '')
-
-        name_norm = normalize_name(contact_name)
-        score_name = calculate_similarity(query_norm, name_norm)
-        score_email = calculate_similarity(query.lower(), contact_email.lower())
-
-        best_score = max(score_name, score_email)
-
-        if best_score > 0.5:
-            matches.append({
-                "contact": contact,
-                "score": best_score,
-                "matched_field": "name" if score_name > score_email else "email"
-            })
-
-    matches.sort(key=lambda x: x['score'], reverse=True)
+    matches = get_contact_matcher(contacts).match(query)
 
     if not matches:
         return {
@@ -111,9 +169,10 @@ def resolve_recipients(text: str, user_email: str = None) -> dict:
             "ambiguous_matches": []
         }
 
-    contact_search_result = list_contacts(max_results=100, user_email=user_email)
+    # Only contacts with an address can be recipients
+    contacts, error = get_contacts(user_email, require_email=True)
 
-    if not contact_search_result.get('success'):
+    if error:
         if user_email:
             log_execution(user_email, "RECIPIENT_RESOLVER", "FAILED", {
                 "reason": "Cannot fetch contacts"
@@ -125,8 +184,6 @@ def resolve_recipients(text: str, user_email: str = None) -> dict:
             "ambiguous_matches": []
         }
 
-    contacts = contact_search_result.get('details', [])
-
     fuzzy_result = fuzzy_match_contact(text, contacts, threshold=0.7)
 
     if fuzzy_result['match']:
@@ -0,0 +1,30 @@
+# backend/utils/stream_events.py
+"""
+Progress events for the streaming planner route.
+
+/planner/stream installs a sink for the request it is serving; code deeper in
+the call stack (the executor, Gmail batch callbacks) calls emit() without
+knowing whether anyone is listening. Outside a stream emit() is a no-op.
+"""
+from contextvars import ContextVar
+
+_sink = ContextVar("stream_event_sink", default=None)
+
+
+def set_sink(sink):
+    """
+    Routes emit() calls in the current context to sink(event, data).
+    :return: Token to pass to reset_sink
+    """
+    return _sink.set(sink)
+
+
+def reset_sink(token):
+    _sink.reset(token)
+
+
+def emit(event: str, data):
+    """Sends a progress event to the active stream, if any."""
+    sink = _sink.get()
+    if sink is not None:
+        sink(event, data)
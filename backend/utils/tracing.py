@@ -0,0 +1,174 @@
+# backend/utils/tracing.py
+"""
+Request-scoped latency tracing.
+
+Every Flask request gets a trace, held in a ContextVar so it follows the request
+into plan-step workers and the async Google I/O loop. Code on the request path
+wraps a stage in span("stage") (or decorates it with @traced("stage")); the
+trace records each span's start offset and duration on the monotonic clock.
+
+When the request ends, span durations are added to per-stage rolling windows
+(TRACE_WINDOW samples each) that get_trace_stats() summarises as percentiles
+for /metrics. A client that sends "X-Debug-Trace: 1" also gets the stage
+breakdown back in a Server-Timing header. Outside a request, span() does nothing.
+"""
+import functools
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Samples kept per stage for percentiles
+TRACE_WINDOW = int(os.getenv("TRACE_WINDOW", "1000"))
+# Requests slower than this print their stage breakdown (0 prints every traced request)
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "2000"))
+
+DEBUG_HEADER = "X-Debug-Trace"
+
+_current = ContextVar("trace", default=None)
+
+_windows = {}  # stage -> deque of durations in ms
+_windows_lock = threading.Lock()
+
+
+class Trace:
+    """Spans recorded for one request: (stage, start offset ms, duration ms, attributes)."""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.started = time.monotonic()
+        self.spans = []
+        self.lock = threading.Lock()  # spans arrive from worker threads and the async loop
+
+    def add(self, stage: str, started: float, duration: float, attrs: dict):
+        with self.lock:
+            self.spans.append((stage, (started - self.started) * 1000, duration * 1000, attrs))
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
+
+    def totals(self) -> dict:
+        """Returns {stage: (total ms, count)} in order of first appearance."""
+        totals = {}
+        with self.lock:
+            for stage, _, duration, _ in self.spans:
+                total, count = totals.get(stage, (0.0, 0))
+                totals[stage] = (total + duration, count + 1)
+        return totals
+
+
+def start_trace(name: str):
+    """
+    Opens a trace for the current context.
+    :return: Token to pass to finish_trace
+    """
+    return _current.set(Trace(name))
+
+
+def current_trace():
+    return _current.get()
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """Times the enclosed block as one span of the current trace (no-op without a trace)."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        trace.add(stage, started, time.monotonic() - started, attrs)
+
+
+def traced(stage: str):
+    """Decorator form of span() for a whole function."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _record(stage: str, duration_ms: float):
+    with _windows_lock:
+        window = _windows.get(stage)
+        if window is None:
+            window = _windows[stage] = deque(maxlen=TRACE_WINDOW)
+        window.append(duration_ms)
+
+
+def finish_trace(token, record: bool = True):
+    """
+    Closes the current trace, adds its spans to the per-stage windows and
+    returns it (None if there was no trace).
+
+    :param record: False to close the trace without counting it (e.g. a streamed
+                   response whose work happens after the view returns)
+    """
+    trace = _current.get()
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Closed from another context (a streamed response torn down by the server)
+        _current.set(None)
+    if trace is None or not record:
+        return trace
+
+    total = trace.elapsed_ms()
+    _record(f"request:{trace.name}", total)
+    with trace.lock:
+        spans = list(trace.spans)
+    for stage, _, duration, _ in spans:
+        _record(stage, duration)
+
+    if spans and total >= TRACE_SLOW_MS:
+        breakdown = ", ".join(
+            f"{stage} {ms:.0f} ms" + (f" ({count}x)" if count > 1 else "")
+            for stage, (ms, count) in trace.totals().items()
+        )
+        print(f"⏱️ {trace.name} took {total:.0f} ms [{trace.id}]: {breakdown}")
+    return trace
+
+
+def server_timing_header(trace: Trace) -> str:
+    """Formats the trace as a Server-Timing header value (one entry per stage, plus the total)."""
+    entries = [
+        f'{stage.replace(":", ".")};dur={ms:.1f};desc="{count} call{"s" if count > 1 else ""}"'
+        for stage, (ms, count) in trace.totals().items()
+    ]
+    entries.append(f"total;dur={trace.elapsed_ms():.1f}")
+    return ", ".join(entries)
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    # Nearest-rank percentile: the smallest value with at least fraction of the samples at or below it
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return round(sorted_values[index], 1)
+
+
+def get_trace_stats() -> dict:
+    """Per-stage latency percentiles (ms) over the last TRACE_WINDOW samples of each stage."""
+    with _windows_lock:
+        windows = {stage: sorted(window) for stage, window in _windows.items()}
+
+    return {
+        stage: {
+            "count": len(values),
+            "p50": _percentile(values, 0.5),
+            "p90": _percentile(values, 0.9),
+            "p99": _percentile(values, 0.99),
+            "max": round(values[-1], 1)
+        }
+        for stage, values in sorted(windows.items()) if values
+    }
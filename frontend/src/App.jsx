@@ -173,6 +173,11 @@ function App() {
       const data = res.data;
       console.log("📥 Received from backend:", data);
 
+      // Multi-step plans attach the other steps' results to a preview/approval
+      if (["EMAIL_PREVIEW", "CALENDAR_PREVIEW", "APPROVAL"].includes(data.response_type) && data.response) {
+        setChatHistory(prev => [...prev, { message: data.response, sender: "agent" }]);
+      }
+
       if (data.response_type === "EMAIL_PREVIEW") {
         console.log("✅ EMAIL_PREVIEW detected, opening GmailPreview");
         console.log("📧 Email preview data:", data.params);
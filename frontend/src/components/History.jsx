@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { Link } from "react-router-dom";
 import axios from "../axios";
 
@@ -6,12 +6,18 @@ export default function History() {
   const [logs, setLogs] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [nextBeforeId, setNextBeforeId] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Older pages are kept until the user hits Refresh
+  const olderPagesLoaded = useRef(false);
 
   useEffect(() => {
     fetchLogs();
 
     // 🔥 AUTO REFRESH EVERY 10 SECONDS (stops memory leak with cleanup)
-    const interval = setInterval(fetchLogs, 10000);
+    const interval = setInterval(() => {
+      if (!olderPagesLoaded.current) fetchLogs();
+    }, 10000);
     return () => clearInterval(interval);
   }, []);
 
@@ -20,6 +26,8 @@ export default function History() {
       setLoading(true);
       const response = await axios.get("/logs");  // axios already sends Bearer token
       setLogs(response.data.logs || []);
+      setNextBeforeId(response.data.next_before_id ?? null);
+      olderPagesLoaded.current = false;
       setError(null);
       setLoading(false);
     } catch (err) {
@@ -29,6 +37,21 @@ export default function History() {
     }
   };
 
+  const loadOlderLogs = async () => {
+    if (!nextBeforeId) return;
+    try {
+      setLoadingMore(true);
+      const response = await axios.get("/logs", { params: { before_id: nextBeforeId } });
+      setLogs((current) => [...current, ...(response.data.logs || [])]);
+      setNextBeforeId(response.data.next_before_id ?? null);
+      olderPagesLoaded.current = true;
+    } catch (err) {
+      console.error("Error fetching older logs:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const getStatusColor = (status) => {
     switch (status) {
       case "SUCCESS":
@@ -187,6 +210,24 @@ export default function History() {
               </div>
             </div>
           ))}
+
+          {nextBeforeId && (
+            <button
+              onClick={loadOlderLogs}
+              disabled={loadingMore}
+              style={{
+                padding: "0.5rem 1rem",
+                backgroundColor: "#6c757d",
+                color: "white",
+                border: "none",
+                borderRadius: "5px",
+                cursor: loadingMore ? "default" : "pointer",
+                alignSelf: "center"
+              }}
+            >
+              {loadingMore ? "Loading..." : "Load older"}
+            </button>
+          )}
         </div>
       )}
     </div>